@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Pool of long-lived headless browsers for --render mode.
+
+Starting Chrome costs seconds per launch, so instead of one browser per URL the
+crawler keeps up to `size` drivers alive and hands them out per page. A driver is
+quit and replaced after `max_uses` pages (to bound memory growth in long crawls)
+or as soon as it raises, since a failed driver may be left in an unknown state.
+
+render(url) blocks; render_async(url) runs it on the pool's own threads so the
+concurrent crawler can render without stalling the event loop.
+Requires: selenium (and a Chrome/chromedriver install)
+"""
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+def create_driver():
+    """Launches a headless Chrome driver."""
+    try:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+    except ImportError:
+        print("Error: selenium is not installed. Please install it via 'pip install selenium'")
+        raise
+    options = Options()
+    options.add_argument("--headless=new")
+    # Optionally, specify your chromedriver path if needed.
+    return webdriver.Chrome(options=options)
+
+class PooledBrowser:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+class BrowserPool:
+    def __init__(self, size=2, max_uses=50, driver_factory=None):
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.driver_factory = driver_factory or create_driver
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.launched = 0
+        self.lock = threading.Lock()
+        self.closed = False
+        self.executor = None
+
+    def acquire(self):
+        """Returns an idle browser, launching one if the pool is not yet full."""
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            launch = self.created < self.size
+            if launch:
+                self.created += 1
+        if not launch:
+            return self.idle.get()
+        try:
+            browser = PooledBrowser(self.driver_factory())
+        except Exception:
+            with self.lock:
+                self.created -= 1
+            raise
+        self.launched += 1
+        return browser
+
+    def release(self, browser, healthy=True):
+        """Returns a browser to the pool, or quits it when it is worn out or broken."""
+        if healthy and not self.closed and (not self.max_uses or browser.uses < self.max_uses):
+            self.idle.put(browser)
+            return
+        self.discard(browser)
+
+    def discard(self, browser):
+        with self.lock:
+            self.created -= 1
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            logging.error(f"Failed to quit browser: {e}")
+
+    def render(self, url):
+        """Loads `url` in a pooled browser and returns the rendered HTML."""
+        browser = self.acquire()
+        try:
+            browser.uses += 1
+            browser.driver.get(url)
+            html = browser.driver.page_source
+        except Exception:
+            self.release(browser, healthy=False)
+            raise
+        self.release(browser)
+        return html
+
+    async def render_async(self, url):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="render")
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.render, url)
+
+    def close(self):
+        self.closed = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        while True:
+            try:
+                browser = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(browser)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Crawl checkpoints for resumable crawls.
+
+A checkpoint is a SQLite file holding everything needed to continue a crawl:
+the crawl's arguments, the pending frontier, the visited set, every page record
+produced so far (with a failure counter per page), and which seed URL the
+synchronous crawler is on. Page records are written as pages finish; the
+frontier and visited set are snapshotted every `interval` seconds, on Ctrl-C and
+when the crawl stops. Each snapshot commits in a single transaction, so the file
+always describes a consistent point of the crawl.
+
+`crawl --resume <checkpoint>` restores that point: completed pages are not
+fetched again, the pending frontier is crawled in its original order, and pages
+that failed are retried until they have failed --max-retries times.
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+from frontier import FrontierItem
+from output import to_json
+
+class VisitedSet:
+    """Wraps a crawl's visited set (see dedup.py) and remembers the URLs added since the last checkpoint."""
+    def __init__(self, backend):
+        self.backend = backend
+        self.normalize = getattr(backend, "normalize", None)
+        self.added = []
+
+    def __contains__(self, url):
+        return url in self.backend
+
+    def __len__(self):
+        return len(self.backend)
+
+    def add(self, url):
+        if url not in self.backend:
+            self.backend.add(url)
+            self.added.append(url)
+
+def load_checkpoint_args(path):
+    """Returns the crawl arguments stored in a checkpoint file."""
+    if not os.path.exists(path):
+        raise ValueError(f"Checkpoint {path} does not exist")
+    db = sqlite3.connect(path)
+    try:
+        row = db.execute("SELECT value FROM meta WHERE key = 'args'").fetchone()
+    except sqlite3.Error as e:
+        raise ValueError(f"{path} is not a crawl checkpoint: {e}")
+    finally:
+        db.close()
+    if row is None:
+        raise ValueError(f"{path} is not a crawl checkpoint")
+    return json.loads(row[0])
+
+class CrawlCheckpoint:
+    def __init__(self, path, interval=30, resume=False, max_retries=3):
+        self.path = path
+        self.interval = interval
+        self.max_retries = max_retries
+        self.db = sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS frontier (seq INTEGER PRIMARY KEY, url TEXT, depth INTEGER, indent INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, indent INTEGER, record TEXT, "
+            "failed INTEGER DEFAULT 0, attempts INTEGER DEFAULT 0)"
+        )
+        self.db.commit()
+        self.last_saved = time.monotonic()
+        self.visited = None
+        # The sinks fed the same page records (see open_checkpoint); they are flushed before every
+        # snapshot, so a page the checkpoint has committed is never still buffered in one of them.
+        self.sinks = None
+        # Failed pages are re-queued once, by the first restore() after resuming.
+        self.retry_failed = resume
+
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def start(self, args):
+        """Starts a new crawl in this checkpoint, discarding any previous state."""
+        for table in ("meta", "frontier", "visited", "pages"):
+            self.db.execute(f"DELETE FROM {table}")
+        self.set_meta("args", args)
+        self.set_meta("seed", 0)
+        self.db.commit()
+
+    @property
+    def seed(self):
+        """Index of the seed URL the synchronous crawler is working on."""
+        return self.get_meta("seed", 0)
+
+    @property
+    def saved(self):
+        """True once a frontier snapshot has been saved for the current crawl (or seed)."""
+        return self.get_meta("saved", False)
+
+    @property
+    def page_count(self):
+        return self.db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def records(self):
+        """Yields the stored page records in the order they were produced."""
+        for (record,) in self.db.execute("SELECT record FROM pages ORDER BY rowid"):
+            yield json.loads(record)
+
+    def track_visited(self, visited, initial=()):
+        """
+        Loads the checkpointed URLs into `visited` and returns it wrapped for tracking.
+        `initial` lists URLs already in `visited` (the seeds) that still need saving.
+        """
+        for (url,) in self.db.execute("SELECT url FROM visited"):
+            visited.add(url)
+        self.visited = VisitedSet(visited)
+        self.visited.added.extend(initial)
+        return self.visited
+
+    def restore(self, depth):
+        """
+        Returns (current, pending, retries): the item that was being crawled (or None),
+        the pending frontier items in order, and, right after resuming, the pages that
+        failed fewer than max_retries times. Retries are already in the visited set, so
+        the crawlers crawl them directly rather than through the frontier.
+        """
+        current = self.get_meta("current")
+        pending = [FrontierItem(*row) for row in self.db.execute("SELECT url, depth, indent FROM frontier ORDER BY seq")]
+        retries = []
+        if self.retry_failed:
+            self.retry_failed = False
+            rows = self.db.execute("SELECT url, indent FROM pages WHERE failed = 1 AND attempts < ?", (self.max_retries,)).fetchall()
+            retries = [FrontierItem(url, depth - indent, indent) for url, indent in rows]
+            if retries:
+                logging.info(f"Retrying {len(retries)} failed pages from the checkpoint.")
+        return (FrontierItem(*current) if current else None), pending, retries
+
+    # Sink interface: page records are stored as they are emitted.
+    def append(self, message):
+        pass
+
+    def page(self, record, document=None):
+        failed = 1 if "error" in record else 0
+        self.db.execute(
+            "INSERT INTO pages (url, indent, record, failed, attempts) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET record = excluded.record, failed = excluded.failed, "
+            "attempts = pages.attempts + excluded.attempts",
+            (record["url"], record.get("depth", 0), to_json(record), failed, failed)
+        )
+
+    def due(self):
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save(self, pending, current=None):
+        """Snapshots the frontier and visited set together with the pages stored so far."""
+        pending = list(pending)
+        if self.sinks is not None:
+            self.sinks.flush()
+        self.db.execute("DELETE FROM frontier")
+        self.db.executemany(
+            "INSERT INTO frontier (url, depth, indent) VALUES (?, ?, ?)",
+            [(item.url, item.depth, item.indent) for item in pending]
+        )
+        self.set_meta("current", list(current) if current else None)
+        self.set_meta("saved", True)
+        if self.visited is not None:
+            self.db.executemany("INSERT OR IGNORE INTO visited (url) VALUES (?)", [(url,) for url in self.visited.added])
+            self.visited.added = []
+        self.db.commit()
+        self.last_saved = time.monotonic()
+        logging.info(f"Checkpoint saved to {self.path}: {len(pending) + bool(current)} pending, {self.page_count} pages done.")
+
+    def finish_seed(self, next_seed):
+        """Marks a seed URL of a synchronous crawl as done and clears its frontier state."""
+        self.db.execute("DELETE FROM frontier")
+        self.db.execute("DELETE FROM visited")
+        self.set_meta("current", None)
+        self.set_meta("saved", False)
+        self.set_meta("seed", next_seed)
+        self.db.commit()
+        self.visited = None
+        self.last_saved = time.monotonic()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
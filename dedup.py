@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Visited-URL sets for the crawler.
+
+Every backend stores canonical URLs (see urls.py) and supports `url in visited`,
+`visited.add(url)`, len() and close(), so it can stand in for the plain set the
+crawlers use. Backends:
+  - memory: an exact in-memory set of canonical URLs (the default)
+  - bloom:  a Bloom filter sized for `capacity` URLs at `error_rate` false positives;
+            a few bits per URL, but a false positive skips a page that was never crawled
+  - disk:   an open-addressing hash table of 64-bit URL fingerprints in a memory-mapped
+            file, grown on demand; memory use is left to the OS page cache, so it scales
+            to crawls far larger than RAM. Collisions between 64-bit fingerprints are
+            negligible below billions of URLs.
+The visited set only lives for one crawl: the disk backend truncates its file when it
+is opened, and removes it on close() unless an explicit path was given. Resumable
+crawls restore their visited URLs from the checkpoint instead.
+"""
+import hashlib
+import logging
+import math
+import mmap
+import os
+import tempfile
+
+DEDUP_BACKENDS = ["memory", "bloom", "disk"]
+# Disk tables are grown (doubled) once this fraction of their slots is in use.
+MAX_LOAD = 0.7
+
+def url_digest(url, size):
+    return hashlib.blake2b(url.encode("utf-8", "surrogatepass"), digest_size=size).digest()
+
+class MemoryUrlSet:
+    def __init__(self, normalize=None):
+        self.normalize = normalize or (lambda url: url)
+        self.urls = set()
+
+    def __contains__(self, url):
+        return self.normalize(url) in self.urls
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add(self, url):
+        self.urls.add(self.normalize(url))
+
+    def close(self):
+        pass
+
+class BloomUrlSet:
+    def __init__(self, capacity=10000000, error_rate=0.001, normalize=None):
+        self.normalize = normalize or (lambda url: url)
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, url):
+        # Double hashing: k bit positions from the two halves of one 128-bit digest.
+        digest = url_digest(self.normalize(url), 16)
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def __contains__(self, url):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self.positions(url))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, url):
+        added = False
+        for p in self.positions(url):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                self.bits[p >> 3] |= 1 << (p & 7)
+                added = True
+        if added:
+            self.count += 1
+            if self.count == self.capacity + 1:
+                logging.warning(f"Bloom filter is over its capacity of {self.capacity} URLs; its false-positive rate will rise.")
+
+    def close(self):
+        pass
+
+class DiskUrlSet:
+    def __init__(self, path=None, capacity=1 << 20, normalize=None):
+        self.normalize = normalize or (lambda url: url)
+        self.temporary = path is None
+        if path is None:
+            fd, path = tempfile.mkstemp(suffix=".visited")
+            os.close(fd)
+        self.path = path
+        self.count = 0
+        self.file = self.mmap = self.table = None
+        self.slots = 1 << max(10, math.ceil(math.log2(max(1, capacity) / MAX_LOAD)))
+        self.file, self.mmap, self.table = self.open_table(self.path, self.slots)
+
+    @staticmethod
+    def open_table(path, slots):
+        f = open(path, "w+b")
+        f.truncate(slots * 8)
+        mm = mmap.mmap(f.fileno(), slots * 8)
+        return f, mm, memoryview(mm).cast("Q")
+
+    def fingerprint(self, url):
+        # 0 marks an empty slot, so it is never used as a fingerprint.
+        return int.from_bytes(url_digest(self.normalize(url), 8), "little") or 1
+
+    def probe(self, table, slots, fp):
+        """Returns (slot, found) for a fingerprint, using linear probing."""
+        mask = slots - 1
+        i = fp & mask
+        while True:
+            value = table[i]
+            if value == 0:
+                return i, False
+            if value == fp:
+                return i, True
+            i = (i + 1) & mask
+
+    def __contains__(self, url):
+        return self.probe(self.table, self.slots, self.fingerprint(url))[1]
+
+    def __len__(self):
+        return self.count
+
+    def add(self, url):
+        fp = self.fingerprint(url)
+        i, found = self.probe(self.table, self.slots, fp)
+        if found:
+            return
+        self.table[i] = fp
+        self.count += 1
+        if self.count > self.slots * MAX_LOAD:
+            self.grow()
+
+    def grow(self):
+        slots = self.slots * 2
+        tmp_path = self.path + ".grow"
+        f, mm, table = self.open_table(tmp_path, slots)
+        for fp in self.table:
+            if fp:
+                table[self.probe(table, slots, fp)[0]] = fp
+        self.release()
+        os.replace(tmp_path, self.path)
+        self.file, self.mmap, self.table, self.slots = f, mm, table, slots
+
+    def release(self):
+        self.table.release()
+        self.mmap.close()
+        self.file.close()
+
+    def close(self):
+        if self.table is None:
+            return
+        self.release()
+        self.table = None
+        if self.temporary:
+            os.remove(self.path)
+
+def create_url_set(backend="memory", normalize=None, capacity=10000000, error_rate=0.001, path=None):
+    if backend == "bloom":
+        return BloomUrlSet(capacity, error_rate, normalize)
+    if backend == "disk":
+        return DiskUrlSet(path, capacity, normalize)
+    if backend != "memory":
+        raise ValueError(f"Unknown dedup backend '{backend}', expected one of: {', '.join(DEDUP_BACKENDS)}")
+    return MemoryUrlSet(normalize)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Shared frontier for distributed crawls (crawl --role coordinator|worker).
+
+The coordinator creates a SQLite database holding the crawl's options, its seed
+URLs and, as the crawl proceeds, every URL discovered by any worker. Workers are
+separate processes, on this machine or on others that share the file, and lease
+their work from it:
+
+  - URLs are partitioned by a stable hash of their host, and each partition is owned
+    by one live worker at a time, so per-host politeness (rate limits, adaptive
+    concurrency, robots.txt) stays within a single process.
+  - Partitions are spread evenly over the live workers. A worker that has not sent a
+    heartbeat for --lease-ttl seconds loses its partitions, and the URLs it had
+    leased go back to pending for the new owner.
+  - Every URL is stored under its canonical form (the crawl's --strip-params and
+    --strip-trailing-slash settings), which is unique in the urls table, so the table is
+    also the crawl-wide visited set; the URL is fetched as it was first linked.
+
+The crawl is finished when no URL is pending or leased. All crawl state lives in the
+database, so an interrupted crawl continues when its processes are restarted.
+SQLite stands in for a networked store here: across machines, the file must be on
+storage with working file locks.
+"""
+import asyncio
+import hashlib
+import json
+import math
+import os
+import socket
+import sqlite3
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from frontier import FrontierItem
+
+PENDING, LEASED, DONE = 0, 1, 2
+# Options that describe one process rather than the crawl; they are not shared with workers.
+# (Checkpoints are not needed: the shared frontier itself is resumable.)
+LOCAL_OPTIONS = ["role", "frontier", "worker_id", "output", "local_workers", "checkpoint", "resume", "dedup_path"]
+
+def host_partition(url, partitions):
+    """Stable partition number of a URL's host (the same in every process)."""
+    host = urllib.parse.urlsplit(url).netloc.lower()
+    return int.from_bytes(hashlib.blake2b(host.encode("utf-8"), digest_size=8).digest(), "big") % partitions
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+def load_frontier_args(path):
+    """Returns the crawl arguments stored by the coordinator."""
+    if not os.path.exists(path):
+        raise ValueError(f"Shared frontier {path} does not exist; start the coordinator first")
+    store = FrontierStore(path)
+    try:
+        args = store.get_meta("args")
+    finally:
+        store.close()
+    if args is None:
+        raise ValueError(f"{path} is not a shared crawl frontier")
+    return args
+
+class FrontierStore:
+    def __init__(self, path, lease_ttl=60, normalize=None):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        # Canonical form of a URL, its key in the urls table; every process must use the same.
+        self.normalize = normalize or (lambda url: url)
+        # Autocommit; multi-statement updates take the write lock with BEGIN IMMEDIATE.
+        # A SharedFrontier uses the store from its own thread, one call at a time.
+        self.db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS urls (seq INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT UNIQUE, url TEXT, "
+            "partition INTEGER, depth INTEGER, indent INTEGER, state INTEGER DEFAULT 0, worker TEXT)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS urls_by_partition ON urls (partition, state, seq)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS urls_by_state ON urls (state)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS partitions (id INTEGER PRIMARY KEY, worker TEXT)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS workers (worker TEXT PRIMARY KEY, heartbeat REAL)")
+        self.partitions = self.get_meta("partitions")
+
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def start(self, args, seeds, depth, partitions=64):
+        """Creates the crawl (or keeps the existing one) and queues the seeds."""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            if self.get_meta("args") is None:
+                shared = {key: value for key, value in args.items() if key not in LOCAL_OPTIONS}
+                self.db.execute("INSERT INTO meta (key, value) VALUES ('args', ?)", (json.dumps(shared),))
+                self.db.execute("INSERT INTO meta (key, value) VALUES ('partitions', ?)", (json.dumps(partitions),))
+                self.db.executemany("INSERT INTO partitions (id, worker) VALUES (?, NULL)", [(i,) for i in range(partitions)])
+            self.partitions = self.get_meta("partitions")
+            self.insert([FrontierItem(seed, depth, 0) for seed in seeds])
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def insert(self, items):
+        rows = []
+        for item in items:
+            # Partitioned by the canonical URL, so every spelling of a host is in one partition.
+            key = self.normalize(item.url)
+            rows.append((key, item.url, host_partition(key, self.partitions), item.depth, item.indent))
+        self.db.executemany("INSERT OR IGNORE INTO urls (key, url, partition, depth, indent) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def update(self, discovered, completed):
+        """Queues discovered items and marks completed URLs done, in one transaction."""
+        if not discovered and not completed:
+            return
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.insert(discovered)
+            self.db.executemany("UPDATE urls SET state = ? WHERE key = ?", [(DONE, self.normalize(url)) for url in completed])
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def rebalance(self, worker):
+        """Heartbeat: claims this worker's fair share of partitions and returns the ones it owns."""
+        now = time.time()
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            self.db.execute("INSERT OR REPLACE INTO workers (worker, heartbeat) VALUES (?, ?)", (worker, now))
+            live = [row[0] for row in self.db.execute("SELECT worker FROM workers WHERE heartbeat >= ?", (now - self.lease_ttl,))]
+            share = math.ceil(self.partitions / len(live))
+            owned = [row[0] for row in self.db.execute("SELECT id FROM partitions WHERE worker = ? ORDER BY id", (worker,))]
+            if len(owned) > share:
+                # Hand back partitions with nothing in flight, so a new owner never overlaps with us on a host.
+                busy = {row[0] for row in self.db.execute("SELECT DISTINCT partition FROM urls WHERE state = ? AND worker = ?", (LEASED, worker))}
+                extra = [p for p in owned if p not in busy][:len(owned) - share]
+                self.db.executemany("UPDATE partitions SET worker = NULL WHERE id = ?", [(p,) for p in extra])
+                owned = [p for p in owned if p not in extra]
+            elif len(owned) < share:
+                placeholders = ",".join("?" * len(live))
+                free = [row[0] for row in self.db.execute(
+                    f"SELECT id FROM partitions WHERE worker IS NULL OR worker NOT IN ({placeholders}) ORDER BY id LIMIT ?",
+                    live + [share - len(owned)]
+                )]
+                for p in free:
+                    self.db.execute("UPDATE partitions SET worker = ? WHERE id = ?", (worker, p))
+                    # URLs a dead owner had leased are crawled again by the new owner.
+                    self.db.execute("UPDATE urls SET state = ?, worker = NULL WHERE partition = ? AND state = ?", (PENDING, p, LEASED))
+                owned += free
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return owned
+
+    def lease(self, worker, owned, limit):
+        """Leases up to `limit` pending URLs from the worker's partitions, oldest first."""
+        if not owned or limit <= 0:
+            return []
+        placeholders = ",".join("?" * len(owned))
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self.db.execute(
+                f"SELECT seq, url, depth, indent FROM urls WHERE state = ? AND partition IN ({placeholders}) ORDER BY seq LIMIT ?",
+                [PENDING] + list(owned) + [limit]
+            ).fetchall()
+            self.db.executemany("UPDATE urls SET state = ?, worker = ? WHERE seq = ?", [(LEASED, worker, row[0]) for row in rows])
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return [FrontierItem(url, depth, indent) for _, url, depth, indent in rows]
+
+    def release(self, worker):
+        """Returns a stopping worker's leased URLs and partitions to the pool."""
+        self.db.execute("BEGIN IMMEDIATE")
+        self.db.execute("UPDATE urls SET state = ?, worker = NULL WHERE state = ? AND worker = ?", (PENDING, LEASED, worker))
+        self.db.execute("UPDATE partitions SET worker = NULL WHERE worker = ?", (worker,))
+        self.db.execute("DELETE FROM workers WHERE worker = ?", (worker,))
+        self.db.execute("COMMIT")
+
+    def progress(self):
+        """Counts of pending, leased and done URLs, and the number of live workers."""
+        counts = dict(self.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+        live = self.db.execute("SELECT COUNT(*) FROM workers WHERE heartbeat >= ?", (time.time() - self.lease_ttl,)).fetchone()[0]
+        return counts.get(PENDING, 0), counts.get(LEASED, 0), counts.get(DONE, 0), live
+
+    def finished(self):
+        return self.db.execute("SELECT 1 FROM urls WHERE state < ? LIMIT 1", (DONE,)).fetchone() is None
+
+    def close(self):
+        self.db.close()
+
+class SharedFrontier:
+    """
+    Frontier interface (see frontier.py) over a FrontierStore, for async_crawl_page.
+
+    Leased URLs are handed to a local frontier (a HostFrontier, so politeness applies),
+    discovered links are written to the store in batches, and join() returns once the
+    whole crawl, not just this worker's share, is finished.
+
+    Store calls block on SQLite's write lock, so they all run in order on one thread of
+    the frontier's own, never on the event loop.
+    """
+    def __init__(self, store, local, worker_id=None, batch_size=100, poll_interval=1.0):
+        self.store = store
+        self.local = local
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.discovered = []
+        self.completed = []
+        self.owned = []
+        self.last_rebalance = 0.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frontier-store")
+        # Submitted store updates whose outcome has not been checked yet.
+        self.writes = []
+        # One refill at a time: a lease must not use partitions a concurrent heartbeat gave up.
+        self.refilling = asyncio.Lock()
+
+    def __len__(self):
+        return len(self.local)
+
+    def put(self, item):
+        self.discovered.append(item)
+        if len(self.discovered) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Queues the discovered and completed URLs for writing, without waiting for the write."""
+        self.writes.append(self.executor.submit(self.store.update, self.discovered, self.completed))
+        self.discovered, self.completed = [], []
+
+    async def call(self, method, *args):
+        """Runs a store method on the store's thread, after everything queued before it."""
+        return await asyncio.wrap_future(self.executor.submit(method, *args))
+
+    async def refill(self):
+        """Writes back finished work, sends a heartbeat when due, and leases more URLs."""
+        async with self.refilling:
+            self.flush()
+            writes, self.writes = self.writes, []
+            for write in writes:
+                await asyncio.wrap_future(write)
+            now = time.monotonic()
+            if now - self.last_rebalance >= self.poll_interval:
+                self.owned = await self.call(self.store.rebalance, self.worker_id)
+                self.last_rebalance = now
+            for item in await self.call(self.store.lease, self.worker_id, self.owned, self.batch_size - len(self.local)):
+                self.local.put(item)
+
+    async def get(self):
+        while not len(self.local):
+            await self.refill()
+            if not len(self.local):
+                await asyncio.sleep(self.poll_interval)
+        return await self.local.get()
+
+    def pending(self):
+        return self.local.pending()
+
+    def task_done(self, item=None):
+        self.local.task_done(item)
+        if item is not None:
+            self.completed.append(item.url)
+
+    async def join(self):
+        # Also this worker's heartbeat: pages in flight stay leased, so the crawl is
+        # only finished once every worker has written back its last page.
+        while True:
+            await self.refill()
+            if await self.call(self.store.finished):
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def close(self):
+        """Writes back what is left and gives up this worker's partitions; blocks until done."""
+        self.flush()
+        self.writes.append(self.executor.submit(self.store.release, self.worker_id))
+        self.executor.shutdown()
+        for write in self.writes:
+            write.result()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Shared per-page document for the crawler.
+
+A PageDocument wraps the HTML fetched for one URL and lazily computes the views
+that the crawler and its plugins need (parsed tree, visible text, lowercase text,
+tokens, links, images, title). Each view is computed at most once per page, so a
+page is parsed a single time no matter how many plugins look at it.
+
+Parser backends:
+  - html.parser: BeautifulSoup with Python's built-in parser (default)
+  - lxml: BeautifulSoup with lxml, much faster on large pages (requires: lxml)
+  - stream: title and hrefs are pulled by a streaming scanner without building a
+    tree; the full tree is only built (with html.parser) if a plugin asks for it
+"""
+import hashlib
+import re
+import threading
+import urllib.parse
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+TOKEN_PATTERN = re.compile(r"\w+")
+PARSERS = ["html.parser", "lxml", "stream"]
+# The BeautifulSoup backend used to build the full tree for each parser choice.
+TREE_BUILDERS = {"html.parser": "html.parser", "lxml": "lxml", "stream": "html.parser"}
+
+def check_parser(parser):
+    if parser not in TREE_BUILDERS:
+        raise ValueError(f"Unknown parser '{parser}', expected one of: {', '.join(PARSERS)}")
+    if parser == "lxml":
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("Error: lxml is not installed. Please run 'pip install lxml'")
+            raise
+
+class LinkTitleScanner(HTMLParser):
+    """
+    Streaming extractor that only collects the <title> text and <a href> values.
+    No tree is built, so memory and CPU stay proportional to what is extracted.
+    """
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.hrefs = []
+        self._title_parts = None
+        self._title_done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            for name, value in attrs:
+                if name == "href" and value is not None:
+                    self.hrefs.append(value)
+                    break
+        elif tag == "title" and not self._title_done:
+            self._title_parts = []
+        elif self._title_parts is not None:
+            # Markup inside <title> means there is no single title string.
+            self._title_parts = None
+            self._title_done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            if self._title_parts:
+                self.title = "".join(self._title_parts).strip()
+            self._title_parts = None
+            self._title_done = True
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+def scan_links_and_title(html):
+    scanner = LinkTitleScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner.title, scanner.hrefs
+
+class PageDocument:
+    def __init__(self, html, url, parser="html.parser"):
+        self.html = html
+        self.url = url
+        self.parser = parser
+        self._cache = {}
+        # Re-entrant because views are built on top of each other (text -> soup).
+        self._lock = threading.RLock()
+
+    def _memo(self, key, compute):
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = compute()
+            return self._cache[key]
+
+    @property
+    def soup(self):
+        """The parsed BeautifulSoup tree."""
+        return self._memo("soup", lambda: BeautifulSoup(self.html, TREE_BUILDERS[self.parser]))
+
+    @property
+    def text(self):
+        """Visible text of the page, stripped of surrounding whitespace."""
+        return self._memo("text", lambda: self.soup.get_text(separator=" ").strip())
+
+    @property
+    def lower_text(self):
+        return self._memo("lower_text", lambda: self.text.lower())
+
+    @property
+    def tokens(self):
+        """Lowercase word tokens of the visible text."""
+        return self._memo("tokens", lambda: TOKEN_PATTERN.findall(self.lower_text))
+
+    @property
+    def content_hash(self):
+        """Fingerprint of the whitespace-normalized visible text."""
+        return self._memo("content_hash", lambda: hashlib.sha256(" ".join(self.text.split()).encode("utf-8", "surrogatepass")).hexdigest())
+
+    @property
+    def html_hash(self):
+        """Fingerprint of the raw HTML."""
+        return self._memo("html_hash", lambda: hashlib.sha256(self.html.encode("utf-8", "surrogatepass")).hexdigest())
+
+    @property
+    def title(self):
+        """The page title, or None if the page has no usable <title>."""
+        return self._memo("title", self._extract_title)
+
+    @property
+    def hrefs(self):
+        """Raw href values of all <a> tags, in document order."""
+        return self._memo("hrefs", self._extract_hrefs)
+
+    @property
+    def links(self):
+        """Absolute link URLs, de-duplicated in document order."""
+        return self._memo("links", lambda: list(dict.fromkeys(urllib.parse.urljoin(self.url, href) for href in self.hrefs)))
+
+    @property
+    def images(self):
+        """Images with a src attribute, as {"src", "alt"} dictionaries in document order."""
+        return self._memo("images", self._extract_images)
+
+    def _scan(self):
+        return self._memo("scan", lambda: scan_links_and_title(self.html))
+
+    def _extract_title(self):
+        if self.parser == "stream" and "soup" not in self._cache:
+            return self._scan()[0]
+        soup = self.soup
+        if soup.title and soup.title.string:
+            return soup.title.string.strip()
+        return None
+
+    def _extract_hrefs(self):
+        if self.parser == "stream" and "soup" not in self._cache:
+            return self._scan()[1]
+        return [anchor["href"] for anchor in self.soup.find_all("a", href=True)]
+
+    def _extract_images(self):
+        images = []
+        for img in self.soup.find_all("img"):
+            src = img.get("src")
+            if src:
+                images.append({"src": src, "alt": img.get("alt", "")})
+        return images
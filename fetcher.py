@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+HTTP fetching for the crawler.
+
+Synchronous crawls share one requests.Session whose HTTPAdapter keeps a pool of
+keep-alive connections per host, so consecutive fetches from the same site reuse
+TCP/TLS connections instead of paying a fresh handshake each time. Concurrent
+crawls get an equivalent aiohttp.TCPConnector with total and per-host limits and
+a DNS cache.
+
+FetchLimits bounds what a single page may cost: connect/read/total timeouts, a
+maximum body size enforced while streaming (the download is aborted as soon as it is
+exceeded, or up front from Content-Length), and a Content-Type filter applied before
+any of the body is downloaded.
+
+Limited bodies are decoded incrementally as chunks arrive (BodyDecoder), so neither
+the full raw body nor a full-body charset guess is ever needed. The charset comes
+from a byte-order mark, the Content-Type header, or a <meta> declaration in the first
+kilobyte, in that order; undeclared pages are read as UTF-8, switching to
+windows-1252 if the bytes turn out not to be UTF-8.
+"""
+import codecs
+import fnmatch
+import re
+import time
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Status codes worth retrying at the transport level.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Content types parsed as pages; others are skipped before their body is downloaded.
+HTML_CONTENT_TYPES = ["text/html", "application/xhtml+xml"]
+CHUNK_SIZE = 64 * 1024
+# Bytes searched for a <meta> charset declaration (the HTML5 prescan limit).
+SNIFF_BYTES = 1024
+BOMS = [(codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be")]
+HEADER_CHARSET = re.compile(r"charset\s*=\s*[\"']?([^\s;\"']+)", re.I)
+META_CHARSET = re.compile(rb"<meta[^>]+?charset\s*=\s*[\"']?\s*([A-Za-z0-9_:.-]+)", re.I)
+# Labels that browsers decode as windows-1252, which is a superset of them.
+CP1252_LABELS = ("iso8859-1", "ascii")
+
+class ResponseTooLarge(requests.RequestException):
+    pass
+
+class UnsupportedContentType(requests.RequestException):
+    pass
+
+class FetchLimits:
+    """Timeouts (seconds), body size cap (bytes) and allowed Content-Type patterns for page fetches."""
+    def __init__(self, connect_timeout=10, read_timeout=30, total_timeout=120, max_bytes=10 * 1024 * 1024, content_types=HTML_CONTENT_TYPES):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+        self.max_bytes = max_bytes
+        self.content_types = list(content_types)
+
+    def requests_timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    def client_timeout(self):
+        import aiohttp
+        return aiohttp.ClientTimeout(total=self.total_timeout or None, sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+
+    def check_headers(self, url, headers):
+        """Rejects a response from its headers alone, before the body is read."""
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type and self.content_types and not any(fnmatch.fnmatchcase(content_type, pattern) for pattern in self.content_types):
+            raise UnsupportedContentType(f"Skipped {url}: content type {content_type} is not crawled")
+        length = headers.get("Content-Length", "")
+        if self.max_bytes and length.isdigit() and int(length) > self.max_bytes:
+            raise ResponseTooLarge(f"Skipped {url}: {length} bytes exceeds the {self.max_bytes} byte limit")
+
+    def add_chunk(self, url, size, received):
+        """Running body size after a chunk; aborts once it exceeds max_bytes."""
+        received += size
+        if self.max_bytes and received > self.max_bytes:
+            raise ResponseTooLarge(f"Aborted {url}: body exceeds the {self.max_bytes} byte limit")
+        return received
+
+def known_charset(name):
+    """Python codec name for a declared charset, or None if it is unknown."""
+    try:
+        charset = codecs.lookup(name.decode("ascii") if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+    return "cp1252" if charset in CP1252_LABELS else charset
+
+def header_charset(content_type):
+    match = HEADER_CHARSET.search(content_type or "")
+    return known_charset(match.group(1)) if match else None
+
+class BodyDecoder:
+    """
+    Decodes a response body chunk by chunk. The first SNIFF_BYTES are held back until
+    the charset is settled, then every chunk is decoded as soon as it arrives.
+    """
+    def __init__(self, charset=None):
+        self.declared = charset
+        self.charset = None
+        self.decoder = None
+        self.head = b""
+        self.parts = []
+
+    def choose_charset(self, head):
+        for bom, charset in BOMS:
+            if head.startswith(bom):
+                return charset, len(bom)
+        if self.declared:
+            return self.declared, 0
+        match = META_CHARSET.search(head)
+        charset = known_charset(match.group(1)) if match else None
+        # A <meta> declaration can only be read if the page is ASCII-compatible, so UTF-16 claims mean UTF-8.
+        if charset and charset.startswith("utf-16"):
+            charset = "utf-8"
+        return charset, 0
+
+    def start(self, head):
+        charset, skip = self.choose_charset(head)
+        self.charset = charset or "utf-8"
+        # Undeclared pages are decoded strictly so that non-UTF-8 bytes trigger the fallback.
+        self.decoder = codecs.getincrementaldecoder(self.charset)("replace" if charset else "strict")
+        self.decode(head[skip:])
+
+    def decode(self, data, final=False):
+        try:
+            self.parts.append(self.decoder.decode(data, final))
+        except UnicodeDecodeError as e:
+            # The failed call left the decoder's buffered bytes untouched, so nothing is lost;
+            # e.start counts from the start of those buffered bytes.
+            pending = self.decoder.getstate()[0] + data
+            # Everything before the first invalid byte is valid UTF-8 and stays UTF-8.
+            self.parts.append(pending[:e.start].decode(self.charset))
+            self.charset = "cp1252"
+            self.decoder = codecs.getincrementaldecoder(self.charset)("replace")
+            self.parts.append(self.decoder.decode(pending[e.start:], final))
+
+    def feed(self, chunk):
+        if self.decoder is None:
+            self.head += chunk
+            if len(self.head) >= SNIFF_BYTES:
+                head, self.head = self.head, b""
+                self.start(head)
+        else:
+            self.decode(chunk)
+
+    def finish(self):
+        if self.decoder is None:
+            self.start(self.head)
+        self.decode(b"", final=True)
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+def iter_body(response):
+    """
+    Yields a streamed requests response's decoded body as it arrives, up to CHUNK_SIZE bytes
+    at a time. Unlike iter_content(), which blocks until a whole chunk is in, every read
+    returns what the socket has, so a server trickling bytes cannot stall the caller's
+    deadline checks; a silent one is still cut off by the read timeout.
+    """
+    if not hasattr(response.raw, "read1"):
+        # urllib3 1.x has no read1(); iter_content() still streams, a whole chunk at a time.
+        yield from response.iter_content(CHUNK_SIZE)
+        return
+    try:
+        while True:
+            chunk = response.raw.read1(CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    # The same translation iter_content() does, so callers see requests' exceptions.
+    except urllib3.exceptions.ProtocolError as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+    except urllib3.exceptions.DecodeError as e:
+        raise requests.exceptions.ContentDecodingError(e)
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.ConnectionError(e)
+    except urllib3.exceptions.SSLError as e:
+        raise requests.exceptions.SSLError(e)
+
+def read_body(response, url, limits, started):
+    """Streams a requests response body within the size limit and the total timeout counted from `started`."""
+    deadline = started + limits.total_timeout if limits.total_timeout else None
+    decoder, received = BodyDecoder(header_charset(response.headers.get("Content-Type"))), 0
+    for chunk in iter_body(response):
+        received = limits.add_chunk(url, len(chunk), received)
+        decoder.feed(chunk)
+        if deadline is not None and time.monotonic() > deadline:
+            raise requests.Timeout(f"Aborted {url}: download exceeded {limits.total_timeout}s")
+    return decoder.finish()
+
+async def read_body_async(response, url, limits):
+    """Streams an aiohttp response body within the size limit; the session's ClientTimeout bounds the time."""
+    decoder, received = BodyDecoder(header_charset(response.headers.get("Content-Type"))), 0
+    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+        received = limits.add_chunk(url, len(chunk), received)
+        decoder.feed(chunk)
+    return decoder.finish()
+
+def create_session(pool_size=100, pool_per_host=10, max_retries=3, user_agent=None):
+    """
+    Builds a pooled requests.Session.
+    pool_size is the number of per-host pools kept alive, pool_per_host the number of
+    connections kept in each, and max_retries mirrors --max-retries.
+    """
+    session = requests.Session()
+    retries = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET", "HEAD"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_per_host, max_retries=retries)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if user_agent:
+        session.headers["User-Agent"] = user_agent
+    return session
+
+def create_connector(pool_size=100, pool_per_host=10, dns_cache_ttl=300):
+    """Builds an aiohttp.TCPConnector with the same pool limits as create_session."""
+    import aiohttp
+    return aiohttp.TCPConnector(limit=pool_size, limit_per_host=pool_per_host, ttl_dns_cache=dns_cache_ttl)
+
+def fetch_html(url, session=None, user_agent=None, cache=None, limits=None):
+    """
+    Fetches a page with the shared session, or plain requests when no session is given.
+    With a ResponseCache, fresh entries are served without a request and stale ones are
+    revalidated with their ETag/Last-Modified validators. With FetchLimits, the body is
+    streamed and the request fails early on timeouts, oversized bodies or non-HTML content.
+    """
+    headers = {"User-Agent": user_agent} if user_agent else {}
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None:
+        if cache.is_fresh(entry):
+            return cache.reuse(url, entry)
+        headers.update(cache.validators(entry))
+    started = time.monotonic()
+    if limits is None:
+        response = (session or requests).get(url, headers=headers)
+    else:
+        response = (session or requests).get(url, headers=headers, timeout=limits.requests_timeout(), stream=True)
+    try:
+        if entry is not None and response.status_code == 304:
+            return cache.reuse(url, entry, revalidated=True)
+        response.raise_for_status()
+        if limits is None:
+            text = response.text
+        else:
+            limits.check_headers(url, response.headers)
+            text = read_body(response, url, limits, started)
+    finally:
+        # A streamed response holds its pooled connection until it is closed.
+        if limits is not None:
+            response.close()
+    if cache is not None:
+        cache.store(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"), entry)
+    return text
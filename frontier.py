@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Crawl frontier for the crawler.
+
+The synchronous crawler walks an explicit Frontier instead of recursing once per
+link, so deep sites cannot hit RecursionError and no ancestor page stays alive on
+the call stack. Its "dfs" order reproduces the original recursive, sorted-DFS
+output exactly; "bfs" crawls level by level.
+
+The concurrent crawler keeps the URLs still to be crawled in an AsyncFrontier and
+drains it with a fixed number of worker tasks, instead of spawning a coroutine per
+link. Only the pages currently held by workers are in memory; pending entries are
+small (url, depth, indent) tuples. With per-host politeness the crawler uses a
+HostFrontier instead, which keeps one queue per host and hands out the next item
+from a host that may be fetched right now.
+"""
+import asyncio
+import urllib.parse
+from collections import deque, namedtuple
+
+# depth is the remaining crawl depth; indent is the distance from the seed URL.
+FrontierItem = namedtuple("FrontierItem", ["url", "depth", "indent"])
+
+ORDERS = ["dfs", "bfs"]
+
+class Frontier:
+    """
+    Explicit frontier for the synchronous crawler.
+
+    In "dfs" order the visited check happens when an item is popped, just as the
+    recursive crawler checked each link right before descending into it, so the
+    output order is unchanged. In "bfs" order links are marked visited as soon as
+    they are queued, so each URL is queued at most once.
+    """
+    def __init__(self, order="dfs"):
+        if order not in ORDERS:
+            raise ValueError(f"Unknown crawl order '{order}', expected one of: {', '.join(ORDERS)}")
+        self.order = order
+        self.items = deque()
+
+    def __len__(self):
+        return len(self.items)
+
+    def extend(self, items, visited):
+        """Adds child items, given in the order they should be crawled."""
+        if self.order == "dfs":
+            # Stack: push in reverse so the first child is popped first.
+            self.items.extend(reversed(items))
+        else:
+            for item in items:
+                if item.url not in visited:
+                    visited.add(item.url)
+                    self.items.append(item)
+
+    def pop(self, visited):
+        """Returns the next item to crawl, or None when the frontier is exhausted."""
+        while self.items:
+            if self.order == "bfs":
+                return self.items.popleft()
+            item = self.items.pop()
+            if item.url not in visited:
+                visited.add(item.url)
+                return item
+        return None
+
+class AsyncFrontier:
+    """
+    asyncio.Queue-based frontier.
+
+    The queue is bounded; when it is full, new items wait in an overflow deque and
+    are moved into the queue as workers take items out. Workers therefore never
+    block while adding links, so a full queue cannot deadlock the crawl.
+    """
+    def __init__(self, maxsize=1000):
+        self.queue = asyncio.Queue(maxsize)
+        self.overflow = deque()
+
+    def __len__(self):
+        return self.queue.qsize() + len(self.overflow)
+
+    def put(self, item):
+        if self.queue.full():
+            self.overflow.append(item)
+        else:
+            self.queue.put_nowait(item)
+
+    async def get(self):
+        item = await self.queue.get()
+        if self.overflow and not self.queue.full():
+            self.queue.put_nowait(self.overflow.popleft())
+        return item
+
+    def pending(self):
+        """The queued items in the order they will be handed out (used for checkpoints)."""
+        return list(self.queue._queue) + list(self.overflow)
+
+    def task_done(self, item=None):
+        self.queue.task_done()
+
+    async def join(self):
+        await self.queue.join()
+
+class HostFrontier:
+    """
+    Frontier with one queue per host, scheduled by a politeness.Politeness.
+
+    get() serves hosts round-robin, skipping hosts whose token bucket is empty or that
+    already have their limit of items in flight (the politeness object's adaptive limit,
+    else max_per_host), and only waits when no host is ready.
+    Items must be handed back with task_done(item) so the host's slot is released.
+    """
+    def __init__(self, politeness, max_per_host=None):
+        self.politeness = politeness
+        self.max_per_host = max_per_host
+        # Insertion-ordered; a host moves to the back each time it is served.
+        self.hosts = {}
+        self.active = {}
+        self.unfinished = 0
+        self.changed = asyncio.Event()
+        self.finished = asyncio.Event()
+        self.finished.set()
+
+    @staticmethod
+    def host(item):
+        return urllib.parse.urlsplit(item.url).netloc.lower()
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.hosts.values())
+
+    def put(self, item):
+        self.hosts.setdefault(self.host(item), deque()).append(item)
+        self.unfinished += 1
+        self.finished.clear()
+        self.changed.set()
+
+    def next_host(self):
+        """Returns (host, seconds until it is ready) for the best candidate, or (None, None)."""
+        best, best_wait = None, None
+        for host in self.hosts:
+            limit = self.politeness.concurrency(host) or self.max_per_host
+            if limit and self.active.get(host, 0) >= limit:
+                continue
+            wait = self.politeness.ready_in(host)
+            if wait <= 0:
+                return host, 0
+            if best_wait is None or wait < best_wait:
+                best, best_wait = host, wait
+        return best, best_wait
+
+    async def get(self):
+        while True:
+            host, wait = self.next_host()
+            if host is not None and wait <= 0:
+                break
+            # Sleep until the earliest host is ready, or until new items or free slots appear.
+            self.changed.clear()
+            try:
+                await asyncio.wait_for(self.changed.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+        self.politeness.reserve(host)
+        queue = self.hosts.pop(host)
+        item = queue.popleft()
+        if queue:
+            self.hosts[host] = queue
+        self.active[host] = self.active.get(host, 0) + 1
+        return item
+
+    def pending(self):
+        return [item for queue in self.hosts.values() for item in queue]
+
+    def task_done(self, item=None):
+        if item is not None:
+            host = self.host(item)
+            self.active[host] -= 1
+            self.changed.set()
+        self.unfinished -= 1
+        if self.unfinished <= 0:
+            self.finished.set()
+
+    async def join(self):
+        await self.finished.wait()
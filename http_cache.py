@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Persistent HTTP response cache for recrawls.
+
+Responses are stored in a SQLite database under --cache-dir, keyed by normalized
+URL, together with their ETag/Last-Modified validators and fetch time. On the next
+crawl a cached page is either served directly (while younger than --cache-ttl) or
+revalidated with If-None-Match/If-Modified-Since.
+
+When a page turns out to be unchanged (a fresh hit, a 304, or an identical body),
+the analysis stored for it on the previous crawl (title, links and plugin outputs)
+is reused, so the page is neither re-parsed nor re-run through the plugins. Stored
+analyses are tagged with a profile (parser and plugin set) and are only reused by
+crawls with the same profile.
+"""
+import hashlib
+import json
+import time
+from collections import namedtuple
+from output import to_json
+from sqlite_cache import SqliteCache
+from urls import normalize_url
+
+CACHE_FILE = "responses.sqlite3"
+
+CacheEntry = namedtuple("CacheEntry", ["url", "body", "digest", "etag", "last_modified", "fetched_at"])
+
+def cache_key(url):
+    """Canonical URL for cache lookups; query parameters are kept, only sorted."""
+    return normalize_url(url, strip_params=())
+
+def body_digest(body):
+    return hashlib.sha256(body.encode("utf-8", "surrogatepass")).hexdigest()
+
+class ResponseCache(SqliteCache):
+    def __init__(self, cache_dir, ttl=0, profile=""):
+        super().__init__(
+            cache_dir, CACHE_FILE,
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT, digest TEXT, etag TEXT, last_modified TEXT, "
+            "fetched_at REAL, profile TEXT, analysis TEXT)"
+        )
+        self.ttl = ttl
+        self.profile = profile
+        # URLs found unchanged during this crawl; only these may reuse their stored analysis.
+        self.unchanged = set()
+        self.hits = 0
+
+    def lookup(self, url):
+        row = self.read(
+            "SELECT url, body, digest, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+            (cache_key(url),)
+        )
+        return CacheEntry(*row) if row else None
+
+    def is_fresh(self, entry):
+        return self.ttl > 0 and time.time() - entry.fetched_at < self.ttl
+
+    def validators(self, entry):
+        """Conditional request headers for revalidating a cached entry."""
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def reuse(self, url, entry, revalidated=False):
+        """Serves a cached body; a revalidated entry (304) restarts its TTL."""
+        if revalidated:
+            self.write("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), entry.url))
+        self.unchanged.add(cache_key(url))
+        self.hits += 1
+        return entry.body
+
+    def store(self, url, body, etag=None, last_modified=None, entry=None):
+        """Records a fetched response; an identical body keeps the stored analysis."""
+        digest = body_digest(body)
+        if entry is not None and entry.digest == digest:
+            self.write(
+                "UPDATE responses SET etag = ?, last_modified = ?, fetched_at = ? WHERE url = ?",
+                (etag, last_modified, time.time(), entry.url)
+            )
+            self.unchanged.add(cache_key(url))
+            return
+        self.write(
+            "INSERT OR REPLACE INTO responses (url, body, digest, etag, last_modified, fetched_at, profile, analysis) "
+            "VALUES (?, ?, ?, ?, ?, ?, NULL, NULL)",
+            (cache_key(url), body, digest, etag, last_modified, time.time())
+        )
+
+    def analysis(self, url):
+        """Returns the stored analysis for a page found unchanged in this crawl, else None."""
+        key = cache_key(url)
+        if key not in self.unchanged:
+            return None
+        row = self.read("SELECT profile, analysis FROM responses WHERE url = ?", (key,))
+        if row is None or row[1] is None or row[0] != self.profile:
+            return None
+        return json.loads(row[1])
+
+    def store_analysis(self, url, analysis):
+        self.write(
+            "UPDATE responses SET profile = ?, analysis = ? WHERE url = ?",
+            (self.profile, to_json(analysis), cache_key(url))
+        )
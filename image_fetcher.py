@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Shared image downloads for the visual plugins.
+
+VisualAnalyzer and EnhancedVisualAnalyzer both look at the first image of every page,
+and a site shows the same logo or banner on most of its pages. One ImageFetcher per
+crawl (the PluginRegistry hands it to every plugin, like the pooled session) makes
+sure each distinct image is downloaded and decoded at most once:
+
+  - a URL that is being downloaded is not requested again; other callers (plugins on
+    other worker threads) wait for the same download
+  - downloads stream with a byte cap and an image Content-Type check (FetchLimits)
+  - decoded images are cached by a hash of their content in an LRU bounded by bytes,
+    so the same image served from several URLs is also decoded only once
+  - failed URLs are remembered for the rest of the crawl and fail again immediately
+
+Decoded images are shared between plugins, which must not modify them.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import requests
+from fetcher import CHUNK_SIZE, FetchLimits
+
+IMAGE_CONTENT_TYPES = ["image/*"]
+MAX_IMAGE_BYTES = 5 * 1024 * 1024
+CACHE_BYTES = 64 * 1024 * 1024
+
+class ImageDecodeError(ValueError):
+    pass
+
+def decode_image(data):
+    """Decodes image bytes into a BGR array with OpenCV; None if they are not an image."""
+    import cv2
+    import numpy as np
+    return cv2.imdecode(np.frombuffer(data, dtype="uint8"), cv2.IMREAD_COLOR)
+
+class ByteLRU:
+    """Least-recently-used cache whose capacity is a total size in bytes."""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()
+        self.size = 0
+
+    def get(self, key):
+        if key not in self.items:
+            return None
+        self.items.move_to_end(key)
+        return self.items[key][0]
+
+    def put(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        if key in self.items:
+            self.size -= self.items.pop(key)[1]
+        self.items[key] = (value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self.items.popitem(last=False)
+            self.size -= evicted
+
+class ImageFetcher:
+    def __init__(self, session=None, limits=None, cache_bytes=CACHE_BYTES, decode=decode_image):
+        self.session = session
+        self.limits = limits or FetchLimits(max_bytes=MAX_IMAGE_BYTES, content_types=IMAGE_CONTENT_TYPES)
+        self.decode = decode
+        self.cache = ByteLRU(cache_bytes)
+        # URL -> content hash of its image, or the error it failed with.
+        self.digests = {}
+        # URL -> Future of the download in progress.
+        self.downloading = {}
+        self.lock = threading.Lock()
+        self.downloads = 0
+
+    def image(self, url):
+        """The decoded image at url. Raises the download or decoding error."""
+        with self.lock:
+            digest = self.digests.get(url)
+            if isinstance(digest, Exception):
+                raise digest
+            image = self.cache.get(digest) if digest is not None else None
+            if image is not None:
+                return image
+            future = self.downloading.get(url)
+            owner = future is None
+            if owner:
+                future = self.downloading[url] = Future()
+        if owner:
+            self.load(url, future)
+        return future.result()
+
+    def load(self, url, future):
+        try:
+            digest, image = self.fetch(url)
+        except Exception as e:
+            with self.lock:
+                self.digests[url] = e
+                del self.downloading[url]
+            future.set_exception(e)
+            return
+        with self.lock:
+            self.digests[url] = digest
+            del self.downloading[url]
+        future.set_result(image)
+
+    def fetch(self, url):
+        """Downloads url and returns (content hash, decoded image), decoding only unseen content."""
+        with self.lock:
+            self.downloads += 1
+        response = (self.session or requests).get(url, stream=True, timeout=self.limits.requests_timeout())
+        try:
+            response.raise_for_status()
+            self.limits.check_headers(url, response.headers)
+            chunks, received = [], 0
+            for chunk in response.iter_content(CHUNK_SIZE):
+                received = self.limits.add_chunk(url, len(chunk), received)
+                chunks.append(chunk)
+        finally:
+            response.close()
+        data = b"".join(chunks)
+        digest = hashlib.sha256(data).hexdigest()
+        with self.lock:
+            image = self.cache.get(digest)
+        if image is None:
+            image = self.decode(data)
+            if image is None:
+                raise ImageDecodeError("Failed to decode image.")
+            with self.lock:
+                self.cache.put(digest, image, getattr(image, "nbytes", len(data)))
+        return digest, image
+
+# Used by plugins running outside a PluginRegistry, e.g. called directly from a script.
+_default_fetcher = None
+
+def default_fetcher():
+    global _default_fetcher
+    if _default_fetcher is None:
+        _default_fetcher = ImageFetcher()
+    return _default_fetcher
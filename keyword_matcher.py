@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Keyword matching for the text plugins.
+
+Text is split into the same lowercase word tokens as PageDocument.tokens, and
+keywords (single words or multi-word phrases) are matched against the token stream
+by an Aho-Corasick automaton built once from the configured keyword sets. A page is
+matched in one pass over its tokens, however many keywords are configured; each
+occurrence of a keyword counts once for every label it is listed under.
+"""
+from collections import Counter, deque
+from document import TOKEN_PATTERN
+
+def tokenize(text):
+    """Lowercase word tokens, as in PageDocument.tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class KeywordMatcher:
+    def __init__(self, keywords):
+        """`keywords` maps each label (e.g. a category) to its keywords or phrases."""
+        # Trie over tokens: child nodes by token, the fail link of each node, and the
+        # labels of every keyword ending at the node (including via its fail links).
+        self.children = [{}]
+        self.fail = [0]
+        self.labels = [[]]
+        for label, phrases in keywords.items():
+            for phrase in phrases:
+                tokens = tokenize(phrase)
+                if tokens:
+                    self.labels[self.add(tokens)].append(label)
+        queue = deque(self.children[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self.children[node].items():
+                state = self.fail[node]
+                while state and token not in self.children[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.children[state].get(token, 0)
+                self.labels[child] = self.labels[child] + self.labels[self.fail[child]]
+                queue.append(child)
+
+    def add(self, tokens):
+        node = 0
+        for token in tokens:
+            if token not in self.children[node]:
+                self.children[node][token] = len(self.children)
+                self.children.append({})
+                self.fail.append(0)
+                self.labels.append([])
+            node = self.children[node][token]
+        return node
+
+    def counts(self, tokens):
+        """Counts keyword occurrences in a token sequence, per label."""
+        counts = Counter()
+        node = 0
+        for token in tokens:
+            while node and token not in self.children[node]:
+                node = self.fail[node]
+            node = self.children[node].get(token, 0)
+            if self.labels[node]:
+                counts.update(self.labels[node])
+        return counts
@@ -2,168 +2,380 @@
 
 import argparse
 import asyncio
-import json
 import logging
 import requests
+import subprocess
+import sys
 import time
 try:
     import aiohttp
 except ImportError:
     print("Error: aiohttp is not installed. Please run 'pip install aiohttp'")
     raise
-from bs4 import BeautifulSoup
 import urllib.parse
+from fetcher import HTML_CONTENT_TYPES, FetchLimits, create_connector, create_session, fetch_html, read_body_async
+from image_fetcher import IMAGE_CONTENT_TYPES, MAX_IMAGE_BYTES, ImageFetcher
+from browser_pool import BrowserPool, create_driver
+from http_cache import ResponseCache
+from plugin_cache import PluginResultCache
+from checkpoint import CrawlCheckpoint, load_checkpoint_args
+from dedup import DEDUP_BACKENDS, create_url_set
+from urls import TRACKING_PARAMS, UrlNormalizer
+from politeness import ROBOTS_TTL, RobotsDisallowed, create_politeness
+from retry import RetryBudget, RetryPolicy
+from distributed import FrontierStore, SharedFrontier, default_worker_id, load_frontier_args
+from document import PageDocument, PARSERS, check_parser
+from plugins import needs_every_page
+from plugin_manager import PluginRegistry
+from worker_pool import AnalysisPool
+from output import FORMATS, MultiSink, create_sink, emit_page
+from frontier import AsyncFrontier, Frontier, FrontierItem, HostFrontier, ORDERS
 
-# Import Qdrant client for persistence
+# Import Qdrant client and semantic embeddings for persistence
 from qdrant_client import QdrantClient
-from qdrant_client.http import models
-
-# Import SentenceTransformer for semantic embeddings
-from sentence_transformers import SentenceTransformer
+from qdrant_store import QdrantSink, load_embedding_model
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
-# New function to render dynamic content using Selenium
+# Render dynamic content with a one-off Selenium browser; crawls render through a BrowserPool instead
 def render_page(url):
+    driver = create_driver()
     try:
-        from selenium import webdriver
-        from selenium.webdriver.chrome.options import Options
-    except ImportError:
-        print("Error: selenium is not installed. Please install it via 'pip install selenium'")
-        raise
-    options = Options()
-    options.headless = True
-    # Optionally, specify your chromedriver path if needed.
-    driver = webdriver.Chrome(options=options)
-    driver.get(url)
-    html = driver.page_source
-    driver.quit()
+        driver.get(url)
+        return driver.page_source
+    finally:
+        driver.quit()
+
+# Browser pool for --render crawls, or None when rendering is off
+def open_browsers(args):
+    if not args.render:
+        return None
+    return BrowserPool(args.render_workers, args.render_max_uses)
+
+# Load, configure and warm the plugins once for the whole crawl
+def load_crawl_plugins(args, session=None):
+    if not args.use_plugins:
+        return None
+    result_cache = PluginResultCache(args.cache_dir) if args.cache_dir else None
+    # Visual plugins share one image fetcher, so each image is downloaded once per crawl.
+    image_limits = FetchLimits(args.connect_timeout, args.read_timeout, args.total_timeout, args.max_image_size, IMAGE_CONTENT_TYPES)
+    image_fetcher = ImageFetcher(session, image_limits, args.image_cache_size * 1024 * 1024)
+    plugins = PluginRegistry(session=session, result_cache=result_cache, image_fetcher=image_fetcher)
+    try:
+        plugins.load()
+    except Exception as e:
+        logging.error(f"Failed to load plugins: {e}")
+    return plugins
+
+# Run the crawl's shared plugin instances over a single page
+def run_plugins(plugins, document, outputs, indent_str=""):
+    try:
+        return report_plugin_results(plugins.process(document.html, document.url, document), outputs, indent_str)
+    except Exception as e:
+        logging.error(f"{indent_str}Failed to load plugins: {e}")
+        return {}
+
+# Report plugin results as messages; returns them as a {plugin_name: output} dict for the page record
+def report_plugin_results(results, outputs, indent_str=""):
+    plugin_outputs = {}
+    for name, result, error in results:
+        if error is None:
+            msg = f"{indent_str}Plugin {name} output: {result}"
+            outputs.append(msg)
+            logging.info(msg)
+            plugin_outputs[name] = result
+        else:
+            error_msg = f"{indent_str}Plugin {name} error: {error}"
+            outputs.append(error_msg)
+            logging.error(error_msg)
+            plugin_outputs[name] = {"error": str(error)}
+    return plugin_outputs
+
+# Report the crawl-level results of plugins (e.g. topics learned from every page) once the crawl is done
+def finish_plugins(plugins, outputs):
+    if plugins is not None:
+        report_plugin_results(plugins.finish(), outputs)
+
+# Open the response cache for --cache-dir; stored analyses are only reused with the same parser, plugins and plugin settings
+def open_cache(args, plugins=None):
+    if not args.cache_dir:
+        return None
+    names = [f"{plugin.__class__.__name__}:{plugins.config_key(plugin)}" for plugin in plugins.load()] if plugins is not None else []
+    return ResponseCache(args.cache_dir, args.cache_ttl, profile=f"{args.parser}|{','.join(names)}")
+
+# Replay the stored analysis of a page the cache found unchanged; None means it must be analysed afresh.
+# Plugins that must see every page (crawl-level or uncached ones) rule the replay out: the page is
+# analysed again, and the plugin result cache still reuses the outputs of the other plugins
+def cached_analysis(cache, url, outputs, indent_str="", plugins=None):
+    if cache is None or (plugins is not None and any(needs_every_page(plugin) for plugin in plugins.load())):
+        return None
+    analysis = cache.analysis(url)
+    if analysis is not None:
+        logging.info(f"{indent_str}Unchanged since the last crawl, reusing stored results for {url}")
+        report_plugin_results([(name, result, None) for name, result in analysis["plugins"].items()], outputs, indent_str)
+    return analysis
+
+def store_analysis(cache, document, plugin_outputs):
+    if cache is not None:
+        cache.store_analysis(document.url, {
+            "title": document.title,
+            "plugins": plugin_outputs,
+            # In document order, which decides the spelling a page is fetched by (see canonical_links).
+            "links": document.links,
+            "hrefs": sorted(set(document.hrefs)),
+        })
+
+# Open the crawl checkpoint for --checkpoint and record page results in it;
+# a resumed crawl first replays the page records the checkpoint already holds.
+# The outputs are flushed with every snapshot, so buffering sinks (Qdrant) hold every committed page
+def open_checkpoint(args, outputs):
+    if not args.checkpoint:
+        return None, outputs
+    checkpoint = CrawlCheckpoint(args.checkpoint, args.checkpoint_interval, resume=bool(args.resume), max_retries=args.max_retries)
+    if args.resume:
+        msg = f"Resuming crawl from checkpoint {args.checkpoint}: {checkpoint.page_count} pages already crawled"
+        outputs.append(msg)
+        logging.info(msg)
+        for record in checkpoint.records():
+            emit_page(outputs, record)
+    else:
+        checkpoint.start({key: value for key, value in vars(args).items() if key != "resume"})
+    checkpoint.sinks = MultiSink(outputs)
+    return checkpoint, MultiSink(outputs, checkpoint)
+
+# Combine stored crawl arguments with the command line's;
+# options given on the command line (i.e. not left at their defaults) take precedence
+def merge_args(args, saved, parser=None):
+    restored = vars(args).copy()
+    for key, value in saved.items():
+        if parser is None or getattr(args, key, None) == parser.get_default(key):
+            restored[key] = value
+    return argparse.Namespace(**restored)
+
+# Restore the arguments of the crawl stored in a --resume checkpoint
+def resume_args(args, parser=None):
+    restored = merge_args(args, load_checkpoint_args(args.resume), parser)
+    restored.resume = restored.checkpoint = args.resume
+    return restored
+
+# A distributed worker crawls with the options its coordinator stored in the shared frontier
+def worker_args(args, parser=None):
+    return merge_args(args, load_frontier_args(args.frontier), parser)
+
+# Visited-URL set for a crawl, keyed by canonical URL; the seeds are marked visited
+def create_visited(args, seeds=()):
+    normalize = UrlNormalizer(args.strip_params, args.strip_trailing_slash)
+    visited = create_url_set(args.dedup, normalize, args.dedup_capacity, args.dedup_error_rate, args.dedup_path)
+    for seed in seeds:
+        visited.add(seed)
+    return visited
+
+# De-duplicate links by the visited set's canonical form and sort them; plain sets keep every link.
+# The canonical form is only a key: each page is fetched as it was first linked (less the fragment,
+# which is never sent), since servers do not all treat the canonical form the same
+def canonical_links(links, visited):
+    normalize = getattr(visited, "normalize", None)
+    if normalize is None:
+        return sorted(links)
+    unique = {}
+    for link in links:
+        unique.setdefault(normalize(link), urllib.parse.urldefrag(link).url)
+    return sorted(unique.values())
+
+def page_record(url, depth, title=None, plugin_outputs=None, error=None):
+    record = {"url": url, "depth": depth, "title": title, "plugins": plugin_outputs or {}}
+    if error is not None:
+        record["error"] = error
+    return record
+
+# Open the streaming output for a crawl, adding per-page Qdrant persistence if requested
+def open_output(args):
+    output_format = args.format or ("json" if args.json else "text")
+    try:
+        sink = create_sink(output_format, args.output)
+    except Exception as e:
+        logging.error(f"Error writing to output file: {e}")
+        sink = create_sink(output_format)
+    if args.qdrant:
+        try:
+            qdrant_sink = QdrantSink(args.qdrant_host, args.qdrant_port, args.qdrant_collection, batch_size=args.qdrant_batch_size, chunk_size=args.qdrant_chunk_size, recreate=args.qdrant_recreate)
+            return MultiSink(sink, qdrant_sink)
+        except Exception as e:
+            logging.error(f"Failed to persist results to Qdrant: {e}")
+    return sink
+
+# Fetch a page's HTML over the shared session (or through Selenium when rendering),
+# after checking robots.txt and waiting for the host's rate limit when politeness is enabled;
+# transient failures are retried according to the retry policy, if given
+def fetch_page(url, session=None, render=False, delay=0, user_agent=None, browsers=None, cache=None, politeness=None, retry_policy=None, indent_str="", limits=None):
+    if politeness is not None:
+        politeness.check(url, session)
+
+    def attempt():
+        if politeness is not None:
+            politeness.wait(url)
+        if render:
+            return browsers.render(url) if browsers is not None else render_page(url)
+        return fetch_html(url, session, user_agent, cache, limits)
+
+    html = retry_policy.call(attempt, url, indent_str) if retry_policy is not None else attempt()
+    if delay:
+        time.sleep(delay)
     return html
 
-# Synchronous crawling function with rate limiting, user agent, and plugin integration
-def crawl_page(url, depth, visited, outputs, render=False, indent=0, delay=0, user_agent=None, use_plugins=False):
-    indent_str = " " * (indent * 4)
+# Retry policy for a crawl; one budget is shared by every page
+def create_retry_policy(args):
+    return RetryPolicy(args.max_retries, budget=RetryBudget(args.retry_budget))
+
+# Timeouts, size cap and content-type filter for page fetches
+def create_limits(args):
+    return FetchLimits(args.connect_timeout, args.read_timeout, args.total_timeout, args.max_page_size, args.content_types)
+
+# Fetch and analyse a single page in synchronous mode; returns the links to follow from it
+def process_page(item, outputs, render=False, delay=0, user_agent=None, plugins=None, parser="html.parser", session=None, browsers=None, cache=None, politeness=None, retry_policy=None, limits=None):
+    url = item.url
+    indent_str = " " * (item.indent * 4)
     message = f"{indent_str}URL: {url}"
     outputs.append(message)
     logging.info(message)
     try:
-        headers = {"User-Agent": user_agent} if user_agent else {}
-        if render:
-            html = render_page(url)
-        else:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            html = response.text
-        if delay:
-            time.sleep(delay)
+        html = fetch_page(url, session, render, delay, user_agent, browsers, cache, politeness, retry_policy, indent_str, limits)
     except requests.RequestException as e:
         error_msg = f"{indent_str}Error fetching URL: {e}"
         outputs.append(error_msg)
         logging.error(error_msg)
-        return
+        emit_page(outputs, page_record(url, item.indent, error=str(e)))
+        return []
     except Exception as e:
         error_msg = f"{indent_str}Error rendering URL: {e}"
         outputs.append(error_msg)
         logging.error(error_msg)
-        return
+        emit_page(outputs, page_record(url, item.indent, error=str(e)))
+        return []
 
-    # Plugin processing
-    if use_plugins:
-        try:
-            from plugin_manager import load_plugins
-            plugin_dir = "plugin_extensions"
-            plugins = load_plugins(plugin_dir)
-            for plugin in plugins:
-                try:
-                    plugin_result = plugin.process(html, url)
-                    outputs.append(f"{indent_str}Plugin {plugin.__class__.__name__} output: {plugin_result}")
-                    logging.info(f"{indent_str}Plugin {plugin.__class__.__name__} output: {plugin_result}")
-                except Exception as e:
-                    error_msg = f"{indent_str}Plugin {plugin.__class__.__name__} error: {e}"
-                    outputs.append(error_msg)
-                    logging.error(error_msg)
-        except Exception as e:
-            logging.error(f"{indent_str}Failed to load plugins: {e}")
+    document = None
+    analysis = cached_analysis(cache, url, outputs, indent_str, plugins)
+    if analysis is None:
+        document = PageDocument(html, url, parser)
+        # Plugin processing
+        plugin_outputs = {}
+        if plugins is not None:
+            plugin_outputs = run_plugins(plugins, document, outputs, indent_str)
+        store_analysis(cache, document, plugin_outputs)
+        page_title = document.title
+    else:
+        page_title, plugin_outputs = analysis["title"], analysis["plugins"]
 
-    soup = BeautifulSoup(html, "html.parser")
-    title = soup.title.string.strip() if soup.title and soup.title.string else "No title found"
+    title = page_title or "No title found"
     title_msg = f"{indent_str}Title: {title}"
     outputs.append(title_msg)
     logging.info(title_msg)
+    # A replayed page still gets a (lazily parsed) document, for sinks that need its text
+    emit_page(outputs, page_record(url, item.indent, page_title, plugin_outputs), document or PageDocument(html, url, parser))
 
-    if depth > 1:
-        links = set()
-        for anchor in soup.find_all("a", href=True):
-            link = anchor["href"]
-            absolute_link = urllib.parse.urljoin(url, link)
-            links.add(absolute_link)
-        for link in sorted(links):
-            if link not in visited:
-                visited.add(link)
-                crawl_page(link, depth - 1, visited, outputs, render, indent + 1, delay, user_agent, use_plugins)
+    # Only the link list outlives this call; the parsed tree is released on return.
+    if item.depth > 1:
+        return document.links if document is not None else analysis["links"]
+    return []
+
+# Synchronous crawling function with rate limiting, user agent, and plugin integration.
+# Walks an explicit frontier; "dfs" order matches the original recursive crawl output.
+def crawl_page(url, depth, visited, outputs, render=False, indent=0, delay=0, user_agent=None, use_plugins=False, plugins=None, parser="html.parser", order="dfs", session=None, browsers=None, cache=None, checkpoint=None, politeness=None, retry_policy=None, limits=None):
+    if use_plugins and plugins is None:
+        plugins = PluginRegistry()
+    if not use_plugins:
+        plugins = None
+    frontier = Frontier(order)
+    # Items crawled before the frontier is popped: the seed, or a resumed crawl's retries and current page.
+    ready = [FrontierItem(url, depth, indent)]
+    if checkpoint is not None:
+        visited = checkpoint.track_visited(visited, [url])
+        current, pending, retries = checkpoint.restore(depth)
+        frontier.items.extend(pending)
+        ready = retries + [current or ready[0]]
+    item = ready.pop(0)
+    try:
+        while item is not None:
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save(frontier.items, current=item)
+            links = process_page(item, outputs, render, delay, user_agent, plugins, parser, session, browsers, cache, politeness, retry_policy, limits)
+            frontier.extend([FrontierItem(link, item.depth - 1, item.indent + 1) for link in canonical_links(links, visited)], visited)
+            item = ready.pop(0) if ready else frontier.pop(visited)
+    except BaseException:
+        # Crash or Ctrl-C: snapshot the frontier so --resume continues from this page.
+        if checkpoint is not None:
+            checkpoint.save(frontier.items, current=item)
+        raise
 
 def create_crawler(args):
-    outputs = []
+    outputs = open_output(args)
     msg = f"Crawler Name: {args.name}"
     outputs.append(msg)
     logging.info(msg)
-    for url in args.url:
+    checkpoint, outputs = open_checkpoint(args, outputs)
+    check_parser(args.parser)
+    # Page fetches are retried by the retry policy, so the session itself does not retry.
+    session = create_session(args.pool_size, args.pool_per_host, 0)
+    plugins = load_crawl_plugins(args, session)
+    browsers = open_browsers(args)
+    cache = open_cache(args, plugins)
+    politeness = create_politeness(args)
+    retry_policy = create_retry_policy(args)
+    limits = create_limits(args)
+    for index, url in enumerate(args.url):
+        if checkpoint is not None:
+            # Seeds before the checkpointed one are done; a later seed starts with a clean frontier.
+            if index < checkpoint.seed:
+                continue
+            if index > checkpoint.seed:
+                checkpoint.finish_seed(index)
         msg = f"Starting URL: {url}"
         outputs.append(msg)
         logging.info(msg)
         if args.depth > 1:
-            visited = set([url])
-            crawl_page(url, args.depth, visited, outputs, args.render, delay=args.delay, user_agent=args.user_agent, use_plugins=args.use_plugins)
+            visited = create_visited(args, [url])
+            crawl_page(url, args.depth, visited, outputs, args.render, user_agent=args.user_agent, use_plugins=args.use_plugins, plugins=plugins, parser=args.parser, order=args.order, session=session, browsers=browsers, cache=cache, checkpoint=checkpoint, politeness=politeness, retry_policy=retry_policy, limits=limits)
+            visited.close()
         else:
             try:
-                headers = {"User-Agent": args.user_agent} if args.user_agent else {}
-                if args.render:
-                    html = render_page(url)
-                else:
-                    response = requests.get(url, headers=headers)
-                    response.raise_for_status()
-                    html = response.text
-                if args.delay:
-                    time.sleep(args.delay)
+                html = fetch_page(url, session, args.render, user_agent=args.user_agent, browsers=browsers, cache=cache, politeness=politeness, retry_policy=retry_policy, limits=limits)
             except requests.RequestException as e:
                 error_msg = f"Error fetching URL {url}: {e}"
                 outputs.append(error_msg)
                 logging.error(error_msg)
+                emit_page(outputs, page_record(url, 0, error=str(e)))
                 continue
             except Exception as e:
                 error_msg = f"Error rendering URL {url}: {e}"
                 outputs.append(error_msg)
                 logging.error(error_msg)
+                emit_page(outputs, page_record(url, 0, error=str(e)))
                 continue
 
-            # Plugin processing for top-level pages
-            if args.use_plugins:
-                try:
-                    from plugin_manager import load_plugins
-                    plugin_dir = "plugin_extensions"
-                    plugins = load_plugins(plugin_dir)
-                    for plugin in plugins:
-                        try:
-                            plugin_result = plugin.process(html, url)
-                            outputs.append(f"Plugin {plugin.__class__.__name__} output: {plugin_result}")
-                            logging.info(f"Plugin {plugin.__class__.__name__} output: {plugin_result}")
-                        except Exception as e:
-                            error_msg = f"Plugin {plugin.__class__.__name__} error: {e}"
-                            outputs.append(error_msg)
-                            logging.error(error_msg)
-                except Exception as e:
-                    logging.error(f"Failed to load plugins: {e}")
-
-            soup = BeautifulSoup(html, "html.parser")
-            title = soup.title.string.strip() if soup.title and soup.title.string else "No title found"
+            document = None
+            analysis = cached_analysis(cache, url, outputs, plugins=plugins)
+            if analysis is None:
+                document = PageDocument(html, url, args.parser)
+                # Plugin processing for top-level pages
+                plugin_outputs = {}
+                if plugins is not None:
+                    plugin_outputs = run_plugins(plugins, document, outputs)
+                store_analysis(cache, document, plugin_outputs)
+                page_title = document.title
+            else:
+                page_title, plugin_outputs = analysis["title"], analysis["plugins"]
+
+            title = page_title or "No title found"
             title_msg = f"Page title for {url}: {title}"
             outputs.append(title_msg)
             logging.info(title_msg)
+            record = page_record(url, 0, page_title, plugin_outputs)
+            if args.list_links:
+                record["links"] = sorted(set(document.hrefs)) if document is not None else analysis["hrefs"]
+            emit_page(outputs, record, document or PageDocument(html, url, args.parser))
             
             if args.list_links:
-                links = set()
-                for anchor in soup.find_all("a", href=True):
-                    links.add(anchor["href"])
+                links = record["links"]
                 if links:
                     outputs.append(f"\nLinks found on the page for {url}:")
                     logging.info(f"Links found on the page for {url}:")
@@ -174,152 +386,285 @@ def create_crawler(args):
                     no_links_msg = f"No links found on the page for {url}."
                     outputs.append(no_links_msg)
                     logging.info(no_links_msg)
-    result_text = finalize_output(outputs, args)
-    if args.qdrant:
-        persist_results_qdrant(result_text, args)
+    if checkpoint is not None:
+        checkpoint.finish_seed(len(args.url))
+    finish_plugins(plugins, outputs)
+    if browsers is not None:
+        browsers.close()
+    if cache is not None:
+        cache.close()
+    if plugins is not None:
+        plugins.close()
+    session.close()
+    outputs.close()
 
-def finalize_output(outputs, args):
-    if args.json:
-        result_text = json.dumps({"results": outputs}, indent=2)
+# Asynchronous crawling functions with domain-specific throttling, robust retry, and plugin integration
+async def async_fetch_once(session, url, render=False, delay=0, user_agent=None, browsers=None, cache=None, politeness=None, limits=None):
+    if render:
+        # Rendering runs on the browser pool's threads, keeping the event loop free.
+        text = await browsers.render_async(url)
     else:
-        result_text = "\n".join(outputs)
-    print(result_text)
-    if args.output:
-        try:
-            with open(args.output, "w") as f:
-                f.write(result_text)
-            logging.info(f"Results written to {args.output}")
-        except Exception as e:
-            logging.error(f"Error writing to output file: {e}")
-    return result_text
+        text = await async_fetch_http(session, url, user_agent, cache, politeness, limits)
+    if delay:
+        await asyncio.sleep(delay)
+    return text
 
-# Function to persist results to Qdrant DB with semantic embeddings
-def persist_results_qdrant(result_text, args):
-    try:
-        client = QdrantClient(host=args.qdrant_host, port=args.qdrant_port)
-        collection_name = args.qdrant_collection
-        client.recreate_collection(
-            collection_name=collection_name,
-            vectors_config=models.VectorParams(size=384, distance="Cosine")
-        )
-        model = SentenceTransformer("all-MiniLM-L6-v2")
-        embedding = model.encode(result_text).tolist()
-        point = models.PointStruct(
-            id=1,
-            vector=embedding,
-            payload={"text": result_text}
-        )
-        client.upsert(collection_name=collection_name, points=[point])
-        logging.info(f"Persisted semantic results to Qdrant collection '{collection_name}'.")
-    except Exception as e:
-        logging.error(f"Failed to persist results to Qdrant: {e}")
+# Async counterpart of fetcher.fetch_html, including response cache revalidation;
+# response status and latency feed the host's adaptive concurrency limit
+async def async_fetch_http(session, url, user_agent=None, cache=None, politeness=None, limits=None):
+    headers = {"User-Agent": user_agent} if user_agent else {}
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None:
+        if cache.is_fresh(entry):
+            return cache.reuse(url, entry)
+        headers.update(cache.validators(entry))
+    start = time.monotonic()
+    async with session.get(url, headers=headers) as response:
+        if politeness is not None:
+            politeness.observe(url, response.status, time.monotonic() - start, response.headers.get("Retry-After"))
+        if entry is not None and response.status == 304:
+            return cache.reuse(url, entry, revalidated=True)
+        response.raise_for_status()
+        if limits is None:
+            text = await response.text()
+        else:
+            limits.check_headers(url, response.headers)
+            text = await read_body_async(response, url, limits)
+        if cache is not None:
+            cache.store(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"), entry)
+        return text
 
-# Asynchronous crawling functions with domain-specific throttling, robust retry, and plugin integration
-async def async_fetch(session, url, indent_str, render=False, delay=0, user_agent=None, semaphore=None, max_retries=3):
-    retry = 0
-    backoff = 1
-    while retry < max_retries:
+# Fetch with retries for transient failures; waits between attempts happen outside the
+# domain semaphore, so other pages of the host can use the slot meanwhile
+async def async_fetch(session, url, indent_str, render=False, delay=0, user_agent=None, semaphore=None, max_retries=3, browsers=None, cache=None, politeness=None, retry_policy=None, limits=None):
+    if retry_policy is None:
+        retry_policy = RetryPolicy(max_retries)
+    retry_policy.budget.deposit()
+    retry, wait = 0, None
+    while True:
         try:
+            if retry and politeness is not None:
+                # Retries also respect the host's rate limit and any Retry-After pause.
+                await politeness.wait_async(url)
             if semaphore:
                 async with semaphore:
-                    headers = {"User-Agent": user_agent} if user_agent else {}
-                    async with session.get(url, headers=headers) as response:
-                        response.raise_for_status()
-                        text = await response.text()
-                        if delay:
-                            await asyncio.sleep(delay)
-                        return text
+                    return await async_fetch_once(session, url, render, delay, user_agent, browsers, cache, politeness, limits)
             else:
-                headers = {"User-Agent": user_agent} if user_agent else {}
-                async with session.get(url, headers=headers) as response:
-                    response.raise_for_status()
-                    text = await response.text()
-                    if delay:
-                        await asyncio.sleep(delay)
-                    return text
+                return await async_fetch_once(session, url, render, delay, user_agent, browsers, cache, politeness, limits)
         except Exception as e:
-            logging.error(f"{indent_str}Attempt {retry+1} failed for URL {url}: {e}")
+            if politeness is not None and isinstance(e, asyncio.TimeoutError):
+                politeness.timed_out(url)
             retry += 1
-            await asyncio.sleep(backoff)
-            backoff *= 2
-    logging.error(f"{indent_str}All {max_retries} attempts failed for URL {url}.")
-    return None
+            wait = retry_policy.next_delay(e, retry, wait)
+            if wait is None:
+                logging.error(f"{indent_str}Giving up on URL {url} after {retry} attempt(s): {e}")
+                return None
+            logging.warning(f"{indent_str}Attempt {retry} failed for URL {url}: {e}; retrying in {wait:.1f}s")
+            await asyncio.sleep(wait)
 
-async def async_crawl_page(url, depth, visited, outputs, session, render=False, indent=0, delay=0, user_agent=None, domain_semaphores=None, max_per_domain=3, max_retries=3, use_plugins=False):
-    indent_str = " " * (indent * 4)
+async def async_process_page(item, outputs, session, render=False, delay=0, user_agent=None, domain_semaphores=None, max_per_domain=3, max_retries=3, use_plugins=False, parser="html.parser", analysis_pool=None, browsers=None, cache=None, politeness=None, retry_policy=None, limits=None):
+    """Fetches and analyses a single frontier item; returns the links to follow from it."""
+    url = item.url
+    indent_str = " " * (item.indent * 4)
     message = f"{indent_str}URL: {url}"
     outputs.append(message)
     logging.info(message)
     
     domain = urllib.parse.urlparse(url).netloc
-    if domain_semaphores is not None:
+    # With politeness the HostFrontier already holds each host to its adaptive limit.
+    if domain_semaphores is not None and politeness is None:
         if domain not in domain_semaphores:
             domain_semaphores[domain] = asyncio.Semaphore(max_per_domain)
         semaphore = domain_semaphores[domain]
     else:
         semaphore = None
 
-    text = await async_fetch(session, url, indent_str, render, delay, user_agent, semaphore, max_retries)
+    if politeness is not None:
+        try:
+            await politeness.check_async(url, session)
+        except RobotsDisallowed as e:
+            error_msg = f"{indent_str}Error fetching URL: {e}"
+            outputs.append(error_msg)
+            logging.error(error_msg)
+            emit_page(outputs, page_record(url, item.indent, error=str(e)))
+            return []
+    text = await async_fetch(session, url, indent_str, render, delay, user_agent, semaphore, max_retries, browsers, cache, politeness, retry_policy, limits)
     if text is None:
         outputs.append(f"{indent_str}Error fetching URL")
-        return
-    # Plugin processing in async mode
-    if use_plugins:
-        try:
-            from plugin_manager import load_plugins
-            plugin_dir = "plugin_extensions"
-            plugins = load_plugins(plugin_dir)
-            for plugin in plugins:
-                try:
-                    result_plugin = plugin.process(text, url)
-                    outputs.append(f"{indent_str}Plugin {plugin.__class__.__name__} output: {result_plugin}")
-                    logging.info(f"{indent_str}Plugin {plugin.__class__.__name__} output: {result_plugin}")
-                except Exception as e:
-                    outputs.append(f"{indent_str}Plugin {plugin.__class__.__name__} error: {e}")
-                    logging.error(f"{indent_str}Plugin {plugin.__class__.__name__} error: {e}")
-        except Exception as e:
-            logging.error(f"{indent_str}Failed to load plugins: {e}")
+        emit_page(outputs, page_record(url, item.indent, error="Error fetching URL"))
+        return []
+    document = None
+    analysis = cached_analysis(cache, url, outputs, indent_str, analysis_pool.plugins if use_plugins else None)
+    if analysis is None:
+        document = PageDocument(text, url, parser)
+        await analysis_pool.parse(document)
+        # Plugin processing in async mode, off the event loop when workers are enabled
+        plugin_outputs = {}
+        if use_plugins:
+            try:
+                plugin_outputs = report_plugin_results(await analysis_pool.run_plugins(document), outputs, indent_str)
+            except Exception as e:
+                logging.error(f"{indent_str}Failed to load plugins: {e}")
+        store_analysis(cache, document, plugin_outputs)
+        page_title = document.title
+    else:
+        page_title, plugin_outputs = analysis["title"], analysis["plugins"]
 
-    soup = BeautifulSoup(text, "html.parser")
-    title = soup.title.string.strip() if soup.title and soup.title.string else "No title found"
+    title = page_title or "No title found"
     title_msg = f"{indent_str}Title: {title}"
     outputs.append(title_msg)
     logging.info(title_msg)
-    if depth > 1:
-        links = set()
-        for anchor in soup.find_all("a", href=True):
-            link = anchor["href"]
-            absolute_link = urllib.parse.urljoin(url, link)
-            links.add(absolute_link)
-        tasks = []
-        for link in sorted(links):
-            if link not in visited:
-                visited.add(link)
-                tasks.append(async_crawl_page(link, depth - 1, visited, outputs, session, render, indent + 1, delay, user_agent, domain_semaphores, max_per_domain, max_retries, use_plugins))
-        if tasks:
-            await asyncio.gather(*tasks)
-
-async def async_create_crawler(args):
-    outputs = []
+    emit_page(outputs, page_record(url, item.indent, page_title, plugin_outputs), document or PageDocument(text, url, parser))
+    if item.depth > 1:
+        return document.links if document is not None else analysis["links"]
+    return []
+
+# Concurrent crawl driven by a frontier queue and a fixed number of worker tasks.
+# `url` may be a single URL or a list of seed URLs sharing one frontier.
+async def async_crawl_page(url, depth, visited, outputs, session, render=False, indent=0, delay=0, user_agent=None, domain_semaphores=None, max_per_domain=3, max_retries=3, use_plugins=False, plugins=None, parser="html.parser", analysis_pool=None, concurrency=10, browsers=None, cache=None, checkpoint=None, politeness=None, retry_policy=None, limits=None, frontier=None):
+    if analysis_pool is None:
+        analysis_pool = AnalysisPool(0, plugins)
+    if retry_policy is None:
+        # One policy per crawl, so all workers draw from the same retry budget.
+        retry_policy = RetryPolicy(max_retries)
+    own_browsers = render and browsers is None
+    if own_browsers:
+        browsers = BrowserPool()
+    if use_plugins and analysis_pool.plugins is None:
+        analysis_pool.plugins = PluginRegistry()
+    # With politeness, hosts waiting out their rate limit are skipped rather than blocking a worker.
+    if frontier is None:
+        frontier = HostFrontier(politeness, max_per_domain) if politeness is not None else AsyncFrontier()
+    items = [FrontierItem(seed, depth, indent) for seed in ([url] if isinstance(url, str) else url)]
+    if checkpoint is not None:
+        visited = checkpoint.track_visited(visited, [item.url for item in items])
+        resumed = checkpoint.saved
+        _, pending, retries = checkpoint.restore(depth)
+        # A resumed crawl continues from its saved frontier instead of the seeds.
+        items = (pending if resumed else items) + retries
+    for item in items:
+        frontier.put(item)
+    # Items held by workers; they are part of the frontier as far as checkpoints are concerned.
+    in_flight = {}
+
+    def save_checkpoint():
+        checkpoint.save(list(in_flight.values()) + frontier.pending())
+
+    async def checkpointer():
+        while True:
+            await asyncio.sleep(checkpoint.interval)
+            save_checkpoint()
+
+    async def worker():
+        task = asyncio.current_task()
+        while True:
+            item = await frontier.get()
+            in_flight[task] = item
+            try:
+                links = await async_process_page(item, outputs, session, render, delay, user_agent, domain_semaphores, max_per_domain, max_retries, use_plugins, parser, analysis_pool, browsers, cache, politeness, retry_policy, limits)
+                for link in canonical_links(links, visited):
+                    if link not in visited:
+                        visited.add(link)
+                        frontier.put(FrontierItem(link, item.depth - 1, item.indent + 1))
+            except Exception as e:
+                logging.error(f"Worker failed on URL {item.url}: {e}")
+            finally:
+                frontier.task_done(item)
+            # Skipped when the worker is cancelled mid-page, so the page stays checkpointed.
+            del in_flight[task]
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    if checkpoint is not None:
+        workers.append(asyncio.create_task(checkpointer()))
+    try:
+        await frontier.join()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if checkpoint is not None:
+            save_checkpoint()
+        if own_browsers:
+            browsers.close()
+
+# Concurrent crawl of args.url; a distributed worker passes its shared frontier instead,
+# and crawls whatever it leases from there
+async def async_create_crawler(args, frontier=None, politeness=None):
+    outputs = open_output(args)
     msg = f"Crawler Name: {args.name}"
     outputs.append(msg)
     logging.info(msg)
-    domain_semaphores = {}
-    tasks = []
-    async with aiohttp.ClientSession() as session:
-        for url in args.url:
-            task = async_crawl_page(url, args.depth, set([url]), outputs, session, args.render, delay=args.delay, user_agent=args.user_agent, domain_semaphores=domain_semaphores, max_per_domain=args.max_per_domain, max_retries=args.max_retries, use_plugins=args.use_plugins)
-            tasks.append(task)
-        if tasks:
-            await asyncio.gather(*tasks)
-    result_text = finalize_output(outputs, args)
-    if args.qdrant:
-        persist_results_qdrant(result_text, args)
+    checkpoint, outputs = open_checkpoint(args, outputs)
+    check_parser(args.parser)
+    # Plugins fetch extra resources synchronously from worker threads, so they get a pooled requests session.
+    plugin_session = create_session(args.pool_size, args.pool_per_host, args.max_retries)
+    plugins = load_crawl_plugins(args, plugin_session)
+    analysis_pool = AnalysisPool(args.workers, plugins)
+    browsers = open_browsers(args)
+    cache = open_cache(args, plugins)
+    visited = create_visited(args, args.url)
+    connector = create_connector(args.pool_size, args.pool_per_host, args.dns_cache_ttl)
+    limits = create_limits(args)
+    async with aiohttp.ClientSession(connector=connector, timeout=limits.client_timeout()) as session:
+        try:
+            # All seed URLs share one frontier, visited set and worker pool.
+            await async_crawl_page([] if frontier is not None else args.url, args.depth, visited, outputs, session, args.render, user_agent=args.user_agent, max_per_domain=args.max_per_domain, max_retries=args.max_retries, use_plugins=args.use_plugins, plugins=plugins, parser=args.parser, analysis_pool=analysis_pool, concurrency=args.concurrency, browsers=browsers, cache=cache, checkpoint=checkpoint, politeness=politeness or create_politeness(args), retry_policy=create_retry_policy(args), limits=limits, frontier=frontier)
+            finish_plugins(plugins, outputs)
+        finally:
+            analysis_pool.shutdown()
+            visited.close()
+            if browsers is not None:
+                browsers.close()
+            if cache is not None:
+                cache.close()
+            if plugins is not None:
+                plugins.close()
+    plugin_session.close()
+    outputs.close()
+
+# Distributed worker: crawls the partitions (hosts) it leases from the shared frontier until
+# the whole crawl is finished; on exit its unfinished URLs go back to the other workers
+async def run_worker(args):
+    store = FrontierStore(args.frontier, args.lease_ttl, UrlNormalizer(args.strip_params, args.strip_trailing_slash))
+    politeness = create_politeness(args)
+    frontier = SharedFrontier(store, HostFrontier(politeness, args.max_per_domain), args.worker_id or default_worker_id())
+    logging.info(f"Worker {frontier.worker_id} joined the crawl in {args.frontier}")
+    try:
+        await async_create_crawler(args, frontier, politeness)
+    finally:
+        frontier.close()
+        store.close()
+
+# Distributed coordinator: creates the shared frontier with the seeds and crawl options,
+# optionally starts local worker processes, and reports progress until the crawl is done
+def run_coordinator(args):
+    store = FrontierStore(args.frontier, args.lease_ttl, UrlNormalizer(args.strip_params, args.strip_trailing_slash))
+    store.start(vars(args), args.url, args.depth, args.partitions)
+    workers = []
+    for i in range(args.local_workers):
+        command = [sys.executable, sys.argv[0], "crawl", "--role", "worker", "--frontier", args.frontier, "--worker-id", f"{default_worker_id()}-{i}"]
+        if args.output:
+            command += ["--output", f"{args.output}.{i}"]
+        workers.append(subprocess.Popen(command))
+    try:
+        while not store.finished():
+            if workers and all(worker.poll() is not None for worker in workers) and not store.progress()[3]:
+                logging.error("All workers exited before the crawl finished; start workers to continue it.")
+                break
+            time.sleep(5)
+            pending, leased, done, live = store.progress()
+            logging.info(f"Crawl {args.name}: {done} pages done, {leased} in progress, {pending} pending, {live} live workers")
+        else:
+            logging.info(f"Crawl {args.name} finished: {store.progress()[2]} pages crawled")
+        for worker in workers:
+            worker.wait()
+    finally:
+        store.close()
 
 # Function to query Qdrant using semantic search over stored embeddings.
 def query_qdrant(args):
     try:
-        model = SentenceTransformer("all-MiniLM-L6-v2")
+        model = load_embedding_model()
         query_embedding = model.encode(args.query).tolist()
         client = QdrantClient(host=args.qdrant_host, port=args.qdrant_port)
         collection_name = args.qdrant_collection
@@ -344,24 +689,65 @@ def main():
 
     # Subparser for crawling command
     crawl_parser = subparsers.add_parser("crawl", help="Crawl target URL(s)")
-    crawl_parser.add_argument("--name", type=str, required=True, help="Name of the crawler")
-    crawl_parser.add_argument("--url", type=str, required=True, nargs="+", help="Target URL(s) to crawl")
+    crawl_parser.add_argument("--name", type=str, help="Name of the crawler (required unless --resume is given)")
+    crawl_parser.add_argument("--url", type=str, nargs="+", help="Target URL(s) to crawl (required unless --resume is given)")
     crawl_parser.add_argument("--list-links", action="store_true", help="List links found on the page (for non-recursive crawl)")
     crawl_parser.add_argument("--output", type=str, help="File to write results to")
     crawl_parser.add_argument("--depth", type=int, default=1, help="Crawl depth for recursive crawling (default 1)")
+    crawl_parser.add_argument("--order", type=str, choices=ORDERS, default="dfs", help="Frontier order for recursive synchronous crawls (default: dfs)")
     crawl_parser.add_argument("--concurrent", action="store_true", help="Enable asynchronous concurrent crawling")
-    crawl_parser.add_argument("--json", action="store_true", help="Output results in JSON format")
+    crawl_parser.add_argument("--json", action="store_true", help="Output results in JSON format (same as --format json)")
+    crawl_parser.add_argument("--format", type=str, choices=FORMATS, help="Output format: text, json, or ndjson with one record per page (default: text)")
     crawl_parser.add_argument("--render", action="store_true", help="Render dynamic content using Selenium")
-    crawl_parser.add_argument("--delay", type=float, default=0, help="Delay (in seconds) between requests")
+    crawl_parser.add_argument("--render-workers", type=int, default=2, help="Headless browsers kept alive for --render (default 2)")
+    crawl_parser.add_argument("--render-max-uses", type=int, default=50, help="Pages rendered by a browser before it is restarted; 0 never restarts (default 50)")
+    crawl_parser.add_argument("--delay", type=float, default=0, help="Minimum interval (in seconds) between requests to the same host; robots.txt Crawl-delay can raise it")
+    crawl_parser.add_argument("--burst", type=int, default=1, help="Requests a host may receive back-to-back before --delay applies (default 1)")
+    crawl_parser.add_argument("--ignore-robots", action="store_true", help="Do not fetch or obey robots.txt")
+    crawl_parser.add_argument("--robots-ttl", type=float, default=ROBOTS_TTL, help=f"Seconds a fetched robots.txt is cached (default {ROBOTS_TTL})")
     crawl_parser.add_argument("--user-agent", type=str, default="", help="Custom User-Agent string for HTTP requests")
-    crawl_parser.add_argument("--max-per-domain", type=int, default=3, help="Max concurrent requests per domain (default 3)")
-    crawl_parser.add_argument("--max-retries", type=int, default=3, help="Maximum retries for async requests (default 3)")
+    crawl_parser.add_argument("--max-per-domain", type=int, default=3, help="Upper bound on concurrent requests per domain; concurrent crawls start each domain at 1 and adapt to its latency and errors (default 3)")
+    crawl_parser.add_argument("--concurrency", type=int, default=10, help="Number of concurrent crawl workers, i.e. the global limit on pages in flight (default 10)")
+    crawl_parser.add_argument("--max-retries", type=int, default=3, help="Maximum retries of a page after timeouts, connection errors, 429 or 5xx responses (default 3)")
+    crawl_parser.add_argument("--connect-timeout", type=float, default=10, help="Seconds to wait for a connection to a host (default 10)")
+    crawl_parser.add_argument("--read-timeout", type=float, default=30, help="Seconds to wait for data from an open connection (default 30)")
+    crawl_parser.add_argument("--total-timeout", type=float, default=120, help="Seconds allowed for a whole page download; 0 disables (default 120)")
+    crawl_parser.add_argument("--max-page-size", type=int, default=10 * 1024 * 1024, help="Largest page body downloaded, in bytes; larger pages are aborted; 0 disables (default 10 MiB)")
+    crawl_parser.add_argument("--content-types", type=str, nargs="*", default=HTML_CONTENT_TYPES, help="Content types crawled, as shell-style patterns; others are skipped before download. Give no patterns to crawl every type (default: HTML)")
+    crawl_parser.add_argument("--max-image-size", type=int, default=MAX_IMAGE_BYTES, help="Largest image downloaded by the visual plugins, in bytes; 0 disables (default 5 MiB)")
+    crawl_parser.add_argument("--image-cache-size", type=int, default=64, help="Memory for decoded images shared by the visual plugins, in MiB (default 64)")
+    crawl_parser.add_argument("--retry-budget", type=float, default=0.2, help="Retries allowed per page fetched, across the whole crawl (default 0.2)")
+    crawl_parser.add_argument("--pool-size", type=int, default=100, help="Total pooled HTTP connections / per-host pools kept alive (default 100)")
+    crawl_parser.add_argument("--pool-per-host", type=int, default=10, help="Pooled HTTP connections kept alive per host (default 10)")
+    crawl_parser.add_argument("--dns-cache-ttl", type=int, default=300, help="DNS cache TTL in seconds for concurrent crawls (default 300)")
+    crawl_parser.add_argument("--cache-dir", type=str, help="Directory for the persistent HTTP response and plugin result caches; unchanged pages reuse their stored results")
+    crawl_parser.add_argument("--cache-ttl", type=float, default=0, help="Seconds a cached response is served without revalidation; 0 always revalidates (default 0)")
+    crawl_parser.add_argument("--dedup", type=str, choices=DEDUP_BACKENDS, default="memory", help="Visited-URL store: exact in-memory set, Bloom filter, or memory-mapped disk table (default: memory)")
+    crawl_parser.add_argument("--dedup-capacity", type=int, default=10000000, help="Expected number of URLs, used to size the bloom and disk stores (default 10000000)")
+    crawl_parser.add_argument("--dedup-error-rate", type=float, default=0.001, help="False-positive rate of the bloom store (default 0.001)")
+    crawl_parser.add_argument("--dedup-path", type=str, help="File for the disk store (default: a temporary file)")
+    crawl_parser.add_argument("--strip-params", type=str, nargs="*", default=TRACKING_PARAMS, help="Query parameters removed when normalizing URLs; shell-style patterns (default: common tracking parameters)")
+    crawl_parser.add_argument("--strip-trailing-slash", action="store_true", help="Treat /path/ and /path as the same URL")
+    crawl_parser.add_argument("--checkpoint", type=str, help="Checkpoint file for the crawl's frontier, visited set and page results")
+    crawl_parser.add_argument("--checkpoint-interval", type=float, default=30, help="Seconds between checkpoint snapshots (default 30)")
+    crawl_parser.add_argument("--resume", type=str, metavar="CHECKPOINT", help="Resume the crawl stored in a checkpoint file, with its original options")
+    crawl_parser.add_argument("--role", type=str, choices=["coordinator", "worker"], help="Distributed crawl role: the coordinator seeds a shared frontier, workers crawl from it (always concurrently)")
+    crawl_parser.add_argument("--frontier", type=str, help="Shared frontier database for --role coordinator/worker")
+    crawl_parser.add_argument("--partitions", type=int, default=64, help="Host-hash partitions of the shared frontier, the unit of work assigned to workers (default 64)")
+    crawl_parser.add_argument("--lease-ttl", type=float, default=60, help="Seconds without a heartbeat after which a worker's partitions are reassigned (default 60)")
+    crawl_parser.add_argument("--worker-id", type=str, help="Name of this worker in the shared frontier (default: host name and process id)")
+    crawl_parser.add_argument("--local-workers", type=int, default=0, help="Worker processes the coordinator starts on this machine (default 0)")
+    crawl_parser.add_argument("--parser", type=str, choices=PARSERS, default="html.parser", help="HTML parser backend for title and link extraction (default: html.parser)")
+    crawl_parser.add_argument("--workers", type=int, default=4, help="Worker pool size for parsing and plugin processing in concurrent mode; 0 runs them on the event loop (default 4)")
     crawl_parser.add_argument("--use-plugins", action="store_true", help="Enable plugin processing for additional metadata extraction")
     # Qdrant persistence options for crawler
     crawl_parser.add_argument("--qdrant", action="store_true", help="Persist results to Qdrant DB")
     crawl_parser.add_argument("--qdrant-host", type=str, default="localhost", help="Qdrant host (default: localhost)")
     crawl_parser.add_argument("--qdrant-port", type=int, default=6333, help="Qdrant port (default: 6333)")
     crawl_parser.add_argument("--qdrant-collection", type=str, default="crawler_collection", help="Qdrant collection name")
+    crawl_parser.add_argument("--qdrant-batch-size", type=int, default=64, help="Pages embedded and upserted per Qdrant batch (default 64)")
+    crawl_parser.add_argument("--qdrant-chunk-size", type=int, default=0, help="Split pages into chunks of this many words, one point per chunk; 0 stores whole pages (default 0)")
+    crawl_parser.add_argument("--qdrant-recreate", action="store_true", help="Wipe the Qdrant collection before persisting instead of updating it in place")
 
     # Subparser for query command
     query_parser = subparsers.add_parser("query", help="Query semantic data from Qdrant")
@@ -374,7 +760,25 @@ def main():
     args = parser.parse_args()
 
     if args.command == "crawl":
-        if args.concurrent:
+        if args.role and not args.frontier:
+            crawl_parser.error("--role requires --frontier")
+        if args.role == "worker":
+            try:
+                args = worker_args(args, crawl_parser)
+            except ValueError as e:
+                crawl_parser.error(str(e))
+            asyncio.run(run_worker(args))
+            return
+        if args.resume:
+            try:
+                args = resume_args(args, crawl_parser)
+            except ValueError as e:
+                crawl_parser.error(str(e))
+        elif not args.name or not args.url:
+            crawl_parser.error("--name and --url are required unless resuming with --resume")
+        if args.role == "coordinator":
+            run_coordinator(args)
+        elif args.concurrent:
             asyncio.run(async_create_crawler(args))
         else:
             create_crawler(args)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Streaming output sinks for the crawler.
+
+Results are written as they are produced instead of being buffered for the whole
+crawl. Every sink accepts two kinds of output:
+  - append(message): a human-readable progress line (the text/JSON modes print these)
+  - page(record, document): a structured per-page record (url, depth, title, plugin
+    outputs), plus the page's PageDocument for sinks that need its text
+
+Formats:
+  - text:   one message per line
+  - json:   {"results": [messages...]}, streamed element by element
+  - ndjson: one JSON record per crawled page
+"""
+import json
+import logging
+import sys
+
+FORMATS = ["text", "json", "ndjson"]
+# Buffer size for output files; flushed when full and on close().
+WRITE_BUFFER_SIZE = 1 << 16
+
+def to_json(value):
+    """Serializes a page record or plugin output for the sinks and the on-disk caches."""
+    # Plugin outputs are not always JSON-native (e.g. numpy scalars); fall back to str().
+    return json.dumps(value, default=str)
+
+class OutputSink:
+    def __init__(self, path=None, stream=None):
+        self.path = path
+        self.stream = stream
+        self.file = open(path, "w", buffering=WRITE_BUFFER_SIZE) if path else None
+
+    def append(self, message):
+        pass
+
+    def page(self, record, document=None):
+        pass
+
+    def write(self, text):
+        if self.stream is not None:
+            self.stream.write(text)
+        if self.file is not None:
+            self.file.write(text)
+
+    def flush(self):
+        """Pushes buffered output through to its destination."""
+        if self.stream is not None:
+            self.stream.flush()
+        if self.file is not None:
+            self.file.flush()
+
+    def finish(self):
+        """Writes any closing syntax for the format."""
+        pass
+
+    def close(self):
+        self.finish()
+        if self.stream is not None:
+            self.stream.flush()
+        if self.file is not None:
+            self.file.close()
+            logging.info(f"Results written to {self.path}")
+
+class TextSink(OutputSink):
+    def __init__(self, path=None, stream=None):
+        super().__init__(path, stream)
+        self.lines = 0
+
+    def append(self, message):
+        # Lines are separated rather than terminated, matching "\n".join(outputs).
+        self.write(("\n" if self.lines else "") + message)
+        self.lines += 1
+
+    def finish(self):
+        if self.stream is not None:
+            self.stream.write("\n")
+
+class JsonSink(OutputSink):
+    """Streams the same document json.dumps({"results": outputs}, indent=2) would produce."""
+    def __init__(self, path=None, stream=None):
+        super().__init__(path, stream)
+        self.count = 0
+
+    def append(self, message):
+        prefix = '{\n  "results": [\n' if self.count == 0 else ",\n"
+        self.write(prefix + "    " + json.dumps(message))
+        self.count += 1
+
+    def finish(self):
+        if self.count == 0:
+            self.write('{\n  "results": []\n}')
+        else:
+            self.write("\n  ]\n}")
+        if self.stream is not None:
+            self.stream.write("\n")
+
+class NdjsonSink(OutputSink):
+    def page(self, record, document=None):
+        self.write(to_json(record) + "\n")
+
+class MultiSink:
+    """Fans messages and page records out to several sinks."""
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def append(self, message):
+        for sink in self.sinks:
+            sink.append(message)
+
+    def page(self, record, document=None):
+        for sink in self.sinks:
+            sink.page(record, document)
+
+    def flush(self):
+        for sink in self.sinks:
+            flush = getattr(sink, "flush", None)
+            if flush is not None:
+                flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+def create_sink(output_format, path=None, stream=sys.stdout):
+    if output_format == "json":
+        return JsonSink(path, stream)
+    if output_format == "ndjson":
+        return NdjsonSink(path, stream)
+    return TextSink(path, stream)
+
+def emit_page(outputs, record, document=None):
+    """Sends a page record to `outputs` if it is a sink; plain message lists ignore records."""
+    page = getattr(outputs, "page", None)
+    if page is not None:
+        page(record, document)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of plugin outputs for incremental recrawls.
+
+Results are keyed by (plugin name, plugin config hash, content hash), so a page
+whose visible text is unchanged since the last crawl reuses every plugin's prior
+output, even if its markup changed. Changing a plugin's settings in
+plugin_config.json changes only that plugin's config hash; the other plugins
+keep hitting their cached entries.
+
+Plugins choose what their output depends on with the `cache_by` class attribute
+(see plugins.py): "text" keys results by the visible-text fingerprint, "html" by
+the raw HTML, and None disables caching for that plugin.
+
+A per-URL table of content fingerprints records which pages changed between crawls.
+"""
+import hashlib
+import json
+import logging
+import time
+from output import to_json
+from sqlite_cache import SqliteCache
+
+CACHE_FILE = "plugin_results.sqlite3"
+# Returned by lookup() when there is no cached result (None is a valid plugin output).
+MISSING = object()
+
+def config_hash(settings):
+    """Stable hash of a plugin's settings from plugin_config.json."""
+    return hashlib.sha256(json.dumps(settings or {}, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+class PluginResultCache(SqliteCache):
+    def __init__(self, cache_dir):
+        super().__init__(
+            cache_dir, CACHE_FILE,
+            "CREATE TABLE IF NOT EXISTS plugin_results ("
+            "plugin TEXT, config_hash TEXT, content_hash TEXT, result TEXT, "
+            "PRIMARY KEY (plugin, config_hash, content_hash))",
+            "CREATE TABLE IF NOT EXISTS fingerprints (url TEXT PRIMARY KEY, content_hash TEXT, seen_at REAL)"
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def record_page(self, url, content_hash):
+        """Stores a page's fingerprint; returns True if it is unchanged since the last crawl."""
+        row = self.read("SELECT content_hash FROM fingerprints WHERE url = ?", (url,))
+        self.write(
+            "INSERT OR REPLACE INTO fingerprints (url, content_hash, seen_at) VALUES (?, ?, ?)",
+            (url, content_hash, time.time())
+        )
+        return row is not None and row[0] == content_hash
+
+    def lookup(self, plugin_name, plugin_config_hash, content_hash):
+        row = self.read(
+            "SELECT result FROM plugin_results WHERE plugin = ? AND config_hash = ? AND content_hash = ?",
+            (plugin_name, plugin_config_hash, content_hash)
+        )
+        if row is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return json.loads(row[0])
+
+    def store(self, plugin_name, plugin_config_hash, content_hash, result):
+        self.write(
+            "INSERT OR REPLACE INTO plugin_results (plugin, config_hash, content_hash, result) VALUES (?, ?, ?, ?)",
+            (plugin_name, plugin_config_hash, content_hash, to_json(result))
+        )
+
+    def prune(self, config_hashes):
+        """Drops entries of the given plugins that were produced under a different config."""
+        for plugin_name, plugin_config_hash in config_hashes.items():
+            self.write(
+                "DELETE FROM plugin_results WHERE plugin = ? AND config_hash != ?",
+                (plugin_name, plugin_config_hash)
+            )
+
+    def close(self):
+        super().close()
+        logging.info(f"Plugin result cache: {self.hits} hits, {self.misses} misses.")
@@ -9,23 +9,48 @@ Configuration parameters (nested):
       max_length: integer (default: 150)
       min_length: integer (default: 40)
       do_sample: boolean (default: false)
+      batch_size: integer, pages (and chunks) per model call (default: 8)
+      max_input_tokens: integer, input tokens per chunk (default: the model's limit, at most 1024)
 Requires: transformers, beautifulsoup4, nltk
 
+Pages longer than the model's input limit are not truncated: their text is split at
+sentence boundaries into chunks that fit, the chunks are summarized, and the joined
+chunk summaries are summarized again until one summary remains (map-reduce). The
+chunks of all pages in a batch go through the pipeline together, so the model runs
+full batches instead of one sequence per forward pass.
+
 Note: You may need to download the NLTK data for sentence tokenization:
     python -m nltk.downloader punkt
 """
+import re
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 from transformers import pipeline
 import nltk
 
+# Input limit used when the tokenizer does not declare one (it then reports a huge sentinel).
+DEFAULT_INPUT_TOKENS = 1024
+
+def split_sentences(text):
+    try:
+        return nltk.sent_tokenize(text)
+    except LookupError:
+        # Sentence models not downloaded; fall back to splitting on end punctuation.
+        return re.split(r"(?<=[.!?])\s+", text)
+
 class AdvancedContentSummarizer(PluginBase):
+    cache_by = "text"
+
     def __init__(self):
         self.model_name = "sshleifer/distilbart-cnn-12-6"
         self.max_length = 150
         self.min_length = 40
         self.do_sample = False
-        self.summarizer = pipeline("summarization", model=self.model_name)
+        self.batch_size = 8
+        self.max_input_tokens = None
+        # The pipeline is built lazily in warmup() so configure() does not load it twice.
+        self.summarizer = None
+        self.loaded_model_name = None
 
     def configure(self, settings):
         summarization_config = settings.get("summarization", {})
@@ -33,21 +58,88 @@ class AdvancedContentSummarizer(PluginBase):
         self.max_length = summarization_config.get("max_length", self.max_length)
         self.min_length = summarization_config.get("min_length", self.min_length)
         self.do_sample = summarization_config.get("do_sample", self.do_sample)
-        # Reload the summarization pipeline with updated configuration
-        self.summarizer = pipeline("summarization", model=self.model_name)
+        self.batch_size = summarization_config.get("batch_size", self.batch_size)
+        self.max_input_tokens = summarization_config.get("max_input_tokens", self.max_input_tokens)
+        # Reload the summarization pipeline if the model changed after warmup
+        if self.summarizer is not None and self.loaded_model_name != self.model_name:
+            self.summarizer = None
+            self.warmup()
 
-    def process(self, html, url):
+    def warmup(self):
         nltk.download("punkt", quiet=True)
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
-        if not text:
-            return "No text found for summarization."
-        summary = self.summarizer(
-            text,
+        if self.summarizer is None:
+            self.summarizer = pipeline("summarization", model=self.model_name)
+            self.loaded_model_name = self.model_name
+
+    def input_budget(self):
+        """Tokens of page text that fit in one model input, leaving room for special tokens."""
+        tokenizer = self.summarizer.tokenizer
+        limit = self.max_input_tokens or min(tokenizer.model_max_length, DEFAULT_INPUT_TOKENS)
+        return max(1, limit - tokenizer.num_special_tokens_to_add())
+
+    def chunk(self, text):
+        """Splits text into sentence-aligned chunks of at most input_budget() tokens."""
+        tokenizer = self.summarizer.tokenizer
+        budget = self.input_budget()
+        sentences = split_sentences(text)
+        pieces = []
+        for sentence, ids in zip(sentences, tokenizer(sentences, add_special_tokens=False)["input_ids"]):
+            if len(ids) <= budget:
+                pieces.append((sentence, len(ids)))
+            else:
+                # A "sentence" longer than the budget (e.g. a flattened table) is cut at token boundaries.
+                pieces.extend((tokenizer.decode(ids[i:i + budget]), len(ids[i:i + budget])) for i in range(0, len(ids), budget))
+        chunks, current, size = [], [], 0
+        for piece, length in pieces:
+            if current and size + length > budget:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += length
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
+
+    def summarize(self, texts):
+        """Summarizes texts in batched pipeline calls; returns the summaries (None where one failed)."""
+        outputs = self.summarizer(
+            texts,
             max_length=self.max_length,
             min_length=self.min_length,
-            do_sample=self.do_sample
+            do_sample=self.do_sample,
+            truncation=True,
+            batch_size=self.batch_size
         )
-        if summary and isinstance(summary, list) and "summary_text" in summary[0]:
-            return summary[0]["summary_text"]
-        return "Failed to generate summary."
+        summaries = []
+        for output in outputs:
+            if isinstance(output, list):
+                output = output[0] if output else {}
+            summaries.append(output.get("summary_text") if isinstance(output, dict) else None)
+        return summaries
+
+    def process_batch(self, documents):
+        if self.summarizer is None:
+            self.warmup()
+        results = ["No text found for summarization."] * len(documents)
+        # Chunks still to summarize, per page; each round summarizes every page's chunks together.
+        remaining = {i: self.chunk(document.text) for i, document in enumerate(documents) if document.text}
+        while remaining:
+            queue = [(i, chunk) for i, chunks in remaining.items() for chunk in chunks]
+            summaries = {}
+            for (i, _), summary in zip(queue, self.summarize([chunk for _, chunk in queue])):
+                summaries.setdefault(i, []).append(summary)
+            remaining = {}
+            for i, parts in summaries.items():
+                if None in parts:
+                    results[i] = "Failed to generate summary."
+                elif len(parts) == 1:
+                    results[i] = parts[0]
+                else:
+                    chunks = self.chunk(" ".join(parts))
+                    # Summaries nearly as long as the input budget would not shrink; the final
+                    # round then summarizes their truncated concatenation.
+                    remaining[i] = chunks if len(chunks) < len(parts) else [" ".join(parts)]
+        return results
+
+    def process(self, html, url, document=None):
+        return self.process_batch([document or PageDocument(html, url)])[0]
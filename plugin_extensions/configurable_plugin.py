@@ -8,6 +8,9 @@ It implements a configuration method and returns its configuration settings as o
 from plugins import PluginBase
 
 class ConfigurablePlugin(PluginBase):
+    # Trivial and non-blocking, so it runs directly on the event loop.
+    executor = "inline"
+
     def __init__(self):
         self.config = {}
 
@@ -15,6 +18,6 @@ class ConfigurablePlugin(PluginBase):
         """Configure the plugin with provided settings."""
         self.config = settings
 
-    def process(self, html, url):
+    def process(self, html, url, document=None):
         """Return the plugin's configuration as its output for demonstration."""
         return f"Configured with: {self.config}"
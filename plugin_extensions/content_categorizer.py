@@ -3,33 +3,44 @@
 ContentCategorizer plugin for the crawler.
 
 Categorizes the content of an HTML page into topics based on the presence of keywords.
-This simplistic, rule-based plugin checks for keywords associated with topics like:
+This simplistic, rule-based plugin scores each category by how often its keywords
+occur on the page. The categories and their keywords (words or phrases) come from
+the `keywords` setting; without one it checks for topics like:
 - Sports
 - Politics
 - Technology
 - Entertainment
 
+All keywords are matched in a single pass over the page's tokens (see
+keyword_matcher.py), so large keyword sets cost little more than small ones.
 If no keywords are found, it returns "Uncategorized".
 """
 from plugins import PluginBase
-from bs4 import BeautifulSoup
-import re
+from document import PageDocument
+from keyword_matcher import KeywordMatcher
+
+DEFAULT_KEYWORDS = {
+    "Sports": ["sport", "game", "team", "player", "match"],
+    "Politics": ["election", "government", "policy", "vote", "senate"],
+    "Technology": ["tech", "software", "hardware", "computer", "internet"],
+    "Entertainment": ["movie", "music", "concert", "television", "festival"]
+}
 
 class ContentCategorizer(PluginBase):
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").lower()
-        topics = {
-            "Sports": ["sport", "game", "team", "player", "match"],
-            "Politics": ["election", "government", "policy", "vote", "senate"],
-            "Technology": ["tech", "software", "hardware", "computer", "internet"],
-            "Entertainment": ["movie", "music", "concert", "television", "festival"]
-        }
-        category_scores = {}
-        for topic, keywords in topics.items():
-            score = sum(len(re.findall(r'\b' + kw + r'\b', text)) for kw in keywords)
-            category_scores[topic] = score
-        best_topic = max(category_scores, key=category_scores.get)
-        if category_scores[best_topic] == 0:
-            best_topic = "Uncategorized"
-        return best_topic
+    cache_by = "text"
+
+    def __init__(self):
+        self.keywords = DEFAULT_KEYWORDS
+        self.matcher = KeywordMatcher(self.keywords)
+
+    def configure(self, settings):
+        self.keywords = settings.get("keywords", self.keywords)
+        self.matcher = KeywordMatcher(self.keywords)
+
+    def process(self, html, url, document=None):
+        document = document or PageDocument(html, url)
+        category_scores = self.matcher.counts(document.tokens)
+        if not category_scores:
+            return "Uncategorized"
+        # Ties go to the category configured first.
+        return max(self.keywords, key=lambda topic: category_scores[topic])
@@ -12,9 +12,11 @@ Configuration parameters (nested):
       key: string (default: "dummy_key")
 """
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 
 class ContentEnricher(PluginBase):
+    cache_by = "text"
+
     def __init__(self):
         # Default nested configuration options
         self.enrichment_level = 1
@@ -30,9 +32,9 @@ class ContentEnricher(PluginBase):
         self.api_endpoint = api_config.get("endpoint", "http://dummyapi")
         self.api_key = api_config.get("key", "dummy_key")
     
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
+    def process(self, html, url, document=None):
+        document = document or PageDocument(html, url)
+        text = document.text
         # Simulate enrichment by appending text repeatedly based on the enrichment level.
         enriched_text = text + self.append_text * self.enrichment_level
         return enriched_text
@@ -11,16 +11,21 @@ Configuration parameters (nested):
       confidence_threshold: float (default: 0.2)
 Requires: opencv-python, numpy, requests, beautifulsoup4
 
+Images come from the crawl's shared ImageFetcher, so an image shown on many pages
+is downloaded and decoded once.
+
 Note: Ensure the model files are available in the working directory or provide absolute paths in the configuration.
 """
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
+from image_fetcher import ImageDecodeError, default_fetcher
 import cv2
-import numpy as np
 import urllib.parse
-import requests
 
 class EnhancedVisualAnalyzer(PluginBase):
+    # The result depends on the image bytes behind the <img src>, which can change while the page does not.
+    cache_by = None
+
     def __init__(self):
         # Default configuration parameters
         self.prototxt = "MobileNetSSD_deploy.prototxt.txt"
@@ -32,7 +37,8 @@ class EnhancedVisualAnalyzer(PluginBase):
             "diningtable", "dog", "horse", "motorbike", "person",
             "pottedplant", "sheep", "sofa", "train", "tvmonitor"
         ]
-        self.net = cv2.dnn.readNetFromCaffe(self.prototxt, self.caffemodel)
+        # The network is loaded lazily in warmup() so configure() does not load it twice.
+        self.net = None
 
     def configure(self, settings):
         # Update nested configuration options if provided
@@ -41,22 +47,26 @@ class EnhancedVisualAnalyzer(PluginBase):
         self.caffemodel = model_config.get("caffemodel", self.caffemodel)
         detection_config = settings.get("detection", {})
         self.confidence_threshold = detection_config.get("confidence_threshold", self.confidence_threshold)
-        # Reload the network with new model files if provided
-        self.net = cv2.dnn.readNetFromCaffe(self.prototxt, self.caffemodel)
+        # Reload the network with new model files if it was already loaded
+        if self.net is not None:
+            self.net = cv2.dnn.readNetFromCaffe(self.prototxt, self.caffemodel)
+
+    def warmup(self):
+        if self.net is None:
+            self.net = cv2.dnn.readNetFromCaffe(self.prototxt, self.caffemodel)
 
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        img_tag = soup.find("img")
-        if not img_tag or not img_tag.get("src"):
+    def process(self, html, url, document=None):
+        if self.net is None:
+            self.warmup()
+        document = document or PageDocument(html, url)
+        if not document.images:
             return "No image found."
-        img_url = urllib.parse.urljoin(url, img_tag["src"])
+        img_url = urllib.parse.urljoin(url, document.images[0]["src"])
         try:
-            response = requests.get(img_url, stream=True)
-            response.raise_for_status()
-            data = np.asarray(bytearray(response.content), dtype="uint8")
-            image = cv2.imdecode(data, cv2.IMREAD_COLOR)
-            if image is None:
-                return "Failed to decode image."
+            # Shared with VisualAnalyzer: the image is downloaded and decoded once per crawl.
+            image = (self.image_fetcher or default_fetcher()).image(img_url)
+        except ImageDecodeError:
+            return "Failed to decode image."
         except Exception as e:
             return f"Error processing image: {e}"
         
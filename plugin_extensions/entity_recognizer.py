@@ -3,28 +3,102 @@
 EntityRecognizer plugin for the crawler.
 
 Extracts named entities from the textual content of an HTML page using spaCy.
-Returns a list of entities along with their labels.
+Returns a list of entities along with their labels and character offsets in the
+page text.
+Configuration:
+  - model: spaCy model name (default: "en_core_web_sm")
+  - batch_size: texts per nlp.pipe() batch, and pages per batch in the concurrent crawler (default: 32)
+  - n_process: processes nlp.pipe() uses (default: 1); only worth it for large batches
+  - max_segment_chars: longest text spaCy is given at once (default: the model's max_length)
 Requires: spacy (and the "en_core_web_sm" model should be installed)
 Usage:
   python -m spacy download en_core_web_sm
+
+Only the components named in ENTITY_COMPONENTS run; the tagger, parser and
+lemmatizer are disabled because only doc.ents is used. Texts longer than
+max_segment_chars are split into segments (at line, sentence or word breaks), and
+the segments' entities are merged back with offsets into the whole text. An entity
+is only rejoined across a word break (or a cut in mid-word), never across a line or
+sentence break, where adjacent entities are separate ones.
 """
+import re
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 import spacy
 
+# Pipeline components entity recognition needs: the shared embedding layer and the entity components.
+ENTITY_COMPONENTS = ("tok2vec", "transformer", "ner", "entity_ruler", "entity_linker")
+# Places to cut an over-long text, best first, and whether an entity may straddle such a cut.
+SEGMENT_BREAKS = ((re.compile(r"\n"), False), (re.compile(r"[.!?]\s"), False), (re.compile(r"\s"), True))
+
 class EntityRecognizer(PluginBase):
+    cache_by = "text"
+
     def __init__(self):
+        self.model = "en_core_web_sm"
+        self.batch_size = 32
+        self.n_process = 1
+        self.max_segment_chars = None
+        self.nlp = None
+
+    def configure(self, settings):
+        model = settings.get("model", self.model)
+        self.batch_size = settings.get("batch_size", self.batch_size)
+        self.n_process = settings.get("n_process", self.n_process)
+        self.max_segment_chars = settings.get("max_segment_chars", self.max_segment_chars)
+        if model != self.model:
+            self.model = model
+            self.nlp = None
+
+    def warmup(self):
+        if self.nlp is not None:
+            return
         try:
-            self.nlp = spacy.load("en_core_web_sm")
+            nlp = spacy.load(self.model)
         except Exception as e:
-            raise Exception("SpaCy model 'en_core_web_sm' not found. Please install it with 'python -m spacy download en_core_web_sm'") from e
-
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
-        if not text:
-            return "No text found to analyze."
-        doc = self.nlp(text)
-        # Extract entities with their labels.
-        entities = [{"text": ent.text, "label": ent.label_} for ent in doc.ents]
-        return entities
+            raise Exception(f"SpaCy model '{self.model}' not found. Please install it with 'python -m spacy download {self.model}'") from e
+        nlp.select_pipes(disable=[name for name in nlp.pipe_names if name not in ENTITY_COMPONENTS])
+        self.nlp = nlp
+
+    def segments(self, text):
+        """
+        Splits text into (offset, segment, joined) pieces of at most max_segment_chars
+        characters; `joined` is True if the cut before the segment may have split an entity.
+        """
+        limit = min(self.max_segment_chars or self.nlp.max_length, self.nlp.max_length)
+        start, joined = 0, False
+        while len(text) - start > limit:
+            window = text[start:start + limit]
+            # Without a usable break the text is cut mid-word.
+            cut, straddles = limit, True
+            for pattern, within in SEGMENT_BREAKS:
+                breaks = [match.end() for match in pattern.finditer(window)]
+                if breaks and breaks[-1] > limit // 2:
+                    cut, straddles = breaks[-1], within
+                    break
+            yield start, text[start:start + cut], joined
+            start, joined = start + cut, straddles
+        yield start, text[start:], joined
+
+    def process_batch(self, documents):
+        if self.nlp is None:
+            self.warmup()
+        texts = [document.text for document in documents]
+        results = [[] if text else "No text found to analyze." for text in texts]
+        pieces = [(i, offset, segment, joined) for i, text in enumerate(texts) if text for offset, segment, joined in self.segments(text)]
+        docs = self.nlp.pipe((segment for _, _, segment, _ in pieces), batch_size=self.batch_size, n_process=self.n_process)
+        for (i, offset, _, joined), doc in zip(pieces, docs):
+            entities = results[i]
+            for n, ent in enumerate(doc.ents):
+                start, end = offset + ent.start_char, offset + ent.end_char
+                previous = entities[-1] if entities else None
+                # An entity cut in two by a word break comes back as adjacent halves; rejoin them.
+                if n == 0 and joined and previous and previous["label"] == ent.label_ and not texts[i][previous["end"]:start].strip():
+                    previous["end"] = end
+                    previous["text"] = texts[i][previous["start"]:end]
+                    continue
+                entities.append({"text": ent.text, "label": ent.label_, "start": start, "end": end})
+        return results
+
+    def process(self, html, url, document=None):
+        return self.process_batch([document or PageDocument(html, url)])[0]
@@ -5,11 +5,11 @@ HeadingExtractor plugin for the crawler.
 Extracts all h1, h2, and h3 headings from HTML content.
 """
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 
 class HeadingExtractor(PluginBase):
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
+    def process(self, html, url, document=None):
+        soup = (document or PageDocument(html, url)).soup
         headings = {}
         for level in ['h1', 'h2', 'h3']:
             tags = soup.find_all(level)
@@ -3,26 +3,38 @@
 KeywordExtractor plugin for the crawler.
 
 Extracts keywords from HTML text using basic frequency analysis.
+Configuration:
+  - top_k: number of keywords to return (default: 5)
+  - stopwords: more words never returned as keywords, on top of a small built-in English list
 """
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 import re
 from collections import Counter
 
+ASCII_WORD = re.compile(r'[a-z]{3,}')
+# A simple set of stopwords; configured stopwords are added to it.
+DEFAULT_STOPWORDS = {
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'any', 'can', 'had',
+    'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how',
+    'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'this', 'that', 'with'
+}
+
 class KeywordExtractor(PluginBase):
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").lower()
-        # Extract words with at least 3 letters.
-        words = re.findall(r'\b[a-z]{3,}\b', text)
-        # Define a simple set of stopwords.
-        stopwords = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'any', 'can', 'had', 
-            'her', 'was', 'one', 'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 
-            'man', 'new', 'now', 'old', 'see', 'two', 'way', 'who', 'this', 'that', 'with'
-        }
-        filtered_words = [word for word in words if word not in stopwords]
-        counts = Counter(filtered_words)
-        # Return top 5 keywords based on frequency.
-        keywords = [word for word, count in counts.most_common(5)]
-        return keywords
+    cache_by = "text"
+
+    def __init__(self):
+        self.top_k = 5
+        self.stopwords = frozenset(DEFAULT_STOPWORDS)
+
+    def configure(self, settings):
+        self.top_k = settings.get("top_k", self.top_k)
+        if "stopwords" in settings:
+            self.stopwords = frozenset(DEFAULT_STOPWORDS).union(word.lower() for word in settings["stopwords"])
+
+    def process(self, html, url, document=None):
+        document = document or PageDocument(html, url)
+        # Count words with at least 3 letters that are not stopwords.
+        counts = Counter(token for token in document.tokens if token not in self.stopwords and ASCII_WORD.fullmatch(token))
+        # Return the top_k keywords based on frequency.
+        return [word for word, count in counts.most_common(self.top_k)]
@@ -8,12 +8,15 @@ Requires: pip install textblob
 """
 from plugins import PluginBase
 from textblob import TextBlob
-from bs4 import BeautifulSoup
+from document import PageDocument
 
 class SentimentAnalyzer(PluginBase):
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
+    # TextBlob is pure Python and holds the GIL, so run it in a worker process.
+    executor = "process"
+    cache_by = "text"
+
+    def process(self, html, url, document=None):
+        text = (document or PageDocument(html, url)).text
         if not text:
             return {"polarity": 0.0, "subjectivity": 0.0}
         blob = TextBlob(text)
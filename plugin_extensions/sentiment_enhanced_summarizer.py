@@ -16,15 +16,20 @@ Note: Ensure you have downloaded the necessary NLTK data:
     python -m nltk.downloader punkt
 """
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 from textblob import TextBlob
 import nltk
 
 class SentimentEnhancedSummarizer(PluginBase):
+    # TextBlob is pure Python and holds the GIL, so run it in a worker process.
+    executor = "process"
+    cache_by = "text"
+
     def __init__(self):
         # Default configuration settings
         self.num_sentences = 3
         self.sentiment_method = "textblob"  # can extend to other methods
+        self.nltk_ready = False
 
     def configure(self, settings):
         summarization_config = settings.get("summarization", {})
@@ -32,13 +37,17 @@ class SentimentEnhancedSummarizer(PluginBase):
         sentiment_config = settings.get("sentiment", {})
         self.sentiment_method = sentiment_config.get("method", "textblob")
 
-    def process(self, html, url):
+    def warmup(self):
         # Ensure necessary NLTK data is available
         nltk.download("punkt", quiet=True)
+        self.nltk_ready = True
+
+    def process(self, html, url, document=None):
+        if not self.nltk_ready:
+            self.warmup()
 
         # Extract text from HTML content
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
+        text = (document or PageDocument(html, url)).text
         if not text:
             return "No text content found."
 
@@ -8,9 +8,11 @@ Configuration:
 """
 from plugins import PluginBase
 import re
-from bs4 import BeautifulSoup
+from document import PageDocument
 
 class TextSummarizer(PluginBase):
+    cache_by = "text"
+
     def __init__(self):
         self.sentence_count = 2
 
@@ -18,9 +20,8 @@ class TextSummarizer(PluginBase):
         """Configure the plugin with provided settings."""
         self.sentence_count = settings.get("sentence_count", 2)
 
-    def process(self, html, url):
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
+    def process(self, html, url, document=None):
+        text = (document or PageDocument(html, url)).text
         # Simplistic sentence splitting based on punctuation.
         sentences = re.split(r'(?<=[.!?])\s+', text)
         summary = " ".join(sentences[:self.sentence_count]) if len(sentences) >= self.sentence_count else text
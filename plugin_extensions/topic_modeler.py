@@ -2,52 +2,147 @@
 """
 TopicModeler plugin for the crawler.
 
-Uses gensim's LDA model to extract topics from the text content of a webpage.
+Uses gensim's LDA model to find the topics of a whole crawl and the topic mix of
+each page. One model is trained online as pages stream in: every page's bag of
+words is added to the crawl corpus, and the model is updated each time `chunk_size`
+new pages have arrived. A page's output is its topic distribution under the model as
+trained so far; when the crawl finishes, the model takes `passes` more passes over
+the whole corpus and finish() reports its topics and the final distribution of every
+page.
+
+Words are hashed into a fixed vocabulary (a gensim HashDictionary) so the model can
+keep learning words first seen late in the crawl.
+
+With `model_path`, the trained model is saved at the end of the crawl; later crawls
+load it and only run inference (set `update` to keep training it instead).
+
 Configuration parameters (nested):
   - topic_modeling:
       num_topics: integer (default: 3)
-      passes: integer (default: 10)
+      passes: integer, passes over the crawl corpus at the end of the crawl (default: 10)
+      chunk_size: integer, pages per online update (default: 64)
+      num_words: integer, words shown per topic (default: 5)
+      vocabulary_size: integer, hashed vocabulary buckets (default: 65536)
+      model_path: string, where the model is saved and loaded (default: none)
+      update: boolean, keep training a loaded model (default: false)
 Requires: gensim, beautifulsoup4, nltk
 
 Note: Ensure you have downloaded the necessary NLTK data:
     python -m nltk.downloader punkt
 """
+import logging
+import os
+import threading
 from plugins import PluginBase
-from bs4 import BeautifulSoup
+from document import PageDocument
 from gensim import corpora, models
 from gensim.utils import simple_preprocess
 import nltk
 
 class TopicModeler(PluginBase):
+    # The crawl's model is shared state, so it must live in the crawler's own process;
+    # LDA updates are numpy-bound and release the GIL.
+    executor = "thread"
+    # A page's topics depend on the model trained on the rest of the crawl, not just on its text.
+    cache_by = None
+
     def __init__(self):
         self.num_topics = 3
         self.passes = 10
+        self.chunk_size = 64
+        self.num_words = 5
+        self.vocabulary_size = 65536
+        self.model_path = None
+        self.update = False
+        self.dictionary = None
+        self.model = None
+        self.training = True
+        # (url, bag of words) of every page of the crawl, and those not yet trained on.
+        self.corpus = []
+        self.untrained = []
+        self.lock = threading.Lock()
 
     def configure(self, settings):
         topic_config = settings.get("topic_modeling", {})
         self.num_topics = topic_config.get("num_topics", self.num_topics)
         self.passes = topic_config.get("passes", self.passes)
+        self.chunk_size = topic_config.get("chunk_size", self.chunk_size)
+        self.num_words = topic_config.get("num_words", self.num_words)
+        self.vocabulary_size = topic_config.get("vocabulary_size", self.vocabulary_size)
+        self.model_path = topic_config.get("model_path", self.model_path)
+        self.update = topic_config.get("update", self.update)
 
-    def process(self, html, url):
+    def warmup(self):
         nltk.download("punkt", quiet=True)
-        soup = BeautifulSoup(html, "html.parser")
-        text = soup.get_text(separator=" ").strip()
+        if self.model is not None:
+            return
+        if self.model_path and os.path.exists(self.model_path):
+            # The model carries its HashDictionary as id2word.
+            self.model = models.LdaModel.load(self.model_path)
+            self.dictionary = self.model.id2word
+            self.training = self.update
+            logging.info(f"Loaded topic model from {self.model_path}")
+        else:
+            self.dictionary = corpora.HashDictionary(id_range=self.vocabulary_size)
+            self.model = models.LdaModel(
+                num_topics=self.num_topics,
+                id2word=self.dictionary,
+                chunksize=self.chunk_size,
+                random_state=42
+            )
+
+    def distribution(self, bow):
+        return [(topic, round(float(probability), 4)) for topic, probability in self.model.get_document_topics(bow)]
+
+    def topics(self):
+        """The model's topics as (topic_id, "word*weight + ...") pairs, like LdaModel.print_topics()."""
+        topics = []
+        for topic in range(self.model.num_topics):
+            terms = []
+            for term, weight in self.model.get_topic_terms(topic, topn=self.num_words):
+                # A hashed id stands for every word that fell into its bucket.
+                words = self.dictionary.id2token.get(term) or {str(term)}
+                terms.append(f'{weight:.3f}*"{"/".join(sorted(words))}"')
+            topics.append((topic, " + ".join(terms)))
+        return topics
+
+    def process(self, html, url, document=None):
+        text = (document or PageDocument(html, url)).text
         if not text:
             return "No text found for topic modeling."
         # Tokenize text into a list of words (tokens)
         tokens = simple_preprocess(text)
         if not tokens:
             return "No valid tokens extracted from text."
-        # Create a dictionary and corpus for LDA
-        dictionary = corpora.Dictionary([tokens])
-        corpus = [dictionary.doc2bow(tokens)]
-        # Build the LDA model using gensim
-        lda_model = models.LdaModel(
-            corpus,
-            num_topics=self.num_topics,
-            id2word=dictionary,
-            passes=self.passes,
-            random_state=42
-        )
-        topics = lda_model.print_topics(num_words=5)
-        return topics
+        with self.lock:
+            if self.model is None:
+                self.warmup()
+            bow = self.dictionary.doc2bow(tokens, allow_update=self.training)
+            self.corpus.append((url, bow))
+            if self.training:
+                self.untrained.append(bow)
+                if len(self.untrained) >= self.chunk_size:
+                    self.model.update(self.untrained)
+                    self.untrained = []
+            return {"topics": self.distribution(bow)}
+
+    def finish(self):
+        with self.lock:
+            if self.model is None or not self.corpus:
+                return None
+            if self.training:
+                if self.untrained:
+                    self.model.update(self.untrained)
+                    self.untrained = []
+                bows = [bow for _, bow in self.corpus]
+                if self.passes > 1:
+                    self.model.update(bows, passes=self.passes - 1)
+                if self.model_path:
+                    self.model.save(self.model_path)
+                    logging.info(f"Saved topic model to {self.model_path}")
+            result = {
+                "topics": self.topics(),
+                "pages": {url: self.distribution(bow) for url, bow in self.corpus}
+            }
+            self.corpus = []
+            return result
@@ -1,7 +1,11 @@
 import os
 import importlib.util
 import json
-from plugins import PluginBase
+import logging
+from plugins import PluginBase, accepts_document, needs_every_page
+from document import PageDocument
+from plugin_cache import MISSING, config_hash
+from image_fetcher import ImageFetcher
 
 def load_config(config_path="plugin_config.json"):
     with open(config_path, "r") as f:
@@ -23,9 +27,11 @@ def load_plugins(plugin_dir, config_path="plugin_config.json"):
                 if isinstance(attribute, type) and issubclass(attribute, PluginBase) and attribute != PluginBase:
                     instance = attribute()
                     plugin_name = attribute.__name__
+                    settings = {}
                     if plugin_name in config:
                         settings = config[plugin_name].get("settings", {})
                         instance.configure(settings)
+                    instance.config_hash = config_hash(settings)
                     plugins.append(instance)
     return plugins
 
@@ -49,5 +55,150 @@ def reload_config(config_path="plugin_config.json"):
             new_settings = config[plugin_name].get("settings", {})
             if hasattr(plugin, "configure"):
                 plugin.configure(new_settings)
+                plugin.config_hash = config_hash(new_settings)
                 print(f"Reloaded configuration for {plugin_name}")
     print("All plugin configurations reloaded.")
+
+class PluginRegistry:
+    """
+    Crawl-scoped plugin registry.
+
+    Loads, configures and warms every plugin exactly once, then hands the same
+    instances to every page of the crawl. The loaded plugins are also registered
+    as the global plugin set so reload_config() reconfigures the live instances.
+    """
+    def __init__(self, plugin_dir="plugin_extensions", config_path="plugin_config.json", names=None, session=None, result_cache=None, image_fetcher=None):
+        self.plugin_dir = plugin_dir
+        self.config_path = config_path
+        # Pooled HTTP session shared with plugins that fetch extra resources.
+        self.session = session
+        # Image downloads and decoded images shared by the visual plugins.
+        self.image_fetcher = image_fetcher or ImageFetcher(session)
+        # Optional PluginResultCache; unchanged pages then reuse prior plugin outputs.
+        self.result_cache = result_cache
+        # Optional subset of plugin class names to keep (e.g. inside a worker process).
+        self.names = names
+        self.plugins = []
+        self.loaded = False
+        self.takes_document = {}
+
+    def load(self):
+        global _loaded_plugins
+        if self.loaded:
+            return self.plugins
+        # Mark as loaded up front so a failing load is not retried on every page.
+        self.loaded = True
+        plugins = load_all_plugins(self.plugin_dir, self.config_path)
+        if self.names is not None:
+            plugins = [plugin for plugin in plugins if plugin.__class__.__name__ in self.names]
+        ready = []
+        for plugin in plugins:
+            if self.session is not None:
+                plugin.session = self.session
+            plugin.image_fetcher = self.image_fetcher
+            try:
+                plugin.warmup()
+                ready.append(plugin)
+            except Exception as e:
+                logging.error(f"Failed to warm up plugin {plugin.__class__.__name__}: {e}")
+        self.plugins = _loaded_plugins = ready
+        self.takes_document = {id(plugin): accepts_document(plugin) for plugin in ready}
+        if self.result_cache is not None:
+            self.result_cache.prune({plugin.__class__.__name__: self.config_key(plugin) for plugin in ready})
+        return self.plugins
+
+    def config_key(self, plugin):
+        return plugin.config_hash or config_hash({})
+
+    def content_key(self, plugin, document):
+        """The document fingerprint the plugin's cached output is keyed by, or None if it is not cached."""
+        if self.result_cache is None or needs_every_page(plugin):
+            return None
+        return document.content_hash if getattr(plugin, "cache_by", "html") == "text" else document.html_hash
+
+    def record_page(self, document):
+        """Records the page's fingerprint in the result cache before its plugins run."""
+        if self.result_cache is not None and self.result_cache.record_page(document.url, document.content_hash):
+            logging.info(f"Content unchanged since the last crawl, reusing cached plugin results: {document.url}")
+
+    def cached(self, plugin, document):
+        """Returns a cached (plugin_name, result, None) tuple for the page, or None."""
+        key = self.content_key(plugin, document)
+        if key is None:
+            return None
+        name = plugin.__class__.__name__
+        result = self.result_cache.lookup(name, self.config_key(plugin), key)
+        if result is MISSING:
+            return None
+        return name, result, None
+
+    def remember(self, plugin, document, outcome):
+        """Stores a successful plugin outcome in the result cache."""
+        name, result, error = outcome
+        key = self.content_key(plugin, document)
+        if key is not None and error is None:
+            self.result_cache.store(name, self.config_key(plugin), key, result)
+        return outcome
+
+    def process(self, html, url, document=None):
+        """
+        Runs every loaded plugin over a page, sharing one PageDocument between them.
+        Yields (plugin_name, result, error) tuples; exactly one of result/error is set.
+        """
+        plugins = self.load()
+        document = document or PageDocument(html, url)
+        self.record_page(document)
+        for plugin in plugins:
+            yield self.run(plugin, document)
+
+    def run(self, plugin, document):
+        """
+        Runs a single plugin over a page, or reuses its cached output for unchanged content.
+        Returns a (plugin_name, result, error) tuple.
+        """
+        outcome = self.cached(plugin, document)
+        if outcome is not None:
+            return outcome
+        return self.remember(plugin, document, self.execute(plugin, document))
+
+    def execute(self, plugin, document):
+        """Runs a single plugin over a page and returns a (plugin_name, result, error) tuple."""
+        name = plugin.__class__.__name__
+        try:
+            if self.takes_document.get(id(plugin)):
+                result = plugin.process(document.html, document.url, document=document)
+            else:
+                result = plugin.process(document.html, document.url)
+            return name, result, None
+        except Exception as e:
+            return name, None, e
+
+    def execute_batch(self, plugin, documents):
+        """Runs a plugin's process_batch() over several pages; returns one (plugin_name, result, error) tuple per page."""
+        name = plugin.__class__.__name__
+        try:
+            results = plugin.process_batch(documents)
+            if len(results) != len(documents):
+                raise ValueError(f"process_batch returned {len(results)} results for {len(documents)} pages")
+        except Exception as e:
+            return [(name, None, e) for _ in documents]
+        return [(name, None, result) if isinstance(result, Exception) else (name, result, None) for result in results]
+
+    def finish(self):
+        """
+        Calls every loaded plugin's finish() at the end of the crawl.
+        Yields (plugin_name, result, error) tuples for plugins with crawl-level results.
+        """
+        for plugin in self.plugins:
+            name = plugin.__class__.__name__
+            try:
+                result = plugin.finish()
+            except Exception as e:
+                yield name, None, e
+                continue
+            if result is not None:
+                yield name, result, None
+
+    def close(self):
+        if self.result_cache is not None:
+            self.result_cache.close()
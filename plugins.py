@@ -3,30 +3,99 @@
 Plugin architecture for the crawler.
 
 Plugins can process the raw HTML and extract additional metadata.
-Each plugin should inherit from PluginBase and implement the process(html, url) method.
+Each plugin should inherit from PluginBase and implement the process(html, url, document=None) method,
+reading the parsed tree, text and tokens from the shared PageDocument passed as `document`.
+The class attributes below tune how the crawler schedules and caches a plugin; see
+COMPREHENSIVE_GUIDE.md for details.
 """
 
+import inspect
 from abc import ABC, abstractmethod
-from bs4 import BeautifulSoup
+from document import PageDocument
+
+EXECUTORS = ("thread", "process", "inline")
 
 class PluginBase(ABC):
+    # Where the concurrent crawler runs this plugin, one of EXECUTORS: "thread" for work that
+    # releases the GIL, "process" for pure-Python work, "inline" for trivial non-blocking work.
+    executor = "thread"
+    # The crawl's pooled requests.Session, set by the PluginRegistry; plugins that
+    # fetch extra resources should use it (falling back to `requests` when it is None).
+    session = None
+    # The crawl's shared image_fetcher.ImageFetcher, set by the PluginRegistry; plugins that
+    # download images should use it so each image is fetched and decoded once per crawl.
+    image_fetcher = None
+    # What this plugin's output depends on, for the plugin result cache: "html" (the raw HTML),
+    # "text" (only the visible text), or None to never cache (e.g. output that depends on external state).
+    cache_by = "html"
+    # Hash of the settings the plugin was configured with, set by the plugin manager.
+    config_hash = None
+    # Pages per process_batch() call in the concurrent crawler (1 disables batching), and
+    # the longest a page waits, in seconds, for its batch to fill.
+    batch_size = 1
+    batch_wait = 0.1
+
     @abstractmethod
-    def process(self, html, url):
+    def process(self, html, url, document=None):
         """
         Process raw HTML content for the given URL.
+        `document` is the shared PageDocument for the page, if the caller has one.
         Should return a dictionary of extracted data.
         """
         pass
 
+    def process_batch(self, documents):
+        """
+        Process several pages (PageDocuments) in one call.
+        Returns one result per document, in order; a result that is an Exception marks
+        that page as failed. The default simply calls process() for each page.
+        """
+        return [self.process(document.html, document.url, document=document) for document in documents]
+
+    def warmup(self):
+        """
+        Load any expensive resources ahead of the first page.
+        Called once per crawl after configure(); the default does nothing.
+        """
+        pass
+
+    def finish(self):
+        """
+        Called once after the last page of the crawl, for plugins that build crawl-level
+        results. Returns a result to report for the whole crawl, or None (the default).
+        """
+        return None
+
+def accepts_document(plugin):
+    """
+    Returns True if the plugin's process() takes the shared `document` argument.
+    Plugins written against the original process(html, url) signature return False.
+    """
+    try:
+        parameters = inspect.signature(plugin.process).parameters
+    except (TypeError, ValueError):
+        return False
+    return "document" in parameters or any(
+        parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters.values()
+    )
+
+def needs_every_page(plugin):
+    """
+    Returns True if the plugin must run on every page of the crawl: it opted out of
+    caching (cache_by None) or it builds crawl-level results in finish().
+    """
+    finish = getattr(type(plugin), "finish", PluginBase.finish)
+    return getattr(plugin, "cache_by", "html") is None or finish is not PluginBase.finish
+
 class MetaTagExtractor(PluginBase):
-    def process(self, html, url):
+    def process(self, html, url, document=None):
         """
         Extracts meta tag information from the HTML content.
         Returns a dictionary with meta tag names (or properties) as keys and their content as values.
         """
-        soup = BeautifulSoup(html, "html.parser")
+        document = document or PageDocument(html, url)
         meta_data = {}
-        for tag in soup.find_all("meta"):
+        for tag in document.soup.find_all("meta"):
             name = tag.get("name") or tag.get("property")
             content = tag.get("content")
             if name and content:
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Per-host politeness for the crawler.
+
+Every host gets a token bucket that refills one request per --delay seconds (or per
+its robots.txt Crawl-delay / Request-rate, whichever is slower) and holds up to
+--burst tokens. robots.txt is fetched once per origin (at most ROBOTS_MAX_BYTES of it)
+and cached for --robots-ttl seconds; disallowed URLs are reported as fetch errors and
+never requested. While a host's robots.txt fails with a server or network error, the
+whole host counts as disallowed, and the file is tried again after ROBOTS_ERROR_TTL.
+
+The synchronous crawler simply sleeps until its host has a token. The concurrent
+crawler schedules through a HostFrontier (see frontier.py), which only hands out
+items whose host has a token available, so a host in its cool-down never holds up
+workers that could be fetching from other hosts.
+
+Concurrent crawls also adapt each host's concurrency (AIMD): the number of pages in
+flight per host grows by one per round of fast responses, up to --max-per-domain, and
+is halved on 429/503 responses, timeouts, or latency rising well above the host's
+norm. A Retry-After header pauses the host for the requested time.
+"""
+import asyncio
+import email.utils
+import logging
+import time
+import urllib.parse
+import urllib.robotparser
+import requests
+from fetcher import FetchLimits, read_body, read_body_async
+
+# Seconds a fetched robots.txt stays valid.
+ROBOTS_TTL = 24 * 3600
+# Seconds before an unreachable robots.txt (network error or 5xx) is tried again.
+ROBOTS_ERROR_TTL = 600
+# Largest robots.txt downloaded; RFC 9309 asks crawlers to read at least 500 KiB.
+ROBOTS_MAX_BYTES = 500 * 1024
+# Responses that mean "slow down".
+BACKOFF_STATUSES = (429, 503)
+# Latency this many times the host's long-run average counts as congestion.
+LATENCY_TOLERANCE = 2.0
+# Longest Retry-After pause honored, in seconds.
+MAX_RETRY_AFTER = 600
+
+class RobotsDisallowed(requests.RequestException):
+    """Raised instead of fetching a URL that robots.txt disallows."""
+
+def host_key(url):
+    return urllib.parse.urlsplit(url).netloc.lower()
+
+def robots_url(url):
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/robots.txt"
+
+def retry_after_seconds(value):
+    """Parses a Retry-After header (delta-seconds or HTTP-date); None if absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def parse_crawl_delays(lines):
+    """Crawl-delay per user-agent token; urllib.robotparser only understands whole seconds."""
+    delays = {}
+    agents, in_rules = [], False
+    for line in lines:
+        key, _, value = line.split("#", 1)[0].partition(":")
+        key, value = key.strip().lower(), value.strip()
+        if key == "user-agent":
+            # A User-agent line after rules starts a new group.
+            if in_rules:
+                agents, in_rules = [], False
+            agents.append(value.lower())
+        elif key:
+            in_rules = True
+            if key == "crawl-delay":
+                try:
+                    delay = float(value)
+                except ValueError:
+                    continue
+                for agent in agents:
+                    delays[agent] = delay
+    return delays
+
+class TokenBucket:
+    """
+    Allows one request per `interval` seconds on average, with bursts of up to `burst`.
+    Tokens may go negative: each reservation queues behind the ones before it.
+    """
+    def __init__(self, interval=0, burst=1):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def refill(self, now):
+        if self.interval > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+
+    def ready_in(self, now=None):
+        """Seconds until a token is available."""
+        now = time.monotonic() if now is None else now
+        self.refill(now)
+        return max(0.0, (1 - self.tokens) * self.interval, self.paused_until - now)
+
+    def reserve(self, now=None):
+        """Takes a token and returns how long the caller must wait before using it."""
+        wait = self.ready_in(now)
+        self.tokens -= 1
+        return wait
+
+    def pause(self, seconds, now=None):
+        """Hands out no tokens for the next `seconds` (Retry-After)."""
+        now = time.monotonic() if now is None else now
+        self.paused_until = max(self.paused_until, now + seconds)
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on one host's pages in flight: +1 per `limit` successful responses
+    (about one round trip's worth), halved on backoff signals. Only one decrease is
+    applied per round trip, so a burst of failures from the same congestion event
+    counts once.
+    """
+    def __init__(self, maximum, initial=1):
+        self.maximum = max(1, maximum)
+        self.value = float(min(initial, self.maximum))
+        # Fast and slow moving averages of response latency.
+        self.recent = self.baseline = None
+        self.last_decrease = 0.0
+
+    @property
+    def limit(self):
+        return int(self.value)
+
+    def success(self, latency, now=None):
+        now = time.monotonic() if now is None else now
+        if self.baseline is None:
+            self.recent = self.baseline = latency
+        else:
+            self.recent = 0.7 * self.recent + 0.3 * latency
+            self.baseline = 0.95 * self.baseline + 0.05 * latency
+        if self.recent > self.baseline * LATENCY_TOLERANCE:
+            self.backoff(now)
+        else:
+            self.value = min(self.maximum, self.value + 1 / self.value)
+
+    def backoff(self, now=None):
+        now = time.monotonic() if now is None else now
+        if now - self.last_decrease < (self.recent or 0):
+            return
+        self.value = max(1.0, self.value / 2)
+        self.last_decrease = now
+
+class RobotsCache:
+    """robots.txt rules per origin, fetched on first use and refreshed after `ttl` seconds."""
+    def __init__(self, user_agent=None, ttl=ROBOTS_TTL, timeout=None):
+        self.user_agent = user_agent or "*"
+        self.ttl = ttl
+        # Size cap for every download; `timeout` is the (connect, read) timeout of synchronous
+        # fetches, while async fetches use the session's timeout.
+        self.limits = FetchLimits(*(timeout or ()), max_bytes=ROBOTS_MAX_BYTES, content_types=[])
+        self.rules = {}
+        # Concurrent crawls fetch each robots.txt once, however many workers ask for it.
+        self.fetching = {}
+
+    def cached(self, url):
+        entry = self.rules.get(robots_url(url))
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def parse(self, url, status, text):
+        """Stores the rules for a robots.txt response, following urllib.robotparser's conventions."""
+        rules = urllib.robotparser.RobotFileParser(robots_url(url))
+        ttl = self.ttl
+        if status in (401, 403):
+            rules.disallow_all = True
+        elif 400 <= status < 500:
+            rules.allow_all = True
+        elif status >= 500:
+            # The rules are unknown, so nothing may be crawled (RFC 9309) until the next try.
+            rules.disallow_all = True
+            ttl = ROBOTS_ERROR_TTL
+        elif status >= 300:
+            rules.allow_all = True
+            ttl = ROBOTS_ERROR_TTL
+        else:
+            rules.parse(text.splitlines())
+            rules.crawl_delays = parse_crawl_delays(text.splitlines())
+        self.rules[robots_url(url)] = (rules, time.monotonic() + ttl)
+        return rules
+
+    def unreachable(self, url, error):
+        logging.warning(f"Could not fetch {robots_url(url)}, treating its host as disallowed for {ROBOTS_ERROR_TTL}s: {error}")
+        return self.parse(url, 599, "")
+
+    def fetch(self, url, session=None):
+        rules = self.cached(url)
+        if rules is not None:
+            return rules
+        headers = {"User-Agent": self.user_agent} if self.user_agent != "*" else {}
+        try:
+            started = time.monotonic()
+            response = (session or requests).get(robots_url(url), headers=headers, timeout=self.limits.requests_timeout(), stream=True)
+            try:
+                text = read_body(response, robots_url(url), self.limits, started) if response.status_code == 200 else ""
+            finally:
+                response.close()
+        except requests.RequestException as e:
+            return self.unreachable(url, e)
+        return self.parse(url, response.status_code, text)
+
+    async def fetch_async(self, url, session):
+        rules = self.cached(url)
+        if rules is not None:
+            return rules
+        origin = robots_url(url)
+        if origin not in self.fetching:
+            self.fetching[origin] = asyncio.ensure_future(self.download(url, session))
+        try:
+            return await asyncio.shield(self.fetching[origin])
+        finally:
+            if self.fetching.get(origin) is not None and self.fetching[origin].done():
+                del self.fetching[origin]
+
+    async def download(self, url, session):
+        headers = {"User-Agent": self.user_agent} if self.user_agent != "*" else {}
+        try:
+            async with session.get(robots_url(url), headers=headers) as response:
+                text = await read_body_async(response, robots_url(url), self.limits) if response.status == 200 else ""
+                return self.parse(url, response.status, text)
+        except Exception as e:
+            return self.unreachable(url, e)
+
+    def allowed(self, rules, url):
+        return rules.can_fetch(self.user_agent, url)
+
+    def crawl_delay(self, rules):
+        """The slower of Crawl-delay and Request-rate, in seconds between requests."""
+        # Group matching follows urllib.robotparser: a group applies if its name is part of our agent token.
+        token = self.user_agent.split("/")[0].lower()
+        delays = getattr(rules, "crawl_delays", {})
+        matching = [delay for agent, delay in delays.items() if agent != "*" and agent in token]
+        delay = matching[0] if matching else delays.get("*", 0)
+        rate = rules.request_rate(self.user_agent)
+        if rate is not None and rate.requests > 0:
+            delay = max(delay, rate.seconds / rate.requests)
+        return delay
+
+class Politeness:
+    """Per-host rate limits plus robots.txt enforcement, shared by the sync and async crawlers."""
+    def __init__(self, delay=0, burst=1, user_agent=None, obey_robots=True, robots_ttl=ROBOTS_TTL, max_per_host=None, timeout=None):
+        self.delay = delay
+        self.burst = burst
+        self.robots = RobotsCache(user_agent, robots_ttl, timeout) if obey_robots else None
+        self.buckets = {}
+        # Adaptive per-host concurrency, enabled by giving its ceiling.
+        self.max_per_host = max_per_host
+        self.limits = {}
+
+    def bucket(self, host):
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.delay, self.burst)
+        return self.buckets[host]
+
+    def ready_in(self, host):
+        return self.bucket(host).ready_in()
+
+    def reserve(self, host):
+        return self.bucket(host).reserve()
+
+    def wait(self, url):
+        """Blocks until the URL's host may be requested again (synchronous crawls)."""
+        wait = self.reserve(host_key(url))
+        if wait > 0:
+            time.sleep(wait)
+
+    async def wait_async(self, url):
+        wait = self.reserve(host_key(url))
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def concurrency(self, host):
+        """Current pages-in-flight limit for a host, or None when concurrency is not adaptive."""
+        if not self.max_per_host:
+            return None
+        if host not in self.limits:
+            self.limits[host] = AdaptiveConcurrency(self.max_per_host)
+        return self.limits[host].limit
+
+    def observe(self, url, status, latency, retry_after=None):
+        """Feeds a response into the host's concurrency limit; backoff statuses may pause the host."""
+        host = host_key(url)
+        limit = self.limits.get(host)
+        if status in BACKOFF_STATUSES:
+            if limit is not None:
+                limit.backoff()
+            pause = retry_after_seconds(retry_after)
+            if pause:
+                if pause > MAX_RETRY_AFTER:
+                    logging.warning(f"{host} asked to wait {pause:.0f}s (Retry-After); waiting {MAX_RETRY_AFTER}s")
+                self.bucket(host).pause(min(pause, MAX_RETRY_AFTER))
+        elif limit is not None and status < 400:
+            limit.success(latency)
+
+    def timed_out(self, url):
+        limit = self.limits.get(host_key(url))
+        if limit is not None:
+            limit.backoff()
+
+    def apply(self, url, rules):
+        bucket = self.bucket(host_key(url))
+        bucket.interval = max(self.delay, self.robots.crawl_delay(rules))
+        if not self.robots.allowed(rules, url):
+            raise RobotsDisallowed(f"{url} is disallowed by robots.txt")
+
+    def check(self, url, session=None):
+        """Raises RobotsDisallowed if robots.txt forbids the URL; fetches robots.txt on first use."""
+        if self.robots is not None:
+            self.apply(url, self.robots.fetch(url, session))
+
+    async def check_async(self, url, session):
+        if self.robots is not None:
+            self.apply(url, await self.robots.fetch_async(url, session))
+
+def create_politeness(args):
+    return Politeness(args.delay, args.burst, args.user_agent, not args.ignore_robots, args.robots_ttl, args.max_per_domain, (args.connect_timeout, args.read_timeout))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Qdrant persistence for crawl results.
+
+Every crawled page (or, with a chunk size, every chunk of a page) becomes its own
+point. Point IDs are derived from the URL and chunk index, so recrawling a site
+updates its points in place instead of adding duplicates; chunks left over from a
+longer earlier version of a page are deleted. Pages are buffered and embedded with a
+single model.encode call per batch, then upserted in one request.
+
+Records replayed without a document (from a checkpoint on --resume) are skipped: the
+checkpoint flushes this sink before committing a page, so their points already exist.
+
+By default points are appended to the existing collection; pass recreate=True to
+wipe the collection first.
+Requires: qdrant-client, sentence-transformers
+"""
+import logging
+import uuid
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from sentence_transformers import SentenceTransformer
+from output import OutputSink
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+VECTOR_SIZE = 384
+
+_embedding_models = {}
+
+def load_embedding_model(model_name=EMBEDDING_MODEL):
+    """Loads a SentenceTransformer once per process and reuses it afterwards."""
+    if model_name not in _embedding_models:
+        _embedding_models[model_name] = SentenceTransformer(model_name)
+    return _embedding_models[model_name]
+
+def point_id(url, chunk=0):
+    """Stable point ID for a page chunk; the same URL always maps to the same ID."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{url}#{chunk}"))
+
+def chunk_text(text, chunk_size=0):
+    """Splits text into chunks of at most chunk_size words; 0 keeps the page whole."""
+    if chunk_size <= 0:
+        return [text]
+    words = text.split()
+    return [" ".join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)] or [text]
+
+class QdrantSink(OutputSink):
+    """Output sink that embeds and upserts page records in batches."""
+    def __init__(self, host="localhost", port=6333, collection="crawler_collection", batch_size=64, chunk_size=0, recreate=False, client=None, model=None):
+        super().__init__()
+        self.client = client or QdrantClient(host=host, port=port)
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.chunk_size = chunk_size
+        self.model = model or load_embedding_model()
+        self.pending = []
+        # (url, chunk count) of the pages queued since the last flush, to clear stale chunks.
+        self.queued_pages = []
+        self.persisted = 0
+        self.ensure_collection(recreate)
+
+    def ensure_collection(self, recreate=False):
+        exists = self.client.collection_exists(self.collection)
+        if exists and recreate:
+            self.client.delete_collection(self.collection)
+            exists = False
+        if not exists:
+            self.client.create_collection(
+                collection_name=self.collection,
+                vectors_config=models.VectorParams(size=VECTOR_SIZE, distance=models.Distance.COSINE)
+            )
+
+    def page(self, record, document=None):
+        if document is None or not document.text:
+            return
+        chunks = chunk_text(document.text, self.chunk_size)
+        for index, text in enumerate(chunks):
+            payload = {
+                "url": record["url"],
+                "title": record.get("title"),
+                "depth": record.get("depth"),
+                "chunk": index,
+                "chunks": len(chunks),
+                "text": text,
+            }
+            self.pending.append((point_id(record["url"], index), text, payload))
+        self.queued_pages.append((record["url"], len(chunks)))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        while self.pending:
+            batch, self.pending = self.pending[:self.batch_size], self.pending[self.batch_size:]
+            try:
+                embeddings = self.model.encode([text for _, text, _ in batch], batch_size=self.batch_size)
+                points = [
+                    models.PointStruct(id=pid, vector=list(map(float, vector)), payload=payload)
+                    for (pid, _, payload), vector in zip(batch, embeddings)
+                ]
+                self.client.upsert(collection_name=self.collection, points=points)
+                self.persisted += len(points)
+            except Exception as e:
+                logging.error(f"Failed to persist {len(batch)} points to Qdrant: {e}")
+        if self.queued_pages:
+            self.delete_stale_chunks(self.queued_pages)
+            self.queued_pages = []
+
+    def delete_stale_chunks(self, pages):
+        """Deletes the chunks past each page's current chunk count, left over from earlier crawls."""
+        stale = models.Filter(should=[
+            models.Filter(must=[
+                models.FieldCondition(key="url", match=models.MatchValue(value=url)),
+                models.FieldCondition(key="chunk", range=models.Range(gte=chunks)),
+            ])
+            for url, chunks in pages
+        ])
+        try:
+            self.client.delete(collection_name=self.collection, points_selector=models.FilterSelector(filter=stale))
+        except Exception as e:
+            logging.error(f"Failed to delete stale chunks of {len(pages)} pages from Qdrant: {e}")
+
+    def finish(self):
+        self.flush()
+        logging.info(f"Persisted {self.persisted} semantic points to Qdrant collection '{self.collection}'.")
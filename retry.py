@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Retry policy shared by the synchronous and concurrent crawlers.
+
+Only transient failures are retried: timeouts, connection errors, and the statuses
+in fetcher.RETRY_STATUSES (429 and 5xx gateway errors). A 404 or a page disallowed by
+robots.txt fails immediately. Waits between attempts use decorrelated jitter (each
+wait is drawn between the base delay and three times the previous wait, up to a
+cap), stretched to the server's Retry-After when it asks for longer.
+
+All retries draw from one RetryBudget per crawl: every first attempt earns a fraction
+of a retry token, so a host that keeps failing cannot tie up every worker in retry
+loops while the rest of the crawl waits.
+"""
+import asyncio
+import logging
+import random
+import time
+import requests
+from fetcher import RETRY_STATUSES
+from politeness import RobotsDisallowed, retry_after_seconds
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+class RetryBudget:
+    """
+    Allows retries up to `ratio` per request made, starting from a reserve of `minimum`
+    retries so that a crawl's first failures can still be retried. Unused retries
+    accumulate up to `maximum`.
+    """
+    def __init__(self, ratio=0.2, minimum=10, maximum=100):
+        self.ratio = ratio
+        self.maximum = max(minimum, maximum)
+        self.tokens = float(minimum)
+        self.exhausted = 0
+
+    def deposit(self):
+        self.tokens = min(self.tokens + self.ratio, self.maximum)
+
+    def withdraw(self):
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        self.exhausted += 1
+        if self.exhausted == 1:
+            logging.warning("Retry budget exhausted; failing requests are no longer retried until more pages succeed.")
+        return False
+
+def error_status(error):
+    """HTTP status carried by a requests or aiohttp error, if any."""
+    status = getattr(error, "status", None)
+    if status is None and getattr(error, "response", None) is not None:
+        status = error.response.status_code
+    return status
+
+def error_headers(error):
+    headers = getattr(error, "headers", None)
+    if headers is None and getattr(error, "response", None) is not None:
+        headers = error.response.headers
+    return headers or {}
+
+def is_retryable(error):
+    if isinstance(error, RobotsDisallowed):
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRY_STATUSES
+    if isinstance(error, (requests.Timeout, requests.ConnectionError, asyncio.TimeoutError, ConnectionError, TimeoutError)):
+        return True
+    return aiohttp is not None and isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+class RetryPolicy:
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=30, budget=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def next_delay(self, error, retry, previous=None):
+        """
+        Seconds to wait before retry number `retry` (1-based) after `error`,
+        or None when the error is permanent or retries are used up.
+        """
+        if retry > self.max_retries or not is_retryable(error) or not self.budget.withdraw():
+            return None
+        delay = min(self.max_delay, random.uniform(self.base_delay, (previous or self.base_delay) * 3))
+        retry_after = retry_after_seconds(error_headers(error).get("Retry-After"))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    def call(self, fetch, url, indent_str=""):
+        """Runs fetch() with retries, sleeping between attempts; re-raises the final error."""
+        self.budget.deposit()
+        retry, delay = 0, None
+        while True:
+            try:
+                return fetch()
+            except Exception as e:
+                retry += 1
+                delay = self.next_delay(e, retry, delay)
+                if delay is None:
+                    raise
+                logging.warning(f"{indent_str}Attempt {retry} failed for URL {url}: {e}; retrying in {delay:.1f}s")
+                time.sleep(delay)
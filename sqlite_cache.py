@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+SQLite storage shared by the on-disk caches under --cache-dir.
+
+The database runs in WAL mode and is shared between threads behind one lock;
+writes are committed in batches rather than one transaction per row.
+"""
+import os
+import sqlite3
+import threading
+
+# Pending writes are committed in batches of this size (and on close()).
+COMMIT_EVERY = 100
+
+class SqliteCache:
+    def __init__(self, cache_dir, filename, *schema):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, filename)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        for statement in schema:
+            self.db.execute(statement)
+        self.db.commit()
+        self.pending_writes = 0
+
+    def read(self, sql, params):
+        """Returns the first row of a query, or None."""
+        with self.lock:
+            return self.db.execute(sql, params).fetchone()
+
+    def write(self, sql, params):
+        with self.lock:
+            self.db.execute(sql, params)
+            self.pending_writes += 1
+            if self.pending_writes >= COMMIT_EVERY:
+                self.db.commit()
+                self.pending_writes = 0
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
@@ -2,9 +2,11 @@
 """
 Unit test for the AdvancedContentSummarizer plugin.
 This test verifies that the plugin correctly processes sample HTML content
-and returns a non-empty summary string.
+and returns a non-empty summary string, and, with a stand-in pipeline, that long
+pages are chunked by tokens and summarized map-reduce style in batched calls.
 """
 import pytest
+from document import PageDocument
 from plugin_extensions.advanced_content_summarizer import AdvancedContentSummarizer
 
 def test_advanced_content_summarizer():
@@ -25,5 +27,51 @@ def test_advanced_content_summarizer():
     assert len(output) > 0
     print("AdvancedContentSummarizer output:", output)
 
+class WordTokenizer:
+    """One token per word; ids are the words themselves."""
+    model_max_length = 12
+    def num_special_tokens_to_add(self):
+        return 2
+    def __call__(self, texts, add_special_tokens=True):
+        return {"input_ids": [text.split() for text in texts]}
+    def decode(self, ids):
+        return " ".join(ids)
+
+class FakePipeline:
+    """Summarizes a text to its first three words and records every call's inputs."""
+    def __init__(self):
+        self.tokenizer = WordTokenizer()
+        self.calls = []
+    def __call__(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return [{"summary_text": " ".join(text.split()[:3])} for text in texts]
+
+def test_long_pages_are_chunked_by_tokens():
+    summarizer = AdvancedContentSummarizer()
+    summarizer.summarizer = FakePipeline()
+    text = "One two three four. Five six seven. Eight nine ten eleven twelve thirteen fourteen fifteen sixteen seventeen eighteen."
+    chunks = summarizer.chunk(text)
+    # Ten tokens per chunk: sentences are packed together, the over-long one is cut.
+    assert chunks == [
+        "One two three four. Five six seven.",
+        "Eight nine ten eleven twelve thirteen fourteen fifteen sixteen seventeen",
+        "eighteen.",
+    ]
+
+def test_pages_are_summarized_in_batches():
+    summarizer = AdvancedContentSummarizer()
+    pipeline = summarizer.summarizer = FakePipeline()
+    long_text = " ".join(f"Sentence number {i} is here." for i in range(8))
+    documents = [
+        PageDocument("<html><body><p>Short page about cats.</p></body></html>", "http://example.com/a"),
+        PageDocument(f"<html><body><p>{long_text}</p></body></html>", "http://example.com/b"),
+        PageDocument("<html><body></body></html>", "http://example.com/c"),
+    ]
+    results = summarizer.process_batch(documents)
+    assert results == ["Short page about", "Sentence number 0", "No text found for summarization."]
+    # Map: the short page and every chunk of the long one in one call; then the reduce rounds.
+    assert len(pipeline.calls[0]) == 1 + 8 // 2
+    assert all(len(call) < len(pipeline.calls[0]) for call in pipeline.calls[1:])
+
 if __name__ == "__main__":
     pytest.main([__file__])
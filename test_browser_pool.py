@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the headless browser pool.
+
+A fake driver that loads pages from a local static HTTP server stands in for Chrome,
+so the tests cover reuse, recycling and concurrency limits without a real browser.
+"""
+import asyncio
+import functools
+import threading
+import time
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from browser_pool import BrowserPool
+from main import crawl_page
+
+PAGES = {
+    "index.html": '<html><head><title>Index</title></head><body><a href="a.html">A</a><a href="b.html">B</a></body></html>',
+    "a.html": "<html><head><title>Page A</title></head><body></body></html>",
+    "b.html": "<html><head><title>Page B</title></head><body></body></html>",
+}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def static_site(tmp_path):
+    for name, html in PAGES.items():
+        (tmp_path / name).write_text(html)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=str(tmp_path)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class FakeDriver:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.page_source = ""
+        self.quit_called = False
+
+    def get(self, url):
+        with FakeDriver.lock:
+            FakeDriver.active += 1
+            FakeDriver.peak = max(FakeDriver.peak, FakeDriver.active)
+        try:
+            time.sleep(self.delay)
+            with urllib.request.urlopen(url) as response:
+                self.page_source = response.read().decode()
+        finally:
+            with FakeDriver.lock:
+                FakeDriver.active -= 1
+
+    def quit(self):
+        self.quit_called = True
+
+class FakeFactory:
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.drivers = []
+
+    def __call__(self):
+        driver = FakeDriver(self.delay)
+        self.drivers.append(driver)
+        return driver
+
+def test_browsers_are_reused_and_recycled(static_site):
+    factory = FakeFactory()
+    pool = BrowserPool(size=2, max_uses=3, driver_factory=factory)
+    for _ in range(7):
+        assert "<title>Index</title>" in pool.render(f"{static_site}/index.html")
+    # Sequential renders share one browser, restarted after every third page.
+    assert len(factory.drivers) == 3
+    assert [d.quit_called for d in factory.drivers] == [True, True, False]
+    pool.close()
+    assert all(d.quit_called for d in factory.drivers)
+
+def test_failed_browser_is_replaced(static_site):
+    factory = FakeFactory()
+    pool = BrowserPool(size=1, driver_factory=factory)
+    with pytest.raises(Exception):
+        pool.render(f"{static_site}/missing.html")
+    assert factory.drivers[0].quit_called
+    assert "Page A" in pool.render(f"{static_site}/a.html")
+    assert len(factory.drivers) == 2
+    pool.close()
+
+def test_async_renders_are_bounded_by_pool_size(static_site):
+    FakeDriver.peak = 0
+    factory = FakeFactory(delay=0.05)
+    pool = BrowserPool(size=2, driver_factory=factory)
+
+    async def render_all():
+        return await asyncio.gather(*(pool.render_async(f"{static_site}/{name}") for name in ["a.html", "b.html"] * 3))
+
+    pages = asyncio.run(render_all())
+    pool.close()
+    assert sum("Page A" in html for html in pages) == 3
+    assert len(factory.drivers) == 2
+    assert FakeDriver.peak == 2
+
+def test_rendered_crawl_uses_the_pool(static_site):
+    factory = FakeFactory()
+    pool = BrowserPool(size=2, driver_factory=factory)
+    outputs = []
+    seed = f"{static_site}/index.html"
+    crawl_page(seed, 2, set([seed]), outputs, render=True, browsers=pool)
+    pool.close()
+    titles = [line.strip() for line in outputs if "Title:" in line]
+    assert titles == ["Title: Index", "Title: Page A", "Title: Page B"]
+    assert len(factory.drivers) == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Unit tests for crawl checkpoints.
+
+Each test interrupts a crawl part-way, resumes it from the checkpoint, and checks
+that together the two runs crawl every page exactly once in the original order.
+"""
+import argparse
+import asyncio
+import io
+import pytest
+import requests
+from checkpoint import CrawlCheckpoint, load_checkpoint_args
+from main import async_crawl_page, crawl_page, resume_args
+from output import MultiSink, create_sink
+from test_crawler import site_get
+from test_frontier import FakeSession
+
+def checkpointed_outputs(checkpoint):
+    return MultiSink(create_sink("ndjson", stream=io.StringIO()), checkpoint)
+
+@pytest.mark.parametrize("order", ["dfs", "bfs"])
+def test_sync_crawl_resumes_where_it_stopped(tmp_path, monkeypatch, order):
+    seed = "http://site/"
+    monkeypatch.setattr(requests, "get", site_get)
+    reference = []
+    crawl_page(seed, 4, set([seed]), reference, order=order)
+
+    fetched = []
+    def interrupting_get(url, headers=None):
+        if len(fetched) == 3:
+            raise KeyboardInterrupt
+        fetched.append(url)
+        return site_get(url)
+
+    path = str(tmp_path / "crawl.checkpoint")
+    checkpoint = CrawlCheckpoint(path, interval=3600)
+    checkpoint.start({"name": "test", "url": [seed]})
+    monkeypatch.setattr(requests, "get", interrupting_get)
+    first = []
+    with pytest.raises(KeyboardInterrupt):
+        crawl_page(seed, 4, set([seed]), first, order=order, checkpoint=checkpoint)
+    checkpoint.close()
+
+    checkpoint = CrawlCheckpoint(path, interval=3600, resume=True)
+    monkeypatch.setattr(requests, "get", lambda url, headers=None: fetched.append(url) or site_get(url))
+    second = []
+    crawl_page(seed, 4, set([seed]), second, order=order, checkpoint=checkpoint)
+    checkpoint.close()
+
+    def crawled(outputs):
+        return [line.strip() for line in outputs if "URL:" in line]
+    # The interrupted page was announced but never fetched; the resumed crawl starts with it.
+    assert crawled(first)[:-1] + crawled(second) == crawled(reference)
+    assert len(fetched) == len(set(fetched)) == len(crawled(reference))
+
+def test_async_crawl_resumes_without_refetching(tmp_path):
+    root = "http://example.com"
+    path = str(tmp_path / "crawl.checkpoint")
+
+    async def interrupted():
+        session = FakeSession()
+        checkpoint = CrawlCheckpoint(path, interval=3600)
+        checkpoint.start({"name": "test", "url": [root]})
+        task = asyncio.create_task(async_crawl_page(root, 3, {root}, checkpointed_outputs(checkpoint), session, concurrency=4, checkpoint=checkpoint))
+        while len(session.fetched) < 20:
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        checkpoint.close()
+
+    async def resumed():
+        session = FakeSession()
+        checkpoint = CrawlCheckpoint(path, interval=3600, resume=True)
+        done_before = {record["url"] for record in checkpoint.records()}
+        await async_crawl_page(root, 3, {root}, checkpointed_outputs(checkpoint), session, concurrency=4, checkpoint=checkpoint)
+        records = [record["url"] for record in checkpoint.records()]
+        checkpoint.close()
+        return done_before, session.fetched, records
+
+    asyncio.run(interrupted())
+    done_before, refetched, records = asyncio.run(resumed())
+    assert done_before and not done_before & set(refetched)
+    assert len(records) == len(set(records)) == 111
+
+def test_failed_pages_are_retried_on_resume(tmp_path, monkeypatch):
+    seed = "http://site/"
+    path = str(tmp_path / "crawl.checkpoint")
+
+    def failing_get(url, headers=None):
+        if url == "http://site/b":
+            raise requests.RequestException("boom")
+        if url == "http://site/c":
+            raise KeyboardInterrupt
+        return site_get(url)
+
+    monkeypatch.setattr(requests, "get", failing_get)
+    checkpoint = CrawlCheckpoint(path, interval=3600, max_retries=2)
+    checkpoint.start({})
+    with pytest.raises(KeyboardInterrupt):
+        crawl_page(seed, 2, set([seed]), checkpointed_outputs(checkpoint), checkpoint=checkpoint)
+    checkpoint.close()
+
+    fetched = []
+    monkeypatch.setattr(requests, "get", lambda url, headers=None: fetched.append(url) or site_get(url))
+    checkpoint = CrawlCheckpoint(path, interval=3600, resume=True, max_retries=2)
+    crawl_page(seed, 2, set([seed]), checkpointed_outputs(checkpoint), checkpoint=checkpoint)
+    records = {record["url"]: record for record in checkpoint.records()}
+    checkpoint.close()
+    assert sorted(fetched) == ["http://site/b", "http://site/c"]
+    assert "error" not in records["http://site/b"]
+
+def test_resume_restores_crawl_arguments(tmp_path):
+    path = str(tmp_path / "crawl.checkpoint")
+    checkpoint = CrawlCheckpoint(path)
+    checkpoint.start({"name": "nightly", "url": ["http://site/"], "depth": 3, "checkpoint": path})
+    checkpoint.close()
+    assert load_checkpoint_args(path)["depth"] == 3
+    args = resume_args(argparse.Namespace(resume=path, name=None, url=None, depth=1, checkpoint=None, workers=4))
+    assert (args.name, args.url, args.depth, args.checkpoint, args.workers) == ("nightly", ["http://site/"], 3, path, 4)
+    with pytest.raises(ValueError):
+        load_checkpoint_args(str(tmp_path / "missing.checkpoint"))
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -2,7 +2,8 @@
 """
 Unit test for the ContentCategorizer plugin.
 
-This test verifies that the ContentCategorizer plugin categorizes HTML content correctly based on keyword matching.
+This test verifies that the ContentCategorizer plugin categorizes HTML content correctly based on keyword matching, including keyword sets
+given in the plugin settings.
 """
 import pytest
 from plugin_extensions.content_categorizer import ContentCategorizer
@@ -72,5 +73,20 @@ def test_content_categorizer_uncategorized():
     category = plugin.process(html, "http://example.com")
     assert category == "Uncategorized", f"Expected 'Uncategorized', but got '{category}'"
 
+def test_content_categorizer_configured_keywords():
+    html = """
+    <html>
+      <head><title>Kitchen</title></head>
+      <body>
+        <p>Whisk the eggs, then bake the cake. Machine learning models are trained on data.</p>
+      </body>
+    </html>
+    """
+    plugin = ContentCategorizer()
+    plugin.configure({"keywords": {"Cooking": ["whisk", "bake", "eggs"], "AI": ["machine learning", "models", "trained"]}})
+    assert plugin.process(html, "http://example.com") == "Cooking"
+    plugin.configure({"keywords": {"Cooking": ["oven"], "AI": ["machine learning", "models", "trained"]}})
+    assert plugin.process(html, "http://example.com") == "AI"
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -1,5 +1,6 @@
 import pytest
 import requests
+import urllib.parse
 from main import crawl_page
 
 class DummyResponse:
@@ -31,3 +32,52 @@ def test_crawl_page_error(monkeypatch):
     crawl_page("http://dummysite", 1, visited, outputs)
     # Verify that an error message was logged
     assert any("Error fetching URL: Dummy error" in line for line in outputs)
+
+# A small site graph with shared children and cycles, served by a fake requests.get.
+SITE = {
+    "http://site/": ["/b", "/a", "/c"],
+    "http://site/a": ["/c", "/d", "/"],
+    "http://site/b": ["/a", "/e"],
+    "http://site/c": ["/d", "/b"],
+    "http://site/d": ["/e"],
+    "http://site/e": ["/a"],
+}
+
+def site_get(url, headers=None):
+    links = "".join(f"<a href='{href}'>x</a>" for href in SITE.get(url, []))
+    return DummyResponse(f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+
+def recursive_reference(url, depth, visited, order, indent=0):
+    # The original recursive sorted-DFS traversal, kept here as the ordering oracle.
+    order.append((indent, url))
+    if depth > 1:
+        for link in sorted(set(urllib.parse.urljoin(url, href) for href in SITE.get(url, []))):
+            if link not in visited:
+                visited.add(link)
+                recursive_reference(link, depth - 1, visited, order, indent + 1)
+
+@pytest.mark.parametrize("depth", [1, 2, 3, 5])
+def test_crawl_page_dfs_matches_recursive_order(monkeypatch, depth):
+    monkeypatch.setattr(requests, "get", site_get)
+    outputs = []
+    crawl_page("http://site/", depth, set(["http://site/"]), outputs)
+    expected = []
+    recursive_reference("http://site/", depth, set(["http://site/"]), expected)
+    crawled = [(len(line) - len(line.lstrip(" ")), line.strip()[len("URL: "):]) for line in outputs if line.strip().startswith("URL: ")]
+    assert crawled == [(indent * 4, url) for indent, url in expected]
+
+def test_crawl_page_bfs_visits_each_page_once_level_by_level(monkeypatch):
+    monkeypatch.setattr(requests, "get", site_get)
+    outputs = []
+    crawl_page("http://site/", 5, set(["http://site/"]), outputs, order="bfs")
+    crawled = [line.strip()[len("URL: "):] for line in outputs if line.strip().startswith("URL: ")]
+    assert crawled == ["http://site/", "http://site/a", "http://site/b", "http://site/c", "http://site/d", "http://site/e"]
+
+def test_crawl_page_handles_deep_chains_without_recursion(monkeypatch):
+    def chain_get(url, headers=None):
+        n = int(url.rsplit("/", 1)[1])
+        return DummyResponse(f"<html><body><a href='/{n + 1}'>next</a></body></html>")
+    monkeypatch.setattr(requests, "get", chain_get)
+    outputs = []
+    crawl_page("http://chain/0", 3000, set(["http://chain/0"]), outputs)
+    assert sum(1 for line in outputs if line.strip().startswith("URL: ")) == 3000
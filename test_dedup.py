@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for URL normalization and the visited-URL backends.
+
+The backends are checked for membership, growth and false-positive behaviour, and a
+crawl over a site full of URL variants verifies that each page is fetched only once,
+by the spelling it was linked with.
+"""
+import argparse
+import os
+import pytest
+import requests
+from dedup import BloomUrlSet, DiskUrlSet, create_url_set, DEDUP_BACKENDS
+from main import crawl_page, create_visited
+from test_crawler import DummyResponse
+from urls import TRACKING_PARAMS, UrlNormalizer, normalize_url
+
+@pytest.mark.parametrize("url, expected", [
+    ("http://a/x#frag", "http://a/x"),
+    ("HTTP://A/x?", "http://a/x"),
+    ("http://a:80", "http://a/"),
+    ("https://a:443/p", "https://a/p"),
+    ("http://a:8080/p", "http://a:8080/p"),
+    ("http://a/p?b=2&a=1", "http://a/p?a=1&b=2"),
+    ("http://a/p?utm_source=x&id=7&fbclid=y", "http://a/p?id=7"),
+    ("http://a/p?q=a%20b", "http://a/p?q=a%20b"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+def test_normalizer_settings():
+    assert normalize_url("http://a/x/", strip_trailing_slash=True) == "http://a/x"
+    assert normalize_url("http://a/", strip_trailing_slash=True) == "http://a/"
+    assert normalize_url("http://a/p?ref=1&utm_medium=2", strip_params=["ref"]) == "http://a/p?utm_medium=2"
+
+@pytest.mark.parametrize("backend", DEDUP_BACKENDS)
+def test_backends_deduplicate_canonical_urls(backend):
+    visited = create_url_set(backend, UrlNormalizer(), capacity=1000)
+    visited.add("http://A/x#top")
+    assert "http://a/x" in visited
+    assert "http://a/x?utm_campaign=z" in visited
+    assert "http://a/y" not in visited
+    visited.add("http://a/x")
+    assert len(visited) == 1
+    visited.close()
+
+def test_bloom_false_positive_rate_is_bounded():
+    bloom = BloomUrlSet(capacity=5000, error_rate=0.01)
+    for i in range(5000):
+        bloom.add(f"http://a/{i}")
+    assert all(f"http://a/{i}" in bloom for i in range(5000))
+    false_positives = sum(f"http://b/{i}" in bloom for i in range(5000))
+    assert false_positives < 5000 * 0.03
+
+def test_disk_store_grows_and_cleans_up(tmp_path):
+    store = DiskUrlSet(capacity=10)
+    path = store.path
+    for i in range(5000):
+        store.add(f"http://a/{i}")
+    assert store.slots > 1024
+    assert len(store) == 5000
+    assert all(f"http://a/{i}" in store for i in range(5000))
+    assert "http://a/5000" not in store
+    store.close()
+    assert not os.path.exists(path)
+
+    kept = DiskUrlSet(str(tmp_path / "visited.bin"), capacity=10)
+    kept.add("http://a/")
+    kept.close()
+    assert os.path.exists(tmp_path / "visited.bin")
+
+@pytest.mark.parametrize("backend", DEDUP_BACKENDS)
+def test_crawl_fetches_url_variants_once(monkeypatch, backend):
+    pages = {
+        "http://site/": ["/a", "/a#intro", "/A?", "http://SITE:80/a", "/b?utm_source=feed", "/b"],
+        "http://site/a": ["/#top", "/b?fbclid=1"],
+        "http://site/b": ["/a"],
+    }
+    fetched = []
+    def get(url, headers=None):
+        fetched.append(url)
+        links = "".join(f"<a href='{href}'>x</a>" for href in pages.get(url, []))
+        return DummyResponse(f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+    monkeypatch.setattr(requests, "get", get)
+    args = argparse.Namespace(dedup=backend, dedup_capacity=1000, dedup_error_rate=0.001, dedup_path=None, strip_params=TRACKING_PARAMS, strip_trailing_slash=False)
+    visited = create_visited(args, ["http://site/"])
+    crawl_page("http://site/", 3, visited, [])
+    visited.close()
+    # "/A" is a different path (paths are case-sensitive), so it is a page of its own.
+    # Pages are fetched as first linked, not in their canonical form: /b via /a's link.
+    assert fetched == ["http://site/", "http://site/A", "http://site/a", "http://site/b?fbclid=1"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Unit tests for distributed crawling over a shared frontier.
+
+These tests verify host partitioning, the assignment of partitions to live workers
+(including takeover from a worker that stopped sending heartbeats), that the store
+keeps one entry per canonical URL, and that two workers crawling one shared frontier
+fetch every page exactly once, each only from hosts it owns at the time, without ever
+blocking the event loop on the store.
+"""
+import argparse
+import asyncio
+import threading
+import pytest
+from distributed import PENDING, FrontierStore, SharedFrontier, host_partition, load_frontier_args
+from frontier import FrontierItem, HostFrontier
+from main import async_crawl_page, worker_args
+from politeness import Politeness
+from test_politeness import FakeResponse
+from urls import UrlNormalizer
+
+def test_host_partition_is_stable():
+    assert host_partition("http://Example.com/a", 16) == host_partition("http://example.com/b?x=1", 16)
+    assert {host_partition(f"http://host{i}.test/", 16) for i in range(200)} == set(range(16))
+
+def test_partitions_are_shared_and_taken_over(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    store = FrontierStore(path)
+    store.start({"name": "test", "depth": 2, "role": "coordinator", "output": "out.txt"}, [f"http://host{i}.test/" for i in range(20)], 2, partitions=8)
+    a, b = FrontierStore(path), FrontierStore(path)
+    assert len(a.rebalance("a")) == 8
+    # b's share only frees up once a hands back its extra partitions on its next heartbeat.
+    assert b.rebalance("b") == []
+    owned_a = a.rebalance("a")
+    owned_b = b.rebalance("b")
+    assert len(owned_a) == len(owned_b) == 4 and not set(owned_a) & set(owned_b)
+    leased = a.lease("a", owned_a, 100)
+    assert leased and {host_partition(item.url, 8) for item in leased} <= set(owned_a)
+
+    # Worker a stops sending heartbeats: b takes over its partitions and its leased URLs.
+    a.db.execute("UPDATE workers SET heartbeat = 0 WHERE worker = 'a'")
+    assert len(b.rebalance("b")) == 8
+    states = dict(b.db.execute("SELECT state, COUNT(*) FROM urls GROUP BY state").fetchall())
+    assert states == {PENDING: 20}
+    assert load_frontier_args(path) == {"name": "test", "depth": 2}
+    for db in (store, a, b):
+        db.close()
+
+def test_spellings_of_a_url_are_stored_once(tmp_path):
+    store = FrontierStore(str(tmp_path / "frontier.db"), normalize=UrlNormalizer())
+    store.start({"name": "test"}, ["http://site/a/?utm_source=feed"], 2, partitions=4)
+    store.update([FrontierItem("http://SITE:80/a/", 1, 1)], [])
+    owned = store.rebalance("a")
+    # The URL is leased as it was first linked, and completes under any spelling.
+    assert store.lease("a", owned, 10) == [FrontierItem("http://site/a/?utm_source=feed", 2, 0)]
+    store.update([], ["http://site/a/"])
+    assert store.finished()
+    store.close()
+
+def test_worker_inherits_coordinator_options(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    store = FrontierStore(path)
+    store.start({"name": "nightly", "url": ["http://site/"], "depth": 3, "frontier": path}, ["http://site/"], 3)
+    store.close()
+    args = worker_args(argparse.Namespace(frontier=path, name=None, url=None, depth=1, output="worker.txt"))
+    assert (args.name, args.url, args.depth, args.frontier, args.output) == ("nightly", ["http://site/"], 3, path, "worker.txt")
+
+class MultiHostSession:
+    """Five hosts; each home page links to three pages of its own and to the next host."""
+    def __init__(self, worker, store, fetched):
+        self.worker = worker
+        self.store = store
+        self.fetched = fetched
+    def get(self, url, headers=None):
+        if url.endswith("/robots.txt"):
+            return FakeResponse("", status=404)
+        # Partitions may move between workers, but never while one of their pages is in flight.
+        owner = self.store.db.execute("SELECT worker FROM partitions WHERE id = ?", (host_partition(url, 8),)).fetchone()[0]
+        assert owner == self.worker
+        self.fetched.append(url)
+        host = int(url.split("/")[2][4:-5])
+        links = ""
+        if url.endswith(".test/"):
+            links = "".join(f'<a href="/{i}">{i}</a>' for i in range(3)) + f'<a href="http://host{(host + 1) % 5}.test/">next</a>'
+        return FakeResponse(f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+
+def test_workers_split_the_crawl_by_host(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    coordinator = FrontierStore(path)
+    # Every home page is both a seed and linked from another host: each is still crawled once.
+    coordinator.start({"name": "test"}, [f"http://host{h}.test/" for h in range(5)], 2, partitions=8)
+
+    async def worker(name, fetched):
+        store = FrontierStore(path)
+        politeness = Politeness(max_per_host=2)
+        frontier = SharedFrontier(store, HostFrontier(politeness, 2), name, batch_size=4, poll_interval=0.02)
+        try:
+            await async_crawl_page([], 2, set(), [], MultiHostSession(name, coordinator, fetched), concurrency=3, politeness=politeness, frontier=frontier)
+        finally:
+            frontier.close()
+            store.close()
+
+    async def crawl():
+        first, second = [], []
+        await asyncio.gather(worker("a", first), worker("b", second))
+        return first, second
+
+    first, second = asyncio.run(crawl())
+    expected = {f"http://host{h}.test/" for h in range(5)} | {f"http://host{h}.test/{i}" for h in range(5) for i in range(3)}
+    assert sorted(first + second) == sorted(expected)
+    assert first and second
+    assert coordinator.finished()
+    assert coordinator.progress()[2] == len(expected)
+    coordinator.close()
+
+class ThreadRecordingStore(FrontierStore):
+    """Records the threads its blocking methods run on."""
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+    def rebalance(self, *args):
+        self.threads.add(threading.get_ident())
+        return super().rebalance(*args)
+    def lease(self, *args):
+        self.threads.add(threading.get_ident())
+        return super().lease(*args)
+    def update(self, *args):
+        self.threads.add(threading.get_ident())
+        return super().update(*args)
+    def finished(self):
+        self.threads.add(threading.get_ident())
+        return super().finished()
+
+def test_store_calls_stay_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    coordinator = FrontierStore(path)
+    coordinator.start({"name": "test"}, ["http://host0.test/"], 2, partitions=8)
+    store = ThreadRecordingStore(path)
+    fetched = []
+
+    async def crawl():
+        politeness = Politeness(max_per_host=2)
+        frontier = SharedFrontier(store, HostFrontier(politeness, 2), "a", batch_size=2, poll_interval=0.02)
+        try:
+            await async_crawl_page([], 2, set(), [], MultiHostSession("a", coordinator, fetched), concurrency=2, politeness=politeness, frontier=frontier)
+        finally:
+            frontier.close()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(crawl())
+    store.close()
+    assert len(fetched) == 5
+    assert store.threads and loop_thread not in store.threads
+    coordinator.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
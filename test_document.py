@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared PageDocument.
+
+These tests verify that the document exposes the views plugins rely on and that the
+HTML is parsed only once no matter how many views or plugins consume it.
+"""
+import pytest
+import document as document_module
+from document import PageDocument
+from plugins import PluginBase, accepts_document
+from plugin_extensions.heading_extractor import HeadingExtractor
+from plugin_extensions.image_extractor import ImageExtractor
+from plugin_extensions.text_summarizer import TextSummarizer
+
+SAMPLE_HTML = """
+<html>
+  <head><title> Sample Page </title><script>var ignored = 1;</script></head>
+  <body>
+    <h1>Welcome</h1>
+    <p>Hello World. Second sentence here.</p>
+    <a href="/about">About</a>
+    <a href="http://other.example/x">Other</a>
+    <a href="/about">About again</a>
+    <img src="logo.png" alt="Logo">
+    <img alt="No source">
+  </body>
+</html>
+"""
+
+def test_page_document_views():
+    doc = PageDocument(SAMPLE_HTML, "http://example.com/index.html")
+    assert doc.title == "Sample Page"
+    assert "Hello World." in doc.text
+    assert "ignored" not in doc.text
+    assert doc.lower_text == doc.text.lower()
+    assert "hello" in doc.tokens and "world" in doc.tokens
+    assert doc.hrefs == ["/about", "http://other.example/x", "/about"]
+    assert doc.links == ["http://example.com/about", "http://other.example/x"]
+    assert doc.images == [{"src": "logo.png", "alt": "Logo"}]
+
+def test_page_document_parses_once(monkeypatch):
+    calls = []
+    real_soup = document_module.BeautifulSoup
+
+    def counting_soup(*args, **kwargs):
+        calls.append(args)
+        return real_soup(*args, **kwargs)
+
+    monkeypatch.setattr(document_module, "BeautifulSoup", counting_soup)
+    doc = PageDocument(SAMPLE_HTML, "http://example.com/")
+    for plugin in [HeadingExtractor(), ImageExtractor(), TextSummarizer()]:
+        plugin.process(doc.html, doc.url, document=doc)
+    doc.title, doc.links, doc.tokens
+    assert len(calls) == 1
+
+@pytest.mark.parametrize("parser", ["lxml", "stream"])
+def test_parser_backends_agree_on_title_and_links(parser):
+    if parser == "lxml":
+        pytest.importorskip("lxml")
+    reference = PageDocument(SAMPLE_HTML, "http://example.com/index.html")
+    doc = PageDocument(SAMPLE_HTML, "http://example.com/index.html", parser=parser)
+    assert doc.title == reference.title
+    assert doc.hrefs == reference.hrefs
+    assert doc.links == reference.links
+
+def test_stream_parser_builds_tree_only_on_demand(monkeypatch):
+    calls = []
+    real_soup = document_module.BeautifulSoup
+
+    def counting_soup(*args, **kwargs):
+        calls.append(args)
+        return real_soup(*args, **kwargs)
+
+    monkeypatch.setattr(document_module, "BeautifulSoup", counting_soup)
+    doc = PageDocument(SAMPLE_HTML, "http://example.com/", parser="stream")
+    doc.title, doc.links
+    assert calls == []
+    # A plugin that needs the full tree still gets one.
+    assert HeadingExtractor().process(doc.html, doc.url, document=doc) == {"h1": ["Welcome"], "h2": [], "h3": []}
+    assert len(calls) == 1
+
+def test_accepts_document_distinguishes_legacy_plugins():
+    class LegacyPlugin(PluginBase):
+        def process(self, html, url):
+            return "legacy"
+
+    assert accepts_document(HeadingExtractor())
+    assert not accepts_document(LegacyPlugin())
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the EntityRecognizer plugin.
+
+A stand-in spaCy pipeline (capitalized word runs are entities) verifies that unused
+components are disabled, that pages are streamed through one nlp.pipe() call, and
+that oversized texts are segmented with entity offsets and split entities merged,
+while entities on either side of a line break stay apart.
+"""
+import re
+import pytest
+import spacy
+from document import PageDocument
+from plugin_extensions.entity_recognizer import EntityRecognizer
+
+class FakeEntity:
+    def __init__(self, match):
+        self.text = match.group()
+        self.label_ = "PROPER"
+        self.start_char = match.start()
+        self.end_char = match.end()
+
+class FakeDoc:
+    def __init__(self, text):
+        self.ents = [FakeEntity(match) for match in re.finditer(r"[A-Z][a-z]+(?: [A-Z][a-z]+)*", text)]
+
+class FakeNlp:
+    def __init__(self, max_length=1000000):
+        self.pipe_names = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner"]
+        self.disabled = []
+        self.max_length = max_length
+        self.calls = []
+    def select_pipes(self, disable):
+        self.disabled = disable
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        texts = list(texts)
+        self.calls.append((texts, batch_size, n_process))
+        return (FakeDoc(text) for text in texts)
+
+def test_only_entity_components_run(monkeypatch):
+    nlp = FakeNlp()
+    monkeypatch.setattr(spacy, "load", lambda name: nlp)
+    recognizer = EntityRecognizer()
+    recognizer.configure({"batch_size": 4, "n_process": 2})
+    recognizer.warmup()
+    assert nlp.disabled == ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+    documents = [PageDocument(f"<p>Alice wrote to {name}.</p>", f"http://example.com/{name}") for name in ("Bob", "Carol")]
+    documents.append(PageDocument("<p></p>", "http://example.com/empty"))
+    results = recognizer.process_batch(documents)
+    assert [[entity["text"] for entity in result] for result in results[:2]] == [["Alice", "Bob"], ["Alice", "Carol"]]
+    assert results[2] == "No text found to analyze."
+    assert nlp.calls == [(["Alice wrote to Bob.", "Alice wrote to Carol."], 4, 2)]
+
+def test_oversized_text_is_segmented_with_offsets():
+    recognizer = EntityRecognizer()
+    recognizer.nlp = FakeNlp(max_length=40)
+    text = "Alice lives in Paris. " * 5 + "later the whole team flew to New York City"
+    document = PageDocument(f"<p>{text}</p>", "http://example.com/")
+    entities = recognizer.process_batch([document])[0]
+    segments = recognizer.nlp.calls[0][0]
+    assert all(len(segment) <= 40 for segment in segments) and segments[-1] == "City"
+    assert all(text[entity["start"]:entity["end"]] == entity["text"] for entity in entities)
+    # "New York City" straddles a word break between segments and is merged back together.
+    assert [entity["text"] for entity in entities] == ["Alice", "Paris"] * 5 + ["New York City"]
+
+def test_entities_across_a_line_break_stay_apart():
+    recognizer = EntityRecognizer()
+    recognizer.nlp = FakeNlp(max_length=40)
+    text = "the delegates travelled on to Paris\nLondon hosted them next"
+    document = PageDocument(f"<pre>{text}</pre>", "http://example.com/")
+    entities = recognizer.process_batch([document])[0]
+    assert recognizer.nlp.calls[0][0][0].endswith("Paris\n")
+    assert [entity["text"] for entity in entities] == ["Paris", "London"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
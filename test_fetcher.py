@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pooled HTTP fetchers.
+
+A local keep-alive HTTP server records the client port of every request, which lets
+the tests verify that the shared session reuses its connection across fetches. A
+second server serves oversized, endless, non-HTML and slow responses to check that
+FetchLimits gives up on them early in both the sync and async fetchers (including a
+body trickled a few bytes at a time, which must not outlast the total timeout), and pages
+whose charset is only declared in a <meta> tag to check incremental decoding.
+"""
+import asyncio
+import codecs
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import aiohttp
+import pytest
+import requests
+from fetcher import BodyDecoder, FetchLimits, ResponseTooLarge, UnsupportedContentType, create_connector, create_session, fetch_html, read_body
+from main import async_fetch_http
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.client_ports.append(self.client_address[1])
+        body = f"<html><head><title>{self.path}</title></head></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    server.client_ports = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class LimitsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(1)
+        if self.path == "/drip":
+            # Well within the read timeout between writes, but never done.
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b"<p>drip</p>")
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            return
+        if self.path == "/latin":
+            body = "<html><head><meta charset='iso-8859-1'><title>café</title></head></html>".encode("latin-1")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf" if self.path == "/report.pdf" else "text/html; charset=utf-8")
+        if self.path == "/big":
+            self.send_header("Content-Length", str(50 * 1024 * 1024))
+        self.end_headers()
+        try:
+            if self.path in ("/big", "/endless"):
+                # Keeps streaming until the client hangs up.
+                for _ in range(800):
+                    self.wfile.write(b"x" * 65536)
+            else:
+                self.wfile.write("<html><head><title>ok ✓</title></head></html>".encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def limits_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), LimitsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+LIMITS = FetchLimits(connect_timeout=2, read_timeout=0.3, total_timeout=5, max_bytes=256 * 1024)
+
+@pytest.mark.parametrize("path, error", [
+    ("/big", ResponseTooLarge),
+    ("/endless", ResponseTooLarge),
+    ("/report.pdf", UnsupportedContentType),
+    ("/slow", requests.Timeout),
+])
+def test_sync_fetch_limits(limits_server, path, error):
+    start = time.monotonic()
+    with pytest.raises(error):
+        fetch_html(limits_server + path, limits=LIMITS)
+    assert time.monotonic() - start < 1
+    assert "ok ✓" in fetch_html(limits_server + "/page", limits=LIMITS)
+
+def test_sync_total_timeout_with_slow_drip(limits_server):
+    limits = FetchLimits(connect_timeout=2, read_timeout=0.3, total_timeout=0.5, max_bytes=256 * 1024)
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        fetch_html(limits_server + "/drip", limits=limits)
+    assert time.monotonic() - start < 1.5
+
+class Urllib1Raw:
+    """A urllib3 1.x-style raw stream: read() but no read1()."""
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, amt=None, decode_content=None):
+        chunk, self.data = self.data[:amt], self.data[amt:]
+        return chunk
+
+    def stream(self, amt, decode_content=None):
+        while self.data:
+            yield self.read(amt)
+
+def test_read_body_without_read1():
+    response = requests.Response()
+    response.raw = Urllib1Raw("ok ✓".encode("utf-8") * 20000)
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    assert read_body(response, "http://example.test/", LIMITS, time.monotonic()) == "ok ✓" * 20000
+
+def decode_in_chunks(data, charset=None, size=5):
+    decoder = BodyDecoder(charset)
+    for i in range(0, len(data), size):
+        decoder.feed(data[i:i + size])
+    return decoder.finish(), decoder.charset
+
+@pytest.mark.parametrize("data, charset, text, resolved", [
+    ("naïve ✓".encode("utf-8") * 400, None, "naïve ✓" * 400, "utf-8"),
+    ("naïve".encode("cp1252"), "cp1252", "naïve", "cp1252"),
+    ("<meta charset=\"ISO-8859-1\">café".encode("latin-1"), None, "<meta charset=\"ISO-8859-1\">café", "cp1252"),
+    ("<meta http-equiv=\"Content-Type\" content=\"text/html; charset=shift_jis\">日本".encode("shift_jis"), None, "<meta http-equiv=\"Content-Type\" content=\"text/html; charset=shift_jis\">日本", "shift_jis"),
+    (codecs.BOM_UTF8 + "bom ✓".encode("utf-8"), "cp1252", "bom ✓", "utf-8"),
+    (codecs.BOM_UTF16_LE + "wide".encode("utf-16-le"), None, "wide", "utf-16-le"),
+    # Undeclared and not UTF-8 after the sniffed prefix: falls back to windows-1252.
+    (b"x" * 3000 + "café".encode("cp1252"), None, "x" * 3000 + "café", "cp1252"),
+])
+def test_body_decoder(data, charset, text, resolved):
+    assert decode_in_chunks(data, charset) == (text, resolved)
+
+def test_stray_byte_keeps_preceding_utf8():
+    # Valid multibyte UTF-8 and a stray windows-1252 quote arrive in the same chunk.
+    data = "é".encode("utf-8") * 600 + b"\x93quoted\x94 " + "é".encode("utf-8")
+    text, charset = decode_in_chunks(data, size=64 * 1024)
+    assert charset == "cp1252"
+    assert text == "é" * 600 + "\u201cquoted\u201d " + "Ã©"
+
+def test_meta_charset_is_honored(limits_server):
+    assert "café" in fetch_html(limits_server + "/latin", limits=LIMITS)
+    async def fetch():
+        async with aiohttp.ClientSession() as session:
+            return await async_fetch_http(session, limits_server + "/latin", limits=LIMITS)
+    assert "café" in asyncio.run(fetch())
+
+def test_async_fetch_limits(limits_server):
+    async def fetch_all():
+        results = {}
+        async with aiohttp.ClientSession(timeout=LIMITS.client_timeout()) as session:
+            for path in ["/page", "/big", "/endless", "/report.pdf", "/slow"]:
+                try:
+                    results[path] = await async_fetch_http(session, limits_server + path, limits=LIMITS)
+                except Exception as e:
+                    results[path] = type(e)
+        return results
+    results = asyncio.run(fetch_all())
+    assert "ok ✓" in results["/page"]
+    assert results["/big"] is ResponseTooLarge
+    assert results["/endless"] is ResponseTooLarge
+    assert results["/report.pdf"] is UnsupportedContentType
+    assert issubclass(results["/slow"], asyncio.TimeoutError)
+
+def test_session_reuses_connections(local_server):
+    base = f"http://127.0.0.1:{local_server.server_address[1]}"
+    session = create_session(pool_size=4, pool_per_host=2, max_retries=2)
+    try:
+        for i in range(5):
+            assert f"/page{i}" in fetch_html(f"{base}/page{i}", session)
+    finally:
+        session.close()
+    assert len(local_server.client_ports) == 5
+    assert len(set(local_server.client_ports)) == 1
+
+def test_session_adapter_mirrors_configuration():
+    session = create_session(pool_size=7, pool_per_host=3, max_retries=5, user_agent="TestAgent")
+    adapter = session.get_adapter("https://example.com")
+    assert adapter._pool_connections == 7
+    assert adapter._pool_maxsize == 3
+    assert adapter.max_retries.total == 5
+    assert session.headers["User-Agent"] == "TestAgent"
+
+def test_connector_limits():
+    async def build():
+        connector = create_connector(pool_size=50, pool_per_host=5, dns_cache_ttl=60)
+        try:
+            return connector.limit, connector.limit_per_host
+        finally:
+            await connector.close()
+    assert asyncio.run(build()) == (50, 5)
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the crawl frontier.
+
+These tests verify the overflow behaviour of the AsyncFrontier and that the concurrent
+crawler never has more pages in flight than its configured number of workers.
+"""
+import asyncio
+import pytest
+from frontier import AsyncFrontier, FrontierItem
+from main import async_crawl_page
+
+def test_async_frontier_overflow_preserves_order():
+    async def run():
+        frontier = AsyncFrontier(maxsize=2)
+        for i in range(5):
+            frontier.put(FrontierItem(f"http://example.com/{i}", 1, 0))
+        assert frontier.queue.qsize() == 2
+        assert len(frontier) == 5
+        urls = []
+        for _ in range(5):
+            item = await frontier.get()
+            urls.append(item.url)
+            frontier.task_done()
+        await asyncio.wait_for(frontier.join(), timeout=1)
+        return urls
+    assert asyncio.run(run()) == [f"http://example.com/{i}" for i in range(5)]
+
+class FakeResponse:
+    def __init__(self, session, text):
+        self.session = session
+        self._text = text
+    async def __aenter__(self):
+        self.session.in_flight += 1
+        self.session.max_in_flight = max(self.session.max_in_flight, self.session.in_flight)
+        await asyncio.sleep(0.01)
+        return self
+    async def __aexit__(self, *exc):
+        self.session.in_flight -= 1
+    def raise_for_status(self):
+        pass
+    async def text(self):
+        return self._text
+
+class FakeSession:
+    """Serves a site where every page links to ten children, three levels deep."""
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fetched = []
+    def get(self, url, headers=None):
+        self.fetched.append(url)
+        links = "".join(f'<a href="{url.rstrip("/")}/{i}">{i}</a>' for i in range(10))
+        return FakeResponse(self, f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+
+def test_async_crawl_is_bounded_by_worker_count():
+    session = FakeSession()
+    outputs = []
+    root = "http://example.com"
+    asyncio.run(async_crawl_page(root, 3, {root}, outputs, session, concurrency=4, domain_semaphores=None))
+    assert len(session.fetched) == 1 + 10 + 100
+    assert len(set(session.fetched)) == len(session.fetched)
+    assert session.max_in_flight <= 4
+    assert sum(1 for line in outputs if "Title:" in line) == 111
+
+if __name__ == "__main__":
+    pytest.main([__file__])
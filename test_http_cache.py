@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the persistent HTTP response cache.
+
+A local server with ETag support records every request and status, so the tests can
+check conditional revalidation, TTL hits, and that unchanged pages are not re-analysed
+but still reach the output sinks with their text.
+"""
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import aiohttp
+import pytest
+from fetcher import create_session, fetch_html
+from http_cache import ResponseCache, cache_key
+from output import OutputSink
+from main import crawl_page, async_crawl_page
+
+class ETagHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = self.server.pages.get(self.path)
+        if body is None:
+            self.server.log.append((self.path, 404))
+            self.send_error(404)
+            return
+        etag = '"' + hashlib.md5(body.encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.server.log.append((self.path, 304))
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.server.log.append((self.path, 200))
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def etag_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    server.log = []
+    server.pages = {
+        "/": '<html><head><title>Home</title></head><body><a href="/a">A</a></body></html>',
+        "/a": "<html><head><title>A</title></head><body>Leaf</body></html>",
+    }
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.base = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+class CountingRegistry:
+    """Stands in for PluginRegistry and counts the pages it analyses."""
+    def __init__(self):
+        self.calls = 0
+        self.plugins = []
+
+    def load(self):
+        return self.plugins
+
+    def process(self, html, url, document=None):
+        self.calls += 1
+        yield "Counter", {"words": len(document.text.split())}, None
+
+class TextSink(OutputSink):
+    """Collects each emitted page's text, as an embedding sink would read it."""
+    def __init__(self):
+        super().__init__()
+        self.texts = {}
+
+    def page(self, record, document=None):
+        self.texts[record["url"]] = document.text if document is not None else None
+
+def test_cache_key_normalization():
+    assert cache_key("HTTP://Example.COM:80/path#frag") == "http://example.com/path"
+    assert cache_key("https://example.com") == "https://example.com/"
+    assert cache_key("https://example.com:8443/?q=1") == "https://example.com:8443/?q=1"
+
+def test_revalidation_and_ttl(etag_server, tmp_path):
+    url = etag_server.base + "/a"
+    session = create_session()
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    assert "Leaf" in fetch_html(url, session, cache=cache)
+    assert "Leaf" in fetch_html(url, session, cache=cache)
+    assert etag_server.log == [("/a", 200), ("/a", 304)]
+    cache.close()
+
+    # Within the TTL the cached body is served without touching the network.
+    cache = ResponseCache(str(tmp_path), ttl=3600)
+    assert "Leaf" in fetch_html(url, session, cache=cache)
+    assert len(etag_server.log) == 2
+    cache.close()
+    session.close()
+
+def test_unchanged_pages_skip_analysis(etag_server, tmp_path):
+    seed = etag_server.base + "/"
+    registry = CountingRegistry()
+
+    def crawl():
+        outputs = []
+        cache = ResponseCache(str(tmp_path), profile="test")
+        session = create_session()
+        crawl_page(seed, 2, set([seed]), outputs, use_plugins=True, plugins=registry, session=session, cache=cache)
+        session.close()
+        cache.close()
+        return outputs
+
+    first = crawl()
+    assert registry.calls == 2
+    second = crawl()
+    assert registry.calls == 2
+    assert second == first
+    assert [status for _, status in etag_server.log] == [200, 200, 304, 304]
+
+    # A changed page is re-analysed; the unchanged one is still reused.
+    etag_server.pages["/a"] = "<html><head><title>A2</title></head><body>Changed</body></html>"
+    third = crawl()
+    assert registry.calls == 3
+    assert "    Title: A2" in third
+
+def test_async_crawl_revalidates(etag_server, tmp_path):
+    seed = etag_server.base + "/"
+
+    async def crawl():
+        outputs = []
+        cache = ResponseCache(str(tmp_path), profile="test")
+        async with aiohttp.ClientSession() as session:
+            await async_crawl_page(seed, 2, set([seed]), outputs, session, cache=cache)
+        cache.close()
+        return outputs
+
+    first = asyncio.run(crawl())
+    second = asyncio.run(crawl())
+    assert sorted(second) == sorted(first)
+    assert [status for _, status in etag_server.log] == [200, 200, 304, 304]
+
+def test_replayed_pages_reach_sinks_with_text(etag_server, tmp_path):
+    seed = etag_server.base + "/"
+
+    def crawl():
+        sink = TextSink()
+        cache = ResponseCache(str(tmp_path), profile="test")
+        session = create_session()
+        crawl_page(seed, 2, set([seed]), sink, use_plugins=True, plugins=CountingRegistry(), session=session, cache=cache)
+        session.close()
+        cache.close()
+        return sink.texts
+
+    first = crawl()
+    assert crawl() == first
+    assert "Leaf" in first[etag_server.base + "/a"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the shared image fetcher.
+
+A local HTTP server counts the requests for every path. The tests verify that
+concurrent requests for one image share a single download, that identical images at
+different URLs are decoded once, that the decoded-image cache stays within its byte
+budget, and that oversized or non-image responses are rejected and not retried.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fetcher import FetchLimits, ResponseTooLarge, UnsupportedContentType
+from image_fetcher import IMAGE_CONTENT_TYPES, ByteLRU, ImageDecodeError, ImageFetcher
+
+class ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        time.sleep(0.05)
+        body = {"/big.png": b"x" * 5000, "/broken.png": b"not an image"}.get(self.path, b"logo-bytes")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html" if self.path == "/page.html" else "image/png")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def image_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class CountingDecoder:
+    """Stands in for OpenCV: "decodes" image bytes into a bytearray, rejecting non-images."""
+    def __init__(self):
+        self.decoded = []
+    def __call__(self, data):
+        self.decoded.append(data)
+        return None if data == b"not an image" else bytearray(data)
+
+def test_each_image_is_downloaded_and_decoded_once(image_server):
+    server, base = image_server
+    decoder = CountingDecoder()
+    fetcher = ImageFetcher(decode=decoder)
+    # Two plugins on several worker threads ask for the same site logo at once.
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        images = list(pool.map(fetcher.image, [f"{base}/logo.png"] * 8))
+    assert all(image is images[0] for image in images)
+    assert server.requests == ["/logo.png"]
+    # The same bytes at another URL are downloaded but not decoded again.
+    assert fetcher.image(f"{base}/copy/logo.png") is images[0]
+    assert len(decoder.decoded) == 1
+    assert fetcher.image(f"{base}/logo.png") is images[0]
+    assert server.requests == ["/logo.png", "/copy/logo.png"]
+
+def test_rejected_images_fail_fast(image_server):
+    server, base = image_server
+    fetcher = ImageFetcher(limits=FetchLimits(max_bytes=1000, content_types=IMAGE_CONTENT_TYPES), decode=CountingDecoder())
+    for _ in range(2):
+        with pytest.raises(ResponseTooLarge):
+            fetcher.image(f"{base}/big.png")
+        with pytest.raises(UnsupportedContentType):
+            fetcher.image(f"{base}/page.html")
+        with pytest.raises(ImageDecodeError):
+            fetcher.image(f"{base}/broken.png")
+    assert sorted(server.requests) == ["/big.png", "/broken.png", "/page.html"]
+
+def test_cache_is_bounded_by_bytes():
+    cache = ByteLRU(100)
+    cache.put("a", "A", 40)
+    cache.put("b", "B", 40)
+    assert cache.get("a") == "A"
+    cache.put("c", "C", 40)
+    # "b" was the least recently used entry.
+    assert cache.get("b") is None and cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.size == 80
+    cache.put("huge", "H", 500)
+    assert cache.get("huge") is None and cache.size == 80
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the KeywordExtractor plugin.
+
+These tests verify that the most frequent words are returned, and that the top_k and
+stopwords settings from the plugin configuration are honored, with configured
+stopwords added to the built-in ones.
+"""
+import pytest
+from plugin_extensions.keyword_extractor import KeywordExtractor
+
+HTML = "<html><body><p>The crawler crawls pages. The crawler parses pages and the parser finds links in pages.</p></body></html>"
+
+def test_keyword_extractor_defaults():
+    assert KeywordExtractor().process(HTML, "http://example.com")[:2] == ["pages", "crawler"]
+
+def test_keyword_extractor_settings():
+    plugin = KeywordExtractor()
+    plugin.configure({"top_k": 2, "stopwords": ["Pages", "crawler"]})
+    # "the" is still a built-in stopword.
+    assert plugin.process(HTML, "http://example.com") == ["crawls", "parses"]
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the keyword matcher.
+
+These tests verify that single words and multi-word phrases are counted per label,
+including overlapping matches, and that the automaton agrees with a brute-force
+scan on random token streams over a large keyword set.
+"""
+import random
+from collections import Counter
+import pytest
+from keyword_matcher import KeywordMatcher, tokenize
+
+def test_words_and_phrases_are_counted_per_label():
+    matcher = KeywordMatcher({
+        "Places": ["New York", "york", "New York City"],
+        "Sports": ["ice hockey", "hockey", "team"],
+        "Teams": ["team"],
+    })
+    tokens = tokenize("The New-York City ice hockey team; New York's other team plays hockey.")
+    assert matcher.counts(tokens) == Counter({"Places": 5, "Sports": 5, "Teams": 2})
+    assert matcher.counts(tokenize("nothing relevant here")) == Counter()
+    assert KeywordMatcher({}).counts(tokens) == Counter()
+
+def test_matches_brute_force_on_many_keywords():
+    rng = random.Random(7)
+    vocabulary = [f"w{i}" for i in range(30)]
+    keywords = {f"label{i}": [" ".join(rng.choices(vocabulary, k=rng.randint(1, 3))) for _ in range(20)] for i in range(100)}
+    matcher = KeywordMatcher(keywords)
+    for _ in range(20):
+        tokens = rng.choices(vocabulary, k=300)
+        expected = Counter()
+        for label, phrases in keywords.items():
+            for phrase in phrases:
+                words = phrase.split()
+                expected[label] += sum(tokens[i:i + len(words)] == words for i in range(len(tokens)))
+        assert matcher.counts(tokens) == +expected
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming output sinks.
+
+The text and JSON sinks must write exactly what the previous buffered output produced,
+and the NDJSON sink must write one parseable record per page.
+"""
+import io
+import json
+import os
+import tempfile
+import pytest
+from output import create_sink, emit_page
+
+MESSAGES = ["Crawler Name: test", "URL: http://example.com", 'Title: "Quoted" é']
+
+def write_all(output_format, messages, records=()):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "out")
+        stream = io.StringIO()
+        sink = create_sink(output_format, path, stream)
+        for message in messages:
+            sink.append(message)
+        for record in records:
+            emit_page(sink, record)
+        sink.close()
+        with open(path) as f:
+            return f.read(), stream.getvalue()
+
+@pytest.mark.parametrize("messages", [MESSAGES, []])
+def test_text_sink_matches_joined_output(messages):
+    written, printed = write_all("text", messages)
+    assert written == "\n".join(messages)
+    assert printed == "\n".join(messages) + "\n"
+
+@pytest.mark.parametrize("messages", [MESSAGES, []])
+def test_json_sink_matches_json_dumps(messages):
+    written, printed = write_all("json", messages)
+    assert written == json.dumps({"results": messages}, indent=2)
+    assert printed == written + "\n"
+
+def test_ndjson_sink_writes_one_record_per_page():
+    records = [
+        {"url": "http://example.com", "depth": 0, "title": "Home", "plugins": {"A": [1, 2]}},
+        {"url": "http://example.com/x", "depth": 1, "title": None, "plugins": {}, "error": "boom"},
+    ]
+    written, _ = write_all("ndjson", MESSAGES, records)
+    assert [json.loads(line) for line in written.splitlines()] == records
+
+def test_emit_page_ignores_plain_lists():
+    outputs = []
+    emit_page(outputs, {"url": "http://example.com"})
+    assert outputs == []
+
+if __name__ == "__main__":
+    pytest.main([__file__])
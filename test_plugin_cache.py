@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the plugin result cache.
+
+Plugins in a temporary plugin directory count their invocations, so the tests can
+verify that unchanged content reuses cached outputs and that a config change only
+invalidates the plugin whose settings changed.
+"""
+import asyncio
+import importlib
+import json
+import pytest
+import plugin_manager
+from document import PageDocument
+from plugin_cache import PluginResultCache, config_hash
+from plugin_manager import PluginRegistry, load_config
+from worker_pool import AnalysisPool
+
+COUNTING_PLUGINS = '''
+from plugins import PluginBase
+
+CALLS = {"text": 0, "html": 0, "never": 0}
+
+class TextCounter(PluginBase):
+    cache_by = "text"
+    def configure(self, config):
+        self.suffix = config.get("suffix", "")
+    def process(self, html, url, document=None):
+        CALLS["text"] += 1
+        return {"words": len(document.tokens), "suffix": self.suffix}
+
+class HtmlCounter(PluginBase):
+    def configure(self, config):
+        self.suffix = config.get("suffix", "")
+    def process(self, html, url, document=None):
+        CALLS["html"] += 1
+        return len(html)
+
+class NeverCached(PluginBase):
+    cache_by = None
+    def process(self, html, url, document=None):
+        CALLS["never"] += 1
+        return "fresh"
+'''
+
+PAGE = "<html><body><p>Same words here</p></body></html>"
+RESTYLED = "<html><body><div class='x'>Same   words\n here</div></body></html>"
+
+@pytest.fixture
+def plugin_env(tmp_path, monkeypatch):
+    # Other tests replace plugin_manager.load_config without restoring it.
+    monkeypatch.setattr(plugin_manager, "load_config", load_config)
+    plugin_dir = tmp_path / "plugin_extensions"
+    plugin_dir.mkdir()
+    (plugin_dir / "counting_plugins.py").write_text(COUNTING_PLUGINS)
+    config_path = tmp_path / "plugin_config.json"
+
+    def write_config(text_suffix="", html_suffix=""):
+        config_path.write_text(json.dumps({"plugins": {
+            "TextCounter": {"settings": {"suffix": text_suffix}},
+            "HtmlCounter": {"settings": {"suffix": html_suffix}},
+        }}))
+
+    write_config()
+    return str(plugin_dir), str(config_path), str(tmp_path / "cache"), write_config
+
+def crawl(plugin_dir, config_path, cache_dir, html, workers=None):
+    registry = PluginRegistry(plugin_dir, config_path, result_cache=PluginResultCache(cache_dir))
+    registry.load()
+    document = PageDocument(html, "http://example.com/")
+    if workers is None:
+        results = list(registry.process(html, document.url, document))
+    else:
+        async def run():
+            pool = AnalysisPool(workers, registry)
+            try:
+                return await pool.run_plugins(document)
+            finally:
+                pool.shutdown()
+        results = asyncio.run(run())
+    registry.close()
+    calls = dict(registry.plugins[0].process.__globals__["CALLS"])
+    return {name: result for name, result, _ in results}, calls
+
+def test_config_hash_is_stable():
+    assert config_hash({"a": 1, "b": [2]}) == config_hash({"b": [2], "a": 1})
+    assert config_hash({}) == config_hash(None)
+    assert config_hash({"a": 1}) != config_hash({"a": 2})
+
+def test_unchanged_text_reuses_outputs(plugin_env):
+    plugin_dir, config_path, cache_dir, _ = plugin_env
+    first, calls = crawl(plugin_dir, config_path, cache_dir, PAGE)
+    assert calls == {"text": 1, "html": 1, "never": 1}
+    # Same visible text under different markup: only the text-keyed plugin is reused.
+    second, calls = crawl(plugin_dir, config_path, cache_dir, RESTYLED)
+    assert second["TextCounter"] == first["TextCounter"]
+    assert calls == {"text": 0, "html": 1, "never": 1}
+
+def test_config_change_only_invalidates_that_plugin(plugin_env):
+    plugin_dir, config_path, cache_dir, write_config = plugin_env
+    crawl(plugin_dir, config_path, cache_dir, PAGE)
+    _, calls = crawl(plugin_dir, config_path, cache_dir, PAGE)
+    assert calls == {"text": 0, "html": 0, "never": 1}
+    write_config(html_suffix="v2")
+    results, calls = crawl(plugin_dir, config_path, cache_dir, PAGE)
+    assert calls == {"text": 0, "html": 1, "never": 1}
+    assert results["TextCounter"]["suffix"] == ""
+
+class FixedImage:
+    """Stands in for the crawl's ImageFetcher, serving whatever image is current."""
+    def __init__(self):
+        self.current = None
+
+    def image(self, url):
+        return self.current
+
+@pytest.mark.parametrize("module, name", [
+    ("visual_analyzer", "VisualAnalyzer"),
+    ("enhanced_visual_analyzer", "EnhancedVisualAnalyzer"),
+])
+def test_visual_plugins_are_never_cached(tmp_path, module, name):
+    pytest.importorskip("cv2")
+    plugin = getattr(importlib.import_module(f"plugin_extensions.{module}"), name)()
+    registry = PluginRegistry(result_cache=PluginResultCache(str(tmp_path)))
+    assert registry.content_key(plugin, PageDocument('<img src="/logo.png">', "http://example.com/")) is None
+    registry.result_cache.close()
+
+def test_changed_image_behind_same_src_is_reanalyzed(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    pytest.importorskip("cv2")
+    from plugin_extensions.visual_analyzer import VisualAnalyzer
+    document = PageDocument('<img src="/logo.png">', "http://example.com/")
+    images, results = FixedImage(), []
+    for fill in (0, 255):
+        images.current = numpy.full((2, 2, 3), fill, numpy.uint8)
+        registry = PluginRegistry(result_cache=PluginResultCache(str(tmp_path)), image_fetcher=images)
+        plugin = VisualAnalyzer()
+        plugin.image_fetcher = images
+        outcome = registry.cached(plugin, document) or ("VisualAnalyzer", plugin.process(document.html, document.url, document), None)
+        registry.remember(plugin, document, outcome)
+        registry.result_cache.close()
+        results.append(outcome[1])
+    assert results == [{"dominant_color": (0, 0, 0)}, {"dominant_color": (255, 255, 255)}]
+
+def test_analysis_pool_skips_cached_plugins(plugin_env):
+    plugin_dir, config_path, cache_dir, _ = plugin_env
+    first, calls = crawl(plugin_dir, config_path, cache_dir, PAGE, workers=2)
+    assert calls == {"text": 1, "html": 1, "never": 1}
+    second, calls = crawl(plugin_dir, config_path, cache_dir, PAGE, workers=2)
+    assert second == first
+    assert calls == {"text": 0, "html": 0, "never": 1}
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -4,14 +4,15 @@ Unit tests for the Plugin Manager.
 
 This test creates a temporary plugin directory with a dummy plugin and a temporary
 plugin configuration that enables the DummyPlugin. It then verifies that the Plugin
-Manager successfully loads the DummyPlugin.
+Manager successfully loads the DummyPlugin, and that the registry collects the
+crawl-level results plugins report from finish().
 """
 
 import os
 import tempfile
 import json
 import pytest
-from plugin_manager import load_plugins
+from plugin_manager import load_plugins, PluginRegistry
 
 def test_load_plugins_with_dummy_plugin():
     # Create a temporary directory to serve as the plugin directory.
@@ -40,5 +41,84 @@ class DummyPlugin(PluginBase):
         # Verify that DummyPlugin has been loaded.
         assert "DummyPlugin" in plugin_names
 
+def test_plugin_registry_loads_and_warms_once(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        plugin_dir = os.path.join(tmpdir, "plugin_extensions")
+        os.makedirs(plugin_dir, exist_ok=True)
+
+        # A plugin that counts how often it is instantiated and warmed up.
+        counting_plugin_code = '''
+from plugins import PluginBase
+class CountingPlugin(PluginBase):
+    instances = 0
+    warmups = 0
+    def __init__(self):
+        CountingPlugin.instances += 1
+    def warmup(self):
+        CountingPlugin.warmups += 1
+    def process(self, html, url):
+        return f"processed {url}"
+'''
+        with open(os.path.join(plugin_dir, "counting_plugin.py"), "w") as f:
+            f.write(counting_plugin_code)
+
+        import plugin_manager
+        monkeypatch.setattr(plugin_manager, "load_config", lambda config_path: {})
+
+        registry = PluginRegistry(plugin_dir)
+        results = []
+        for url in ["http://example.com/a", "http://example.com/b", "http://example.com/c"]:
+            results.extend(registry.process("<html></html>", url))
+
+        assert [result for _, result, _ in results] == [
+            "processed http://example.com/a",
+            "processed http://example.com/b",
+            "processed http://example.com/c",
+        ]
+        plugin_class = type(registry.plugins[0])
+        assert plugin_class.instances == 1
+        assert plugin_class.warmups == 1
+
+def test_plugin_registry_reports_crawl_level_results(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        plugin_dir = os.path.join(tmpdir, "plugin_extensions")
+        os.makedirs(plugin_dir, exist_ok=True)
+
+        # One plugin with a crawl-level result, one without, and one whose finish() fails.
+        finishing_plugin_code = '''
+from plugins import PluginBase
+class APagesPlugin(PluginBase):
+    def __init__(self):
+        self.urls = []
+    def process(self, html, url, document=None):
+        self.urls.append(url)
+        return len(self.urls)
+    def finish(self):
+        return sorted(self.urls)
+class BPagePlugin(PluginBase):
+    def process(self, html, url, document=None):
+        return url
+class CBrokenPlugin(PluginBase):
+    def process(self, html, url, document=None):
+        return None
+    def finish(self):
+        raise ValueError("no model")
+'''
+        with open(os.path.join(plugin_dir, "finishing_plugins.py"), "w") as f:
+            f.write(finishing_plugin_code)
+
+        import plugin_manager
+        monkeypatch.setattr(plugin_manager, "load_config", lambda config_path: {})
+
+        registry = PluginRegistry(plugin_dir)
+        for url in ["http://example.com/b", "http://example.com/a"]:
+            list(registry.process("<html></html>", url))
+        finished = list(registry.finish())
+        assert [(name, result) for name, result, _ in finished] == [
+            ("APagesPlugin", ["http://example.com/a", "http://example.com/b"]),
+            ("CBrokenPlugin", None),
+        ]
+        assert isinstance(finished[1][2], ValueError)
+
 if __name__ == "__main__":
     pytest.main([__file__])
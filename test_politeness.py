@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-host politeness.
+
+These tests verify the token bucket arithmetic, robots.txt parsing and caching (a
+failing robots.txt disallows its host until it is tried again, and downloads are
+capped), that disallowed pages are never fetched, and that a host in its Crawl-delay cool-down does
+not hold up concurrent workers that could be crawling other hosts, and that per-host
+concurrency grows on healthy hosts and backs off on overloaded ones.
+"""
+import asyncio
+import io
+import time
+import pytest
+import requests
+from main import async_crawl_page, crawl_page
+from fetcher import CHUNK_SIZE
+from politeness import ROBOTS_ERROR_TTL, ROBOTS_MAX_BYTES, AdaptiveConcurrency, Politeness, RobotsCache, RobotsDisallowed, TokenBucket, retry_after_seconds
+
+class RawBody(io.BytesIO):
+    """Stands in for urllib3's response.raw."""
+    def read1(self, size=-1, decode_content=True):
+        return super().read1(size)
+
+class Response:
+    def __init__(self, text, status=200):
+        self.text = text
+        self.status_code = status
+        self.headers = {}
+        self.raw = RawBody(text.encode())
+    def close(self):
+        pass
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+ROBOTS = "User-agent: *\nDisallow: /private\nCrawl-delay: 0.1\n"
+
+def test_token_bucket_spaces_requests():
+    bucket = TokenBucket(interval=2, burst=2)
+    assert bucket.reserve(now=bucket.updated) == 0
+    assert bucket.reserve(now=bucket.updated) == 0
+    assert bucket.reserve(now=bucket.updated) == pytest.approx(2)
+    # The queued reservation is paid back before the next token accrues.
+    assert bucket.ready_in(now=bucket.updated + 3) == pytest.approx(1)
+    assert TokenBucket(interval=0).reserve() == 0
+
+@pytest.mark.parametrize("status, allowed", [(200, False), (404, True), (403, False), (503, False)])
+def test_robots_status_handling(status, allowed):
+    robots = RobotsCache()
+    rules = robots.parse("http://site/", status, ROBOTS)
+    assert robots.allowed(rules, "http://site/private/x") == allowed
+    assert robots.allowed(rules, "http://site/public") == (status not in (403, 503))
+
+def test_failing_robots_disallows_until_retried(monkeypatch):
+    statuses = [503, 200]
+    def get(url, headers=None, **kwargs):
+        return Response(ROBOTS, status=statuses.pop(0))
+    monkeypatch.setattr(requests, "get", get)
+    robots = RobotsCache()
+    assert not robots.allowed(robots.fetch("http://site/"), "http://site/public")
+    assert robots.cached("http://site/") is not None
+    # The error is only cached for ROBOTS_ERROR_TTL; past it, the file is fetched again.
+    later = time.monotonic() + ROBOTS_ERROR_TTL + 1
+    monkeypatch.setattr(time, "monotonic", lambda: later)
+    assert robots.allowed(robots.fetch("http://site/"), "http://site/public")
+    assert not statuses
+
+def test_oversized_robots_is_not_read(monkeypatch):
+    fetched = []
+    def get(url, headers=None, **kwargs):
+        response = Response("User-agent: *\nDisallow: /x\n" + "#" * ROBOTS_MAX_BYTES)
+        fetched.append(response)
+        return response
+    monkeypatch.setattr(requests, "get", get)
+    robots = RobotsCache()
+    assert not robots.allowed(robots.fetch("http://site/"), "http://site/public")
+    assert fetched[0].raw.tell() <= ROBOTS_MAX_BYTES + CHUNK_SIZE
+
+def test_robots_crawl_delay_and_request_rate():
+    robots = RobotsCache("mybot")
+    rules = robots.parse("http://site/", 200, "User-agent: mybot\nCrawl-delay: 2\nRequest-rate: 1/5\n")
+    assert robots.crawl_delay(rules) == 5
+    politeness = Politeness(delay=1)
+    politeness.robots = robots
+    politeness.apply("http://site/a", rules)
+    assert politeness.bucket("site").interval == 5
+
+def test_sync_crawl_obeys_robots(monkeypatch):
+    fetched = []
+    def get(url, headers=None, **kwargs):
+        fetched.append(url)
+        if url == "http://site/robots.txt":
+            return Response(ROBOTS)
+        links = "<a href='/private/a'>p</a><a href='/b'>b</a><a href='/c'>c</a>"
+        return Response(f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+    monkeypatch.setattr(requests, "get", get)
+    outputs = []
+    start = time.monotonic()
+    crawl_page("http://site/", 2, {"http://site/"}, outputs, politeness=Politeness())
+    elapsed = time.monotonic() - start
+    assert fetched == ["http://site/robots.txt", "http://site/", "http://site/b", "http://site/c"]
+    assert any("disallowed by robots.txt" in line for line in outputs)
+    # Three page fetches at the robots.txt Crawl-delay of 0.1s.
+    assert elapsed >= 0.2
+    with pytest.raises(RobotsDisallowed):
+        Politeness().check("http://site/private/a")
+
+class FakeResponse:
+    def __init__(self, text, status=200, headers=None, hosts=None):
+        self._text = text
+        self.status = status
+        self.headers = headers or {}
+        # The [in flight, max in flight] counter of the response's host.
+        self.hosts = hosts
+    async def __aenter__(self):
+        await asyncio.sleep(0.005)
+        return self
+    async def __aexit__(self, *exc):
+        if self.hosts is not None:
+            self.hosts[0] -= 1
+    def raise_for_status(self):
+        if self.status >= 400:
+            response = requests.Response()
+            response.status_code = self.status
+            response.headers.update(self.headers)
+            raise requests.HTTPError(f"{self.status} error", response=response)
+    async def text(self):
+        return self._text
+    @property
+    def content(self):
+        return self
+    async def iter_chunked(self, size):
+        yield self._text.encode()
+
+class TwoHostSession:
+    """slow.test asks for a 0.1s Crawl-delay; fast.test has no robots.txt."""
+    def __init__(self):
+        self.fetched = []
+    def get(self, url, headers=None):
+        self.fetched.append((url, time.monotonic()))
+        if url == "http://slow.test/robots.txt":
+            return FakeResponse("User-agent: *\nCrawl-delay: 0.1\n")
+        if url.endswith("/robots.txt"):
+            return FakeResponse("", status=404)
+        links = "".join(f'<a href="/{i}">{i}</a>' for i in range(5)) if url.endswith(".test/") else ""
+        return FakeResponse(f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+
+def test_cooling_host_does_not_block_other_hosts():
+    session = TwoHostSession()
+    seeds = ["http://slow.test/", "http://fast.test/"]
+    asyncio.run(async_crawl_page(seeds, 2, set(seeds), [], session, concurrency=2, politeness=Politeness()))
+    pages = [(url, at) for url, at in session.fetched if not url.endswith("robots.txt")]
+    assert len(pages) == 12
+    assert sum(url.endswith("robots.txt") for url, _ in session.fetched) == 2
+    slow = [at for url, at in pages if "slow" in url]
+    fast = [at for url, at in pages if "fast" in url]
+    assert all(b - a >= 0.09 for a, b in zip(slow, slow[1:]))
+    # fast.test is finished while slow.test is still waiting out its delays.
+    assert max(fast) < slow[2]
+
+def test_aimd_grows_and_backs_off():
+    limit = AdaptiveConcurrency(maximum=6)
+    for i in range(30):
+        limit.success(0.05, now=i)
+    assert limit.limit == 6
+    limit.backoff(now=100)
+    assert limit.limit == 3
+    # A second failure within the same round trip is the same congestion event.
+    limit.backoff(now=100.01)
+    assert limit.limit == 3
+    # Latency jumping well above the host's norm also counts as congestion.
+    limit.success(0.5, now=200)
+    limit.success(0.5, now=201)
+    assert limit.limit == 1
+
+def test_retry_after_pauses_host():
+    assert retry_after_seconds("120") == 120
+    assert retry_after_seconds("soon") is None
+    politeness = Politeness(max_per_host=4)
+    assert politeness.concurrency("site") == 1
+    politeness.observe("http://site/a", 429, 0.01, "2")
+    assert politeness.ready_in("site") == pytest.approx(2, abs=0.1)
+    assert politeness.ready_in("other") == 0
+
+class LoadSession:
+    """cdn.test serves anything; fragile.test answers 429 whenever more than one request is in flight."""
+    def __init__(self):
+        self.hosts = {"cdn.test": [0, 0], "fragile.test": [0, 0]}
+        self.throttled = 0
+    def get(self, url, headers=None):
+        host = url.split("/")[2]
+        if url.endswith("/robots.txt"):
+            return FakeResponse("", status=404)
+        counter = self.hosts[host]
+        counter[0] += 1
+        counter[1] = max(counter[1], counter[0])
+        children = 12 if host == "cdn.test" else 4
+        links = "".join(f'<a href="/{i}">{i}</a>' for i in range(children)) if url.endswith(".test/") else ""
+        if host == "fragile.test" and counter[0] > 1:
+            self.throttled += 1
+            return FakeResponse("", status=429, headers={"Retry-After": "0"}, hosts=counter)
+        return FakeResponse(f"<html><head><title>{url}</title></head><body>{links}</body></html>", hosts=counter)
+
+def test_concurrency_adapts_per_host():
+    session = LoadSession()
+    seeds = ["http://cdn.test/", "http://fragile.test/"]
+    politeness = Politeness(max_per_host=6)
+    outputs = []
+    # A fixed per-domain semaphore must not cap hosts on top of their adaptive limit.
+    domain_semaphores = {}
+    asyncio.run(async_crawl_page(seeds, 2, set(seeds), outputs, session, concurrency=8, politeness=politeness, domain_semaphores=domain_semaphores, max_per_domain=1))
+    assert sum(1 for line in outputs if "Title:" in line) == 18
+    assert not domain_semaphores
+    assert session.hosts["cdn.test"][1] > 2
+    # fragile.test is probed at 2 now and then, but halved again on every 429.
+    assert session.hosts["fragile.test"][1] == 2
+    assert session.throttled
+
+if __name__ == "__main__":
+    pytest.main([__file__])
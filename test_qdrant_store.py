@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for per-page Qdrant persistence.
+
+Uses Qdrant's in-memory client and a fake embedding model to verify that pages become
+individual points with stable IDs, that embedding is batched, that recrawls update
+the collection rather than wiping it (dropping the chunks a shorter page no longer has),
+and that pages replayed from a checkpoint are already in the collection.
+"""
+import pytest
+
+pytest.importorskip("qdrant_client")
+pytest.importorskip("sentence_transformers")
+
+from qdrant_client import QdrantClient
+from checkpoint import CrawlCheckpoint
+from document import PageDocument
+from qdrant_store import QdrantSink, point_id, chunk_text, VECTOR_SIZE
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+    def encode(self, texts, batch_size=32):
+        self.calls.append(len(texts))
+        return [[float(len(text) % 7 + 1)] + [0.5] * (VECTOR_SIZE - 1) for text in texts]
+
+def crawl_into(sink, urls):
+    for url in urls:
+        document = PageDocument(f"<html><head><title>{url}</title></head><body><p>Body of {url} with words</p></body></html>", url)
+        sink.page({"url": url, "depth": 0, "title": document.title, "plugins": {}}, document)
+    sink.close()
+
+def test_pages_are_batched_and_upserted_with_stable_ids():
+    client = QdrantClient(":memory:")
+    model = FakeModel()
+    urls = [f"http://example.com/{i}" for i in range(5)]
+    crawl_into(QdrantSink(collection="pages", batch_size=2, client=client, model=model), urls)
+    assert model.calls == [2, 2, 1]
+    assert client.count("pages").count == 5
+    points = client.retrieve("pages", ids=[point_id(urls[0])], with_payload=True)
+    assert points[0].payload["url"] == urls[0]
+
+def test_recrawl_appends_and_updates_in_place():
+    client = QdrantClient(":memory:")
+    crawl_into(QdrantSink(collection="pages", client=client, model=FakeModel()), ["http://example.com/a", "http://example.com/b"])
+    crawl_into(QdrantSink(collection="pages", client=client, model=FakeModel()), ["http://example.com/b", "http://example.com/c"])
+    assert client.count("pages").count == 3
+    crawl_into(QdrantSink(collection="pages", client=client, model=FakeModel(), recreate=True), ["http://example.com/c"])
+    assert client.count("pages").count == 1
+
+def test_chunked_pages_get_one_point_per_chunk():
+    assert chunk_text("one two three four five", 2) == ["one two", "three four", "five"]
+    assert chunk_text("whole page", 0) == ["whole page"]
+    client = QdrantClient(":memory:")
+    crawl_into(QdrantSink(collection="chunks", chunk_size=3, client=client, model=FakeModel()), ["http://example.com/long"])
+    assert client.count("chunks").count > 1
+    assert point_id("http://example.com/long", 1) != point_id("http://example.com/long", 0)
+
+def test_shorter_page_drops_stale_chunks():
+    client = QdrantClient(":memory:")
+    url = "http://example.com/long"
+    long_page = PageDocument("<html><body><p>" + " ".join(f"word{i}" for i in range(10)) + "</p></body></html>", url)
+    sink = QdrantSink(collection="chunks", chunk_size=3, client=client, model=FakeModel())
+    sink.page({"url": url, "depth": 0}, long_page)
+    sink.page({"url": "http://example.com/other", "depth": 0}, long_page)
+    sink.close()
+    assert client.count("chunks").count == 8
+    crawl_into(QdrantSink(collection="chunks", chunk_size=3, client=client, model=FakeModel()), [url])
+    points, _ = client.scroll("chunks", with_payload=True)
+    assert sorted(point.payload["chunk"] for point in points if point.payload["url"] == url) == [0, 1]
+    assert client.count("chunks").count == 6
+
+def test_checkpoint_flushes_before_committing_pages(tmp_path):
+    client = QdrantClient(":memory:")
+    sink = QdrantSink(collection="pages", batch_size=64, client=client, model=FakeModel())
+    checkpoint = CrawlCheckpoint(str(tmp_path / "crawl.db"))
+    checkpoint.sinks = sink
+    document = PageDocument("<html><body><p>Some text</p></body></html>", "http://example.com/a")
+    sink.page({"url": document.url, "depth": 0}, document)
+    checkpoint.page({"url": document.url, "depth": 0})
+    assert client.count("pages").count == 0
+    checkpoint.save([])
+    assert client.count("pages").count == 1
+    checkpoint.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the retry policy.
+
+These tests verify which failures are retried, the jittered waits and retry budget,
+and that both crawlers retry transient errors while failing fast on permanent ones.
+"""
+import asyncio
+import time
+import pytest
+import requests
+from main import async_crawl_page, crawl_page
+from politeness import RobotsDisallowed
+from retry import RetryBudget, RetryPolicy, is_retryable
+from test_crawler import DummyResponse
+
+def http_error(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return requests.HTTPError(f"{status} error", response=response)
+
+@pytest.mark.parametrize("error, retryable", [
+    (requests.Timeout("slow"), True),
+    (requests.ConnectionError("reset"), True),
+    (asyncio.TimeoutError(), True),
+    (ConnectionResetError(), True),
+    (http_error(503), True),
+    (http_error(429), True),
+    (http_error(404), False),
+    (http_error(403), False),
+    (RobotsDisallowed("no"), False),
+    (ValueError("bad"), False),
+])
+def test_retry_classification(error, retryable):
+    assert is_retryable(error) == retryable
+
+def test_jittered_delays_and_retry_after():
+    policy = RetryPolicy(max_retries=5, base_delay=0.5, max_delay=4)
+    previous = None
+    for retry in range(1, 6):
+        delay = policy.next_delay(http_error(503), retry, previous)
+        assert 0.5 <= delay <= min(4, (previous or 0.5) * 3)
+        previous = delay
+    assert policy.next_delay(http_error(503), 6, previous) is None
+    assert policy.next_delay(http_error(404), 1) is None
+    assert policy.next_delay(http_error(429, {"Retry-After": "3"}), 1) >= 3
+
+def test_budget_limits_retries_across_pages():
+    policy = RetryPolicy(max_retries=3, budget=RetryBudget(ratio=0.5, minimum=2))
+    assert policy.next_delay(http_error(503), 1) is not None
+    assert policy.next_delay(http_error(503), 1) is not None
+    assert policy.next_delay(http_error(503), 1) is None
+    # Two more pages earn back one retry.
+    policy.budget.deposit()
+    policy.budget.deposit()
+    assert policy.next_delay(http_error(503), 1) is not None
+
+def test_sync_crawl_retries_transient_errors(monkeypatch):
+    calls = {}
+    def flaky_get(url, headers=None):
+        calls[url] = calls.get(url, 0) + 1
+        if url == "http://site/" and calls[url] < 3:
+            raise http_error(503)
+        if url == "http://site/missing":
+            raise http_error(404)
+        links = "<a href='/missing'>m</a>" if url == "http://site/" else ""
+        return DummyResponse(f"<html><head><title>{url}</title></head><body>{links}</body></html>")
+    monkeypatch.setattr(requests, "get", flaky_get)
+    outputs = []
+    crawl_page("http://site/", 2, {"http://site/"}, outputs, retry_policy=RetryPolicy(base_delay=0.01))
+    assert calls == {"http://site/": 3, "http://site/missing": 1}
+    assert any("Title: http://site/" in line for line in outputs)
+    assert any("Error fetching URL: 404 error" in line for line in outputs)
+
+class FlakyResponse:
+    def __init__(self, session, url):
+        self.session = session
+        self.url = url
+        self.status = 200
+        self.headers = {}
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        self.session.fetched.append((self.url, time.monotonic()))
+        return self
+    async def __aexit__(self, *exc):
+        pass
+    def raise_for_status(self):
+        attempts = self.session.attempts
+        attempts[self.url] = attempts.get(self.url, 0) + 1
+        if self.url.endswith("/flaky") and attempts[self.url] == 1:
+            raise http_error(503)
+    async def text(self):
+        links = '<a href="/flaky">f</a><a href="/other">o</a>' if self.url.endswith(".test/") else ""
+        return f"<html><head><title>{self.url}</title></head><body>{links}</body></html>"
+
+class FlakySession:
+    def __init__(self):
+        self.fetched = []
+        self.attempts = {}
+    def get(self, url, headers=None):
+        return FlakyResponse(self, url)
+
+def test_async_retry_releases_domain_slot():
+    session = FlakySession()
+    root = "http://site.test/"
+    outputs = []
+    policy = RetryPolicy(base_delay=0.2, max_delay=0.2)
+    asyncio.run(async_crawl_page(root, 2, {root}, outputs, session, concurrency=3, domain_semaphores={}, max_per_domain=1, retry_policy=policy))
+    assert session.attempts["http://site.test/flaky"] == 2
+    assert sum(1 for line in outputs if "Title:" in line) == 3
+    # /other used the host's only slot while /flaky waited to retry.
+    order = [url for url, _ in session.fetched]
+    assert order.index("http://site.test/other") < len(order) - 1
+    assert order[-1] == "http://site.test/flaky"
+
+if __name__ == "__main__":
+    pytest.main([__file__])
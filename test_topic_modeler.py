@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the TopicModeler plugin.
+
+These tests verify that one model is trained across the pages of a crawl, that
+finish() reports the crawl's topics and every page's final topic distribution, and
+that a saved model is reloaded by the next crawl for inference only. A recrawl with a
+warm response cache must still show the model every page.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from fetcher import create_session
+from http_cache import ResponseCache
+from main import crawl_page
+from plugin_cache import PluginResultCache
+from plugin_manager import PluginRegistry
+from plugin_extensions.topic_modeler import TopicModeler
+
+PAGES = {
+    f"http://example.com/{i}": f"<html><body><p>{text}</p></body></html>"
+    for i, text in enumerate([
+        "football match team player goal league season coach",
+        "election government policy vote senate parliament minister",
+        "football player transfer team coach stadium fans",
+        "government vote election campaign policy debate senate",
+    ] * 3)
+}
+
+def crawl(modeler):
+    return {url: modeler.process(html, url) for url, html in PAGES.items()}
+
+def test_topics_are_learned_across_pages():
+    modeler = TopicModeler()
+    modeler.configure({"topic_modeling": {"num_topics": 2, "chunk_size": 4, "passes": 5, "vocabulary_size": 1024}})
+    modeler.warmup()
+    results = crawl(modeler)
+    assert all(0 < len(result["topics"]) <= 2 for result in results.values())
+    assert modeler.process("<html></html>", "http://example.com/empty") == "No text found for topic modeling."
+    report = modeler.finish()
+    assert [topic for topic, _ in report["topics"]] == [0, 1]
+    assert set(report["pages"]) == set(PAGES)
+    # Pages about the same subject end up dominated by the same topic.
+    dominant = {url: max(distribution, key=lambda pair: pair[1])[0] for url, distribution in report["pages"].items()}
+    assert dominant["http://example.com/0"] == dominant["http://example.com/2"]
+    assert dominant["http://example.com/1"] == dominant["http://example.com/3"]
+    assert modeler.finish() is None
+
+def test_saved_model_is_reused_for_inference(tmp_path):
+    settings = {"topic_modeling": {"num_topics": 2, "chunk_size": 4, "vocabulary_size": 1024, "model_path": str(tmp_path / "topics.lda")}}
+    first = TopicModeler()
+    first.configure(settings)
+    first.warmup()
+    crawl(first)
+    topics = first.finish()["topics"]
+    assert (tmp_path / "topics.lda").exists()
+
+    second = TopicModeler()
+    second.configure(settings)
+    second.warmup()
+    assert not second.training
+    crawl(second)
+    assert second.finish()["topics"] == topics
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/":
+            body = "<html><body>" + "".join(f'<a href="/{i}">{i}</a>' for i in range(len(PAGES))) + "</body></html>"
+        else:
+            body = PAGES.get("http://example.com" + self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        data = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", f'"{hash(body)}"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def test_warm_cache_recrawl_reaches_every_page(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    seed = f"http://127.0.0.1:{server.server_address[1]}/"
+    modeler = TopicModeler()
+    modeler.configure({"topic_modeling": {"num_topics": 2, "chunk_size": 4, "vocabulary_size": 1024}})
+    registry = PluginRegistry(result_cache=PluginResultCache(str(tmp_path / "plugins")))
+    registry.plugins, registry.loaded, registry.takes_document = [modeler], True, {id(modeler): True}
+
+    def crawl():
+        outputs = []
+        cache = ResponseCache(str(tmp_path / "responses"), profile="test")
+        session = create_session()
+        crawl_page(seed, 2, set([seed]), outputs, use_plugins=True, plugins=registry, session=session, cache=cache)
+        session.close()
+        cache.close()
+        [(name, report, error)] = registry.finish()
+        return report
+
+    try:
+        first = crawl()
+        # The second crawl finds every page unchanged, yet the model still sees all of them.
+        second = crawl()
+    finally:
+        server.shutdown()
+        server.server_close()
+        registry.close()
+    pages = {seed + str(i) for i in range(len(PAGES))}
+    assert set(first["pages"]) == pages
+    assert set(second["pages"]) == pages
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the AnalysisPool worker stage.
+
+A temporary plugin directory holds one plugin per executor route; the test verifies
+that each plugin runs where it is declared to run and that results come back in
+plugin load order, that pages for a batch-aware plugin are grouped into
+process_batch() calls, and that a config reload reaches process-routed plugins.
+"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import pytest
+import plugin_manager
+from document import PageDocument
+from plugin_cache import PluginResultCache
+from plugin_manager import PluginRegistry, load_config, reload_config
+from worker_pool import AnalysisPool
+
+ROUTED_PLUGINS = '''
+import os
+import threading
+from plugins import PluginBase
+
+class AInlinePlugin(PluginBase):
+    executor = "inline"
+    def process(self, html, url, document=None):
+        return ("inline", os.getpid(), threading.get_ident())
+
+class BThreadPlugin(PluginBase):
+    def process(self, html, url, document=None):
+        return ("thread", os.getpid(), threading.get_ident())
+
+class CProcessPlugin(PluginBase):
+    executor = "process"
+    def process(self, html, url, document=None):
+        return ("process", os.getpid(), document.title)
+'''
+
+def run_pool(workers, plugin_dir, config_path):
+    async def run():
+        pool = AnalysisPool(workers, PluginRegistry(plugin_dir, config_path))
+        document = PageDocument("<html><head><title>Routed</title></head></html>", "http://example.com/")
+        try:
+            await pool.parse(document)
+            return await pool.run_plugins(document), threading.get_ident()
+        finally:
+            pool.shutdown()
+    return asyncio.run(run())
+
+@pytest.fixture
+def routed_plugin_dir():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        plugin_dir = os.path.join(tmpdir, "plugin_extensions")
+        os.makedirs(plugin_dir)
+        with open(os.path.join(plugin_dir, "routed_plugins.py"), "w") as f:
+            f.write(ROUTED_PLUGINS)
+        config_path = os.path.join(tmpdir, "plugin_config.json")
+        with open(config_path, "w") as f:
+            json.dump({"plugins": {}}, f)
+        yield plugin_dir, config_path
+
+def test_analysis_pool_routes_plugins(routed_plugin_dir):
+    results, loop_thread = run_pool(2, *routed_plugin_dir)
+    assert [name for name, _, _ in results] == ["AInlinePlugin", "BThreadPlugin", "CProcessPlugin"]
+    assert all(error is None for _, _, error in results)
+    outputs = {name: result for name, result, _ in results}
+    assert outputs["AInlinePlugin"][2] == loop_thread
+    assert outputs["BThreadPlugin"][1] == os.getpid()
+    assert outputs["BThreadPlugin"][2] != loop_thread
+    assert outputs["CProcessPlugin"][1] != os.getpid()
+    assert outputs["CProcessPlugin"][2] == "Routed"
+
+def test_analysis_pool_without_workers_runs_inline(routed_plugin_dir):
+    results, loop_thread = run_pool(0, *routed_plugin_dir)
+    for name, result, error in results:
+        assert error is None
+        assert result[1] == os.getpid()
+
+BATCHED_PLUGIN = '''
+from plugins import PluginBase
+
+class BatchedPlugin(PluginBase):
+    batch_size = 3
+    batch_wait = 0.05
+    def process(self, html, url, document=None):
+        return self.process_batch([document])[0]
+    def process_batch(self, documents):
+        # Each result records the size of the batch its page was processed in.
+        return [ValueError("bad page") if document.title == "bad" else (document.title, len(documents)) for document in documents]
+'''
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_batched_plugin_groups_pages(routed_plugin_dir, workers):
+    plugin_dir, config_path = routed_plugin_dir
+    os.remove(os.path.join(plugin_dir, "routed_plugins.py"))
+    with open(os.path.join(plugin_dir, "batched_plugin.py"), "w") as f:
+        f.write(BATCHED_PLUGIN)
+    titles = ["a", "b", "bad", "c", "d"]
+    async def run():
+        pool = AnalysisPool(workers, PluginRegistry(plugin_dir, config_path))
+        documents = [PageDocument(f"<html><head><title>{title}</title></head></html>", f"http://example.com/{title}") for title in titles]
+        try:
+            return await asyncio.gather(*(pool.run_plugins(document) for document in documents))
+        finally:
+            pool.shutdown()
+    pages = asyncio.run(run())
+    # Three pages fill the first batch; the other two go together once batch_wait has passed.
+    outcomes = [outcome for (outcome,) in pages]
+    assert [result for _, result, _ in outcomes] == [("a", 3), ("b", 3), None, ("c", 2), ("d", 2)]
+    assert isinstance(outcomes[2][2], ValueError)
+
+CONFIGURED_PLUGIN = '''
+from plugins import PluginBase
+
+class SuffixPlugin(PluginBase):
+    executor = "process"
+    def configure(self, settings):
+        self.suffix = settings.get("suffix", "")
+    def process(self, html, url, document=None):
+        return document.title + self.suffix
+'''
+
+def test_config_reload_restarts_process_workers(routed_plugin_dir, tmp_path, monkeypatch):
+    # Other tests replace plugin_manager.load_config without restoring it.
+    monkeypatch.setattr(plugin_manager, "load_config", load_config)
+    plugin_dir, config_path = routed_plugin_dir
+    os.remove(os.path.join(plugin_dir, "routed_plugins.py"))
+    with open(os.path.join(plugin_dir, "configured_plugin.py"), "w") as f:
+        f.write(CONFIGURED_PLUGIN)
+    def write_config(suffix):
+        with open(config_path, "w") as f:
+            json.dump({"plugins": {"SuffixPlugin": {"settings": {"suffix": suffix}}}}, f)
+    write_config("-v1")
+    cache = PluginResultCache(str(tmp_path))
+    registry = PluginRegistry(plugin_dir, config_path, result_cache=cache)
+    document = PageDocument("<html><head><title>page</title></head></html>", "http://example.com/")
+    async def run():
+        pool = AnalysisPool(2, registry)
+        try:
+            first = await pool.run_plugins(document)
+            write_config("-v2")
+            reload_config(config_path)
+            return first, await pool.run_plugins(document)
+        finally:
+            pool.shutdown()
+    first, second = asyncio.run(run())
+    assert first == [("SuffixPlugin", "page-v1", None)]
+    assert second == [("SuffixPlugin", "page-v2", None)]
+    plugin = registry.plugins[0]
+    assert cache.lookup("SuffixPlugin", registry.config_key(plugin), document.html_hash) == "page-v2"
+    cache.close()
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+URL canonicalisation for the crawler.
+
+Different spellings of the same page (fragment links, upper-case hosts, explicit
+default ports, reordered or tracking query parameters) normalise to one URL, so
+the crawler fetches each page once.
+"""
+import fnmatch
+import urllib.parse
+
+# Query parameters that only track the referrer and never change the page.
+TRACKING_PARAMS = ["utm_*", "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "yclid"]
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+def is_stripped(key, strip_params):
+    key = urllib.parse.unquote_plus(key)
+    return any(fnmatch.fnmatchcase(key, pattern) for pattern in strip_params)
+
+def normalize_url(url, strip_params=TRACKING_PARAMS, strip_trailing_slash=False):
+    """
+    Returns the canonical form of an absolute URL:
+      - scheme and host are lower-cased, default ports and the fragment are dropped
+      - an empty path becomes "/"; with strip_trailing_slash, "/x/" becomes "/x"
+      - query parameters matching strip_params (shell-style patterns) are removed and
+        the remaining ones are sorted; an empty query is dropped
+    """
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    netloc = host
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{host}:{port}"
+    if parts.username is not None:
+        userinfo = parts.username + (f":{parts.password}" if parts.password is not None else "")
+        netloc = f"{userinfo}@{netloc}"
+    path = parts.path or "/"
+    if strip_trailing_slash and len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    # Parameters are filtered and sorted as raw "key=value" pairs, so their encoding is kept.
+    params = [param for param in parts.query.split("&") if param]
+    params = [param for param in params if not is_stripped(param.split("=", 1)[0], strip_params)]
+    query = "&".join(sorted(params))
+    return urllib.parse.urlunsplit((scheme, netloc, path, query, ""))
+
+class UrlNormalizer:
+    """normalize_url with the crawl's settings bound, usable as a plain callable."""
+    def __init__(self, strip_params=TRACKING_PARAMS, strip_trailing_slash=False):
+        self.strip_params = list(strip_params)
+        self.strip_trailing_slash = strip_trailing_slash
+
+    def __call__(self, url):
+        return normalize_url(url, self.strip_params, self.strip_trailing_slash)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Worker pool stage for the concurrent crawler.
+
+Moves HTML parsing and plugin processing off the asyncio event loop so fetching
+and analysis overlap. Each plugin is routed by its `executor` class attribute:
+thread-routed plugins share a thread pool, process-routed plugins run in a pool
+of worker processes that each hold their own warmed copy of those plugins, and
+inline plugins run directly on the event loop. The worker processes load their
+plugins from the config file, so they are restarted when a config reload changes
+the settings of a process-routed plugin.
+
+Plugins with a `batch_size` above 1 do not run per page: a MicroBatcher collects
+pages from all crawl workers and hands them to the plugin's process_batch() together,
+so a model runs one forward pass over several pages.
+
+With workers=0 everything runs inline, matching the original behaviour.
+"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from document import PageDocument
+from fetcher import create_session
+from plugin_manager import PluginRegistry
+
+# Registry of process-routed plugins, one per worker process.
+_process_registry = None
+
+def _init_process_worker(plugin_dir, config_path, names):
+    global _process_registry
+    # Sessions cannot cross process boundaries, so each worker pools its own connections.
+    _process_registry = PluginRegistry(plugin_dir, config_path, names=names, session=create_session())
+    _process_registry.load()
+
+def _run_plugins_in_process(html, url, parser, names):
+    # The page is re-parsed once in the worker and shared by all of its plugins.
+    # Each outcome carries the config hash the worker's plugin ran with.
+    document = PageDocument(html, url, parser)
+    results = []
+    for plugin in _process_registry.plugins:
+        if plugin.__class__.__name__ not in names:
+            continue
+        name, result, error = _process_registry.run(plugin, document)
+        if error is not None:
+            # Exceptions raised by third-party libraries are not always picklable.
+            error = RuntimeError(str(error))
+        results.append(((name, result, error), _process_registry.config_key(plugin)))
+    return results
+
+def _lookup_cached(registry, plugins, document):
+    # Fingerprinting needs the page text, so this runs on a worker thread when there is one.
+    registry.record_page(document)
+    return {id(plugin): registry.cached(plugin, document) for plugin in plugins}
+
+def _execute(registry, plugin, document):
+    return registry.remember(plugin, document, registry.execute(plugin, document))
+
+def _execute_batch(registry, plugin, documents):
+    outcomes = registry.execute_batch(plugin, documents)
+    return [registry.remember(plugin, document, outcome) for document, outcome in zip(documents, outcomes)]
+
+def _parse(document):
+    # Touch the views the crawler itself needs so they are built on the worker thread.
+    document.title
+    document.links
+    return document
+
+class MicroBatcher:
+    """
+    Groups the pages submitted for one plugin into process_batch() calls. A batch is
+    dispatched when it holds the plugin's batch_size pages, or batch_wait seconds after
+    its first page arrived, whichever comes first.
+    """
+    def __init__(self, pool, plugin):
+        self.pool = pool
+        self.plugin = plugin
+        self.batch_size = max(1, plugin.batch_size)
+        self.batch_wait = plugin.batch_wait
+        self.waiting = []
+        self.timer = None
+        self.running = set()
+
+    def submit(self, document):
+        """Returns a future for the page's (plugin_name, result, error) tuple."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.waiting.append((document, future))
+        if len(self.waiting) >= self.batch_size:
+            self.dispatch()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.batch_wait, self.dispatch)
+        return future
+
+    def dispatch(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.waiting = self.waiting, []
+        if batch:
+            task = asyncio.ensure_future(self.run(batch))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def run(self, batch):
+        documents = [document for document, _ in batch]
+        try:
+            outcomes = await self.pool.call(self.plugin, _execute_batch, self.pool.plugins, self.plugin, documents)
+        except Exception as e:
+            name = self.plugin.__class__.__name__
+            outcomes = [(name, None, e) for _ in batch]
+        for (_, future), outcome in zip(batch, outcomes):
+            if not future.done():
+                future.set_result(outcome)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        for task in self.running:
+            task.cancel()
+
+class AnalysisPool:
+    def __init__(self, workers, plugins=None):
+        self.workers = workers
+        self.plugins = plugins
+        self.thread_pool = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.process_pool = None
+        # Config hashes of the process-routed plugins the current worker processes loaded.
+        self.process_config = None
+        self.batchers = {}
+
+    def _route(self, plugin):
+        if self.workers <= 0:
+            return "inline"
+        return getattr(plugin, "executor", "thread")
+
+    def _batched(self, plugin):
+        return getattr(plugin, "batch_size", 1) > 1 and self._route(plugin) != "process"
+
+    def _batcher(self, plugin):
+        if id(plugin) not in self.batchers:
+            self.batchers[id(plugin)] = MicroBatcher(self, plugin)
+        return self.batchers[id(plugin)]
+
+    async def call(self, plugin, function, *args):
+        """Runs function(*args) where the plugin's route says: on the thread pool or inline."""
+        if self._route(plugin) == "thread":
+            return await asyncio.get_running_loop().run_in_executor(self.thread_pool, function, *args)
+        return function(*args)
+
+    def _ensure_process_pool(self, plugins):
+        process_plugins = [plugin for plugin in plugins if self._route(plugin) == "process"]
+        names = [plugin.__class__.__name__ for plugin in process_plugins]
+        config = {plugin.__class__.__name__: self.plugins.config_key(plugin) for plugin in process_plugins}
+        if self.process_pool is not None and config != self.process_config:
+            # Pages already submitted still finish on the old workers.
+            self.process_pool.shutdown(wait=False)
+            self.process_pool = None
+        if names and self.process_pool is None:
+            self.process_pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_process_worker,
+                initargs=(self.plugins.plugin_dir, self.plugins.config_path, names)
+            )
+            self.process_config = config
+        return names
+
+    async def parse(self, document):
+        if self.thread_pool is None:
+            return _parse(document)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.thread_pool, _parse, document)
+
+    async def run_plugins(self, document):
+        """
+        Runs every plugin of the crawl over a page on its routed executor.
+        Returns (plugin_name, result, error) tuples in plugin load order.
+        """
+        plugins = self.plugins.load()
+        loop = asyncio.get_running_loop()
+        cached = {}
+        if self.plugins.result_cache is not None:
+            if self.thread_pool is None:
+                cached = _lookup_cached(self.plugins, plugins, document)
+            else:
+                cached = await loop.run_in_executor(self.thread_pool, _lookup_cached, self.plugins, plugins, document)
+        self._ensure_process_pool(plugins)
+        process_names = [
+            plugin.__class__.__name__ for plugin in plugins
+            if self._route(plugin) == "process" and cached.get(id(plugin)) is None
+        ]
+        pending = {}
+        if process_names:
+            pending["process"] = loop.run_in_executor(
+                self.process_pool, _run_plugins_in_process, document.html, document.url, document.parser, process_names
+            )
+        for plugin in plugins:
+            route = self._route(plugin)
+            if cached.get(id(plugin)) is not None:
+                continue
+            if self._batched(plugin):
+                pending[id(plugin)] = self._batcher(plugin).submit(document)
+            elif route == "thread":
+                pending[id(plugin)] = loop.run_in_executor(self.thread_pool, _execute, self.plugins, plugin, document)
+
+        process_results = {}
+        if "process" in pending:
+            try:
+                process_results = {outcome[0]: (outcome, key) for outcome, key in await pending["process"]}
+            except Exception as e:
+                logging.error(f"Process worker failed for {document.url}: {e}")
+                process_results = {name: ((name, None, e), None) for name in process_names}
+
+        results = []
+        for plugin in plugins:
+            route = self._route(plugin)
+            name = plugin.__class__.__name__
+            if cached.get(id(plugin)) is not None:
+                results.append(cached[id(plugin)])
+            elif route == "process":
+                outcome, key = process_results.get(name, ((name, None, RuntimeError("Plugin did not load in worker process")), None))
+                # A worker still running older settings must not fill the cache under the new hash.
+                if key == self.plugins.config_key(plugin):
+                    outcome = self.plugins.remember(plugin, document, outcome)
+                results.append(outcome)
+            elif id(plugin) in pending:
+                results.append(await pending[id(plugin)])
+            else:
+                results.append(_execute(self.plugins, plugin, document))
+        return results
+
+    def shutdown(self):
+        for batcher in self.batchers.values():
+            batcher.close()
+        if self.thread_pool is not None:
+            self.thread_pool.shutdown(wait=True)
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=True)